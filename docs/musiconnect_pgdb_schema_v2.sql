@@ -86,6 +86,15 @@ CREATE TABLE providers.tokens (
 CREATE INDEX idx_provider_tokens_account_id
     ON providers.tokens(account_id);
 
+-- Pending OAuth logins: state parameter -> user, until the callback arrives.
+-- Shared so the callback can land on any connector replica.
+CREATE TABLE providers.oauth_states (
+    state               VARCHAR(64) PRIMARY KEY,
+    user_id             VARCHAR(255) NOT NULL,    -- X-User-Id of the login request
+    provider            VARCHAR(50) NOT NULL,
+    created_at          TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
 -- Optional: light playlist snapshot table (if you want caching later).
 -- Keep but don't overuse yet.
 CREATE TABLE providers.playlist_snapshots (
@@ -144,8 +153,9 @@ CREATE TABLE migrations.playlists (
     source_name             TEXT,
     target_playlist_id      VARCHAR(255),
     target_name             TEXT,
-    status                  VARCHAR(20) NOT NULL DEFAULT 'pending', -- 'pending','completed','failed'
+    status                  VARCHAR(20) NOT NULL DEFAULT 'pending', -- 'pending','completed','failed','deferred'
     error_message           TEXT,
+    timings                 JSONB,                   -- per-stage seconds/calls of the finished migration
     created_at              TIMESTAMPTZ NOT NULL DEFAULT NOW()
 );
 
@@ -163,7 +173,7 @@ CREATE TABLE migrations.tracks (
     target_title            TEXT,
     target_artist           TEXT,
     match_score             NUMERIC(5,2),
-    status                  VARCHAR(20) NOT NULL DEFAULT 'pending', -- 'pending','matched','failed'
+    status                  VARCHAR(20) NOT NULL DEFAULT 'pending', -- 'pending','matched','failed','deferred','duplicate'
     error_message           TEXT,
     created_at              TIMESTAMPTZ NOT NULL DEFAULT NOW()
 );
@@ -171,6 +181,78 @@ CREATE TABLE migrations.tracks (
 CREATE INDEX idx_migration_tracks_playlist
     ON migrations.tracks(playlist_migration_id);
 
+-- Resumable migration checkpoints, one per (user, source playlist, target playlist).
+-- user_id is the MusicConnect username sent by the UI.
+CREATE TABLE migrations.checkpoints (
+    id                      BIGSERIAL PRIMARY KEY,
+    user_id                 VARCHAR(255) NOT NULL,
+    source_provider         VARCHAR(50) NOT NULL,
+    source_playlist_id      VARCHAR(255) NOT NULL,
+    target_provider         VARCHAR(50) NOT NULL,
+    target_playlist_id      VARCHAR(255) NOT NULL,
+    status                  VARCHAR(20) NOT NULL DEFAULT 'running', -- 'running','completed'
+    source_version          VARCHAR(255),            -- Spotify snapshot_id / YouTube ETag at last completed sync
+    updated_at              TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    UNIQUE (user_id, source_provider, source_playlist_id, target_provider, target_playlist_id)
+);
+
+-- Per-source-track progress inside a checkpoint
+CREATE TABLE migrations.checkpoint_tracks (
+    checkpoint_id           BIGINT NOT NULL REFERENCES migrations.checkpoints(id) ON DELETE CASCADE,
+    source_track_key        VARCHAR(300) NOT NULL,   -- '<source id>#<occurrence>'
+    target_track_id         VARCHAR(255),
+    target_write_id         VARCHAR(255),            -- Spotify URI / YouTube videoId
+    target_title            TEXT,
+    target_artist           TEXT,
+    match_score             NUMERIC(5,2),
+    added                   BOOLEAN NOT NULL DEFAULT FALSE,
+    duplicate               BOOLEAN NOT NULL DEFAULT FALSE, -- skipped: a copy of a song already written
+    updated_at              TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (checkpoint_id, source_track_key)
+);
+
+-- Cross-user cache of source -> target track resolutions.
+-- cache_key = '<target provider>|<normalized title>|<normalized artist>'
+CREATE TABLE migrations.match_cache (
+    cache_key               VARCHAR(600) PRIMARY KEY,
+    target_provider         VARCHAR(50) NOT NULL,
+    target_track_id         VARCHAR(255),
+    target_write_id         VARCHAR(255),
+    target_title            TEXT,
+    target_artist           TEXT,
+    match_score             NUMERIC(5,2) NOT NULL,
+    expires_at              DOUBLE PRECISION NOT NULL  -- unix epoch seconds
+);
+
+CREATE INDEX idx_migration_match_cache_expires
+    ON migrations.match_cache(expires_at);
+
+-- Dry-run match plans: every candidate per source track, applied later by a commit.
+CREATE TABLE migrations.match_plans (
+    id                      BIGSERIAL PRIMARY KEY,
+    user_id                 VARCHAR(255) NOT NULL,
+    source_provider         VARCHAR(50) NOT NULL,
+    source_playlist_id      VARCHAR(255) NOT NULL,
+    source_name             TEXT,
+    target_provider         VARCHAR(50) NOT NULL,
+    min_score               NUMERIC(5,2) NOT NULL,
+    status                  VARCHAR(20) NOT NULL DEFAULT 'planned', -- 'planned','committed'
+    target_playlist_id      VARCHAR(255),
+    created_at              TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    committed_at            TIMESTAMPTZ
+);
+
+CREATE TABLE migrations.match_plan_tracks (
+    plan_id                 BIGINT NOT NULL REFERENCES migrations.match_plans(id) ON DELETE CASCADE,
+    position                INTEGER NOT NULL,
+    source_track_id         VARCHAR(255),
+    source_title            TEXT,
+    source_artist           TEXT,
+    candidates              JSONB NOT NULL,          -- [{track_id, write_id, title, artist, score}], best first
+    deferred                BOOLEAN NOT NULL DEFAULT FALSE, -- not searched: the quota ran out
+    PRIMARY KEY (plan_id, position)
+);
+
 -- ============================================
 -- 6. Permissions for musiconnect_app (DB user)
 -- ============================================
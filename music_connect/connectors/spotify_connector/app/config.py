@@ -17,8 +17,18 @@ class Settings(BaseSettings):
         "user-library-modify"
     )
 
+    # --- Profile Cache ---
+    # Seconds a user's /v1/me profile is reused; 0 disables the cache
+    SPOTIFY_PROFILE_CACHE_TTL_SECONDS: int = 3600
+
+    # --- Token Refresh ---
+    # Access tokens are refreshed this many seconds before they expire,
+    # by a background sweep every SPOTIFY_TOKEN_SWEEP_INTERVAL_SECONDS (0 disables it)
+    SPOTIFY_TOKEN_REFRESH_MARGIN_SECONDS: int = 300
+    SPOTIFY_TOKEN_SWEEP_INTERVAL_SECONDS: int = 60
+
     # --- Storage Backend ---
-    STORAGE_BACKEND: str = "memory"
+    STORAGE_BACKEND: str = "memory"   # 'memory', 'postgres' or 'sqlite'
 
     # --- Postgres Settings ---
     MC_PG_HOST: Optional[str] = None
@@ -28,6 +38,13 @@ class Settings(BaseSettings):
     MC_PG_PASSWORD: Optional[str] = None
     MC_PG_SSLMODE: Optional[str] = None
 
+    # --- Token Store (postgres / sqlite backends) ---
+    TOKEN_DB_POOL_MIN_SIZE: int = 1
+    TOKEN_DB_POOL_MAX_SIZE: int = 10
+    # Seconds tokens read from the database are reused in-process
+    TOKEN_CACHE_TTL_SECONDS: int = 30
+    TOKEN_SQLITE_PATH: str = "spotify_tokens.db"
+
     # --- CORS Settings (FIX) ---
     CORS_ALLOWED_ORIGINS: List[str] = ["*"]
     CORS_ALLOWED_METHODS: List[str] = ["*"]
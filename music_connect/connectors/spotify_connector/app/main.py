@@ -1,17 +1,29 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.config import settings
 from app.routers import auth, music
+from app.services.token_refresher import token_refresher
 from app.utils.logger import get_logger
 
 logger = get_logger(__name__)
 
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Keep stored access tokens refreshed ahead of expiry
+    token_refresher.start()
+    yield
+    token_refresher.stop()
+
+
 app = FastAPI(
     title="SpotifyConnectorService",
     version="1.0.0",
     description="MusicConnect Spotify connector microservice",
+    lifespan=lifespan,
 )
 
 app.add_middleware(
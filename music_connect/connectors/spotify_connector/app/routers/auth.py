@@ -8,6 +8,7 @@ import time
 from app.dependencies import get_user_id
 from app.services.spotify_service import SpotifyService
 from app.storage.token_manager import token_manager
+from app.storage.profile_cache import profile_cache
 from app.config import settings
 
 AUTH_URL = "https://accounts.spotify.com/authorize"
@@ -78,6 +79,8 @@ def callback(
         "refresh_token": token_payload.get("refresh_token"),
         "expires_at": expires_at,
     })
+    # Re-auth may be as a different Spotify account: drop the cached profile
+    profile_cache.invalidate(user_id)
 
     # Redirect user to UI (same behavior as before)
     return RedirectResponse("http://localhost:3000/spotify")
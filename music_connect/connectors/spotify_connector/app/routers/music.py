@@ -17,8 +17,12 @@ def me(user_id: str = Depends(get_user_id)):
     return SpotifyService(user_id).get_user_profile()
 
 @router.get("/playlists")
-def playlists(user_id: str = Depends(get_user_id)):
-    return SpotifyService(user_id).get_playlists()
+def playlists(
+    limit: int = Query(20, ge=1, le=50),
+    offset: int = Query(0, ge=0),
+    user_id: str = Depends(get_user_id)
+):
+    return SpotifyService(user_id).get_playlists(limit=limit, offset=offset)
 
 @router.get("/tracks")
 def tracks(user_id: str = Depends(get_user_id)):
@@ -37,11 +41,15 @@ def remove(id: str, data: RemoveTracksRequest, user_id: str = Depends(get_user_i
     return SpotifyService(user_id).remove_tracks_from_playlist(id, data.uris)
 
 @router.get("/search")
-def search(q: str = Query(...), user_id: str = Depends(get_user_id)):
+def search(
+    q: str = Query(...),
+    limit: int = Query(10, ge=1, le=50),
+    user_id: str = Depends(get_user_id)
+):
     service = SpotifyService(user_id=user_id)
 
     url = "https://api.spotify.com/v1/search"
-    params = {"q": q, "type": "track", "limit": 10}
+    params = {"q": q, "type": "track", "limit": limit}
 
     r = requests.get(url, headers=service._headers(), params=params)
 
@@ -51,20 +59,16 @@ def search(q: str = Query(...), user_id: str = Depends(get_user_id)):
     data = r.json()
     return data.get("tracks", {}).get("items", [])
 
-@router.get("/search")
-def search(q: str = Query(...), user_id: str = Depends(get_user_id)):
-    service = SpotifyService(user_id=user_id)
-
-    url = "https://api.spotify.com/v1/search"
-    params = {"q": q, "type": "track", "limit": 10}
-
-    r = requests.get(url, headers=service._headers(), params=params)
-
-    if r.status_code != 200:
-        raise HTTPException(r.status_code, r.text)
-
-    data = r.json()
-    return data.get("tracks", {}).get("items", [])
+@router.get("/playlist/{playlist_id}")
+def get_playlist(
+    playlist_id: str,
+    user_id: str = Depends(get_user_id)
+):
+    """
+    Returns one playlist's name, description, snapshot_id and track total.
+    """
+    service = SpotifyService(user_id)
+    return service.get_playlist(playlist_id)
 
 @router.get("/playlist/{playlist_id}/tracks")
 def get_playlist_tracks(
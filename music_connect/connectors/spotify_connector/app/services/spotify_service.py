@@ -7,6 +7,8 @@ from fastapi import HTTPException
 
 from app.config import settings
 from app.storage.token_manager import token_manager
+from app.storage.profile_cache import profile_cache
+from app.services.token_refresher import token_refresher
 from app.interfaces.music_service_interface import MusicServiceInterface
 from app.utils.logger import get_logger
 
@@ -79,6 +81,8 @@ class SpotifyService(MusicServiceInterface):
             "refresh_token": payload.get("refresh_token"),
             "expires_at": expires_at,
         })
+        # The user may have signed in as a different Spotify account
+        profile_cache.invalidate(user_id)
 
         return {"status": "ok", "user_id": user_id}
 
@@ -115,43 +119,19 @@ class SpotifyService(MusicServiceInterface):
         if not tokens:
             raise HTTPException(401, "Authenticate with /auth/login first")
 
-        # Auto-refresh logic (FR1.2)
+        # Auto-refresh logic (FR1.2): only an expired token makes the request
+        # wait; one that is merely close to expiry is refreshed in the background
         if tokens["expires_at"] < time.time():
             return self._refresh()
 
+        if tokens.get("refresh_token") and token_refresher.due(tokens):
+            token_refresher.refresh(self.user_id)
+
         return tokens["access_token"]
 
     def _refresh(self):
-        tokens = token_manager.get_tokens(self.user_id)
-        refresh_token = tokens.get("refresh_token")
-
-        if not refresh_token:
-            raise HTTPException(401, "Refresh token missing — re-authentication required")
-
-        client_creds = f"{settings.SPOTIFY_CLIENT_ID}:{settings.SPOTIFY_CLIENT_SECRET}"
-        b64 = base64.b64encode(client_creds.encode()).decode()
-
-        resp = requests.post(
-            TOKEN_URL,
-            headers={"Authorization": f"Basic {b64}"},
-            data={"grant_type": "refresh_token", "refresh_token": refresh_token},
-        )
-
-        if resp.status_code != 200:
-            raise HTTPException(401, "Session expired — please re-authenticate")
-
-        payload = resp.json()
-
-        tokens["access_token"] = payload["access_token"]
-        tokens["expires_at"] = int(time.time()) + payload["expires_in"]
-
-        # Spotify sometimes sends a new refresh token
-        if payload.get("refresh_token"):
-            tokens["refresh_token"] = payload["refresh_token"]
-
-        token_manager.store_tokens(self.user_id, tokens)
-
-        return tokens["access_token"]
+        # Joins a refresh already in flight for this user, if there is one
+        return token_refresher.refresh(self.user_id).result()
 
     def _headers(self):
         token = self._ensure_token()
@@ -162,8 +142,16 @@ class SpotifyService(MusicServiceInterface):
     # ----------------------------------------------------
 
     def get_user_profile(self):
+        profile = profile_cache.get(self.user_id)
+        if profile is not None:
+            return profile
+
         r = self._request_with_backoff("GET", f"{API_BASE}/me", headers=self._headers())
-        return r.json()
+        profile = r.json()
+        if r.status_code == 200:
+            profile_cache.set(self.user_id, profile)
+            token_manager.link_account(self.user_id, profile["id"], profile.get("display_name"))
+        return profile
 
     def get_playlists(self, limit=20, offset=0):
         r = self._request_with_backoff(
@@ -250,6 +238,20 @@ class SpotifyService(MusicServiceInterface):
 
         return {"total": len(all_items), "items": all_items}
 
+    def get_playlist(self, playlist_id: str):
+        # Only the metadata callers need, not the first page of tracks
+        r = self._request_with_backoff(
+            "GET",
+            f"{API_BASE}/playlists/{playlist_id}",
+            headers=self._headers(),
+            params={"fields": "id,name,description,snapshot_id,tracks.total"},
+        )
+
+        if r.status_code != 200:
+            raise HTTPException(r.status_code, r.text)
+
+        return r.json()
+
     def follow_playlist(self, playlist_id: str):
         r = self._request_with_backoff(
             "PUT",
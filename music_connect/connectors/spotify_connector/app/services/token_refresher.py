@@ -0,0 +1,150 @@
+import time
+import base64
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict
+
+import requests
+from fastapi import HTTPException
+
+from app.config import settings
+from app.storage.token_manager import token_manager
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+TOKEN_URL = "https://accounts.spotify.com/api/token"
+
+
+class TokenRefresher:
+    """
+    Refreshes Spotify access tokens off the request path.
+
+    At most one refresh per user is in flight: concurrent callers share
+    its future instead of each posting to TOKEN_URL, and other replicas
+    wait on the user's token row while it runs. Tokens are refreshed
+    `margin` seconds before they expire, by a sweeper thread for every
+    stored user and on demand when a request notices one close to expiry,
+    so requests only wait on a refresh when the token has already expired.
+    """
+
+    def __init__(self, margin: int, interval: int, workers: int = 4):
+        self.margin = margin
+        self.interval = interval
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="spotify-token")
+        self.lock = threading.Lock()
+        self.inflight: Dict[str, Future] = {}   # user_id → pending refresh
+        self.stopped = threading.Event()
+        self.sweeper = None
+
+    def due(self, tokens: dict) -> bool:
+        return tokens["expires_at"] - self.margin <= time.time()
+
+    # ----------------------------------------------------
+    #  SINGLE-FLIGHT REFRESH
+    # ----------------------------------------------------
+
+    def refresh(self, user_id: str) -> Future:
+        """
+        Start a refresh for user_id, or join the one already running.
+        The future resolves to the new access token.
+        """
+        # Requests and the sweeper may name the same user differently
+        user_id = token_manager.user_key(user_id)
+        with self.lock:
+            future = self.inflight.get(user_id)
+            if future is None:
+                future = self.executor.submit(self._refresh, user_id)
+                self.inflight[user_id] = future
+                future.add_done_callback(lambda f: self._done(user_id, f))
+            return future
+
+    def _done(self, user_id: str, future: Future):
+        with self.lock:
+            if self.inflight.get(user_id) is future:
+                del self.inflight[user_id]
+
+        error = future.exception()
+        if error is not None:
+            detail = error.detail if isinstance(error, HTTPException) else error
+            logger.warning(f"Token refresh for {user_id} failed: {detail}")
+
+    def _refresh(self, user_id: str) -> str:
+        # Read from the database, not the token cache: another replica may
+        # already have used (and so revoked) the refresh token cached here
+        tokens = token_manager.update_tokens(user_id, self._renew)
+        if not tokens:
+            raise HTTPException(401, "Authenticate with /auth/login first")
+        return tokens["access_token"]
+
+    def _renew(self, tokens: dict):
+        """
+        New tokens for update_tokens(), or None when there is nothing to store.
+        """
+        if not tokens:
+            return None
+
+        # A refresh that finished just before this one started already did the work
+        if not self.due(tokens):
+            return None
+
+        refresh_token = tokens.get("refresh_token")
+        if not refresh_token:
+            raise HTTPException(401, "Refresh token missing — re-authentication required")
+
+        client_creds = f"{settings.SPOTIFY_CLIENT_ID}:{settings.SPOTIFY_CLIENT_SECRET}"
+        b64 = base64.b64encode(client_creds.encode()).decode()
+
+        resp = requests.post(
+            TOKEN_URL,
+            headers={"Authorization": f"Basic {b64}"},
+            data={"grant_type": "refresh_token", "refresh_token": refresh_token},
+        )
+
+        if resp.status_code != 200:
+            raise HTTPException(401, "Session expired — please re-authenticate")
+
+        payload = resp.json()
+
+        tokens["access_token"] = payload["access_token"]
+        tokens["expires_at"] = int(time.time()) + payload["expires_in"]
+
+        # Spotify sometimes sends a new refresh token
+        if payload.get("refresh_token"):
+            tokens["refresh_token"] = payload["refresh_token"]
+
+        return tokens
+
+    # ----------------------------------------------------
+    #  BACKGROUND SWEEPER
+    # ----------------------------------------------------
+
+    def start(self):
+        if self.sweeper is not None or self.interval <= 0:
+            return
+        self.stopped.clear()
+        self.sweeper = threading.Thread(target=self._sweep, name="spotify-token-sweeper", daemon=True)
+        self.sweeper.start()
+
+    def stop(self):
+        self.stopped.set()
+        if self.sweeper is not None:
+            self.sweeper.join(timeout=5)
+            self.sweeper = None
+
+    def _sweep(self):
+        while not self.stopped.wait(self.interval):
+            try:
+                for user_id in token_manager.list_user_ids():
+                    tokens = token_manager.get_tokens(user_id)
+                    if tokens and tokens.get("refresh_token") and self.due(tokens):
+                        self.refresh(user_id)
+            except Exception as e:
+                logger.warning(f"Token sweep failed: {e}")
+
+
+# Global instance used everywhere
+token_refresher = TokenRefresher(
+    settings.SPOTIFY_TOKEN_REFRESH_MARGIN_SECONDS,
+    settings.SPOTIFY_TOKEN_SWEEP_INTERVAL_SECONDS,
+)
@@ -0,0 +1,11 @@
+from app.config import settings
+from app.utils.ttl_cache import TTLCache
+
+
+# -----------------------
+# Per-user Spotify profile cache
+# -----------------------
+# /v1/me responses. A profile only changes when the user re-authenticates
+# (possibly as another Spotify account), so the auth callback invalidates it.
+
+profile_cache = TTLCache(settings.SPOTIFY_PROFILE_CACHE_TTL_SECONDS)
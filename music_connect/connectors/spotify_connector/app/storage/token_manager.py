@@ -1,4 +1,14 @@
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
 from app.config import settings
+from app.utils.ttl_cache import TTLCache
+
+# Unused OAuth states are dropped after this long
+OAUTH_STATE_TTL_SECONDS = 3600
 
 
 # -----------------------
@@ -24,27 +34,331 @@ class MemoryTokenManager:
     def get_tokens(self, user_id: str):
         return self.tokens.get(user_id)
 
+    def update_tokens(self, user_id: str, update):
+        tokens = self.tokens.get(user_id)
+        new_tokens = update(dict(tokens) if tokens else None)
+        if new_tokens is None:
+            return tokens
+        self.store_tokens(user_id, new_tokens)
+        return new_tokens
+
+    def user_key(self, user_id: str) -> str:
+        return user_id
+
+    def list_user_ids(self):
+        return list(self.tokens)
+
+    def link_account(self, user_id: str, provider_user_id: str, display_name: str = None):
+        pass
+
 
 # -----------------------
-# Postgres-Based Token Manager (future)
+# Postgres-Based Token Manager
 # -----------------------
+# Tokens live in providers.accounts / providers.tokens from
+# docs/musiconnect_pgdb_schema_v2.sql, one account and one token row per
+# (user, provider), so every replica sees the same tokens. OAuth states go
+# to providers.oauth_states, so the callback may land on any replica.
+#
+# Queries are written once with '?' placeholders and run unchanged against
+# Postgres and the SQLite stand-in below.
+#
+# Callers name a user by X-User-Id: an email or a core.users id, both
+# unique (display names are not, so they are never looked up). Everything
+# cached or listed here is keyed by user_key(), the core.users id, so the
+# sweeper and requests agree on who is who.
 
 class PostgresTokenManager:
-    def __init__(self):
-        # Placeholder until DB teammate implements
-        raise NotImplementedError("Postgres token storage not implemented yet")
+    placeholder = "%s"
+    # Holds the token row until the transaction ends; see update_tokens()
+    lock_rows = " FOR UPDATE OF t"
+    provider = "spotify"
+
+    def __init__(self, cache_ttl: int = settings.TOKEN_CACHE_TTL_SECONDS):
+        # Read-through cache, so _headers() does not query the database on
+        # every Spotify call. Writes from this process update it directly;
+        # writes from other replicas show up within cache_ttl seconds.
+        self.cache = TTLCache(cache_ttl)
+        self.user_keys = {}  # X-User-Id → user_key; a user's id never changes
+        self.pool = self._connect()
+
+    def _connect(self):
+        from psycopg_pool import ConnectionPool
+
+        return ConnectionPool(
+            min_size=settings.TOKEN_DB_POOL_MIN_SIZE,
+            max_size=settings.TOKEN_DB_POOL_MAX_SIZE,
+            kwargs={
+                "host": settings.MC_PG_HOST,
+                "port": settings.MC_PG_PORT,
+                "dbname": settings.MC_PG_DB,
+                "user": settings.MC_PG_USER,
+                "password": settings.MC_PG_PASSWORD,
+                "sslmode": settings.MC_PG_SSLMODE,
+            },
+            open=True,
+        )
+
+    @contextmanager
+    def _transaction(self):
+        # The pool commits when the block exits cleanly and rolls back otherwise
+        with self.pool.connection() as conn:
+            yield conn
 
+    def _run(self, conn, sql: str, params: tuple = ()) -> list:
+        cur = conn.execute(sql.replace("?", self.placeholder), params)
+        return cur.fetchall() if cur.description else []
+
+    def _execute(self, sql: str, params: tuple = ()) -> list:
+        with self._transaction() as conn:
+            return self._run(conn, sql, params)
+
+    def user_key(self, user_id: str) -> str:
+        key = self.user_keys.get(user_id)
+        if key is None:
+            with self._transaction() as conn:
+                key = str(self._user_key(conn, user_id))
+            self.user_keys[user_id] = key
+        return key
+
+    def _user_key(self, conn, user_id: str):
+        # providers.accounts.user_id references core.users(id)
+        if user_id.isdigit():
+            return int(user_id)
+
+        rows = self._run(
+            conn,
+            "SELECT id FROM core.users WHERE email = ?",
+            (user_id,),
+        )
+        if not rows:
+            raise ValueError(f"Unknown MusicConnect user: {user_id}")
+        return rows[0][0]
+
+    # OAuth state
     def set_state(self, state: str, user_id: str):
-        raise NotImplementedError
+        with self._transaction() as conn:
+            # Logins abandoned before the callback leave their state behind
+            self._run(
+                conn,
+                "DELETE FROM providers.oauth_states WHERE created_at < ?",
+                (iso_from_epoch(time.time() - OAUTH_STATE_TTL_SECONDS),),
+            )
+            self._run(
+                conn,
+                "INSERT INTO providers.oauth_states (state, user_id, provider, created_at) VALUES (?, ?, ?, ?)",
+                (state, user_id, self.provider, iso_from_epoch(time.time())),
+            )
 
     def pop_state(self, state: str):
-        raise NotImplementedError
+        rows = self._execute(
+            "DELETE FROM providers.oauth_states WHERE state = ? RETURNING user_id",
+            (state,),
+        )
+        return rows[0][0] if rows else None
 
+    # Token storage
     def store_tokens(self, user_id: str, token_payload: dict):
-        raise NotImplementedError
+        key = self.user_key(user_id)
+        with self._transaction() as conn:
+            self._store(conn, key, token_payload)
+        self.cache.set(key, token_payload)
+
+    def _store(self, conn, user_id: str, token_payload: dict):
+        account_id = self._account_id(conn, user_id)
+        params = (
+            token_payload["access_token"],
+            token_payload.get("refresh_token"),
+            token_payload.get("scope"),
+            iso_from_epoch(token_payload["expires_at"]),
+            iso_from_epoch(time.time()),
+            account_id,
+        )
+        updated = self._run(
+            conn,
+            "UPDATE providers.tokens SET access_token = ?, refresh_token = ?, scope = ?, "
+            "expires_at = ?, updated_at = ? WHERE account_id = ? RETURNING id",
+            params,
+        )
+        if not updated:
+            self._run(
+                conn,
+                "INSERT INTO providers.tokens "
+                "(access_token, refresh_token, scope, expires_at, updated_at, account_id) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                params,
+            )
+
+    def _account_id(self, conn, user_id: str) -> int:
+        user_key = self._user_key(conn, user_id)
+        # provider_user_id is filled in by link_account once the profile is known
+        self._run(
+            conn,
+            "INSERT INTO providers.accounts (user_id, provider, provider_user_id) VALUES (?, ?, '') "
+            "ON CONFLICT (user_id, provider) DO NOTHING",
+            (user_key, self.provider),
+        )
+        rows = self._run(
+            conn,
+            "SELECT id FROM providers.accounts WHERE user_id = ? AND provider = ?",
+            (user_key, self.provider),
+        )
+        return rows[0][0]
 
     def get_tokens(self, user_id: str):
-        raise NotImplementedError
+        key = self.user_key(user_id)
+        tokens = self.cache.get(key)
+        if tokens is not None:
+            return tokens
+
+        with self._transaction() as conn:
+            tokens = self._load(conn, key)
+        if tokens is not None:
+            self.cache.set(key, tokens)
+        return tokens
+
+    def update_tokens(self, user_id: str, update):
+        """
+        Read the user's tokens from the database, not the cache, and store
+        what update(tokens) returns (None leaves them as they are). Returns
+        the tokens now stored.
+
+        The token row stays locked until the new tokens are written, so a
+        replica updating the same user waits and then reads the result
+        instead of refreshing a second time.
+        """
+        key = self.user_key(user_id)
+        with self._transaction() as conn:
+            tokens = self._load(conn, key, lock=True)
+            new_tokens = update(dict(tokens) if tokens else None)
+            if new_tokens is not None:
+                self._store(conn, key, new_tokens)
+                tokens = new_tokens
+
+        if tokens is not None:
+            self.cache.set(key, tokens)
+        return tokens
+
+    def _load(self, conn, user_id: str, lock: bool = False):
+        rows = self._run(
+            conn,
+            "SELECT t.access_token, t.refresh_token, t.scope, t.expires_at "
+            "FROM providers.tokens t JOIN providers.accounts a ON a.id = t.account_id "
+            "WHERE a.user_id = ? AND a.provider = ? ORDER BY t.updated_at DESC LIMIT 1"
+            + (self.lock_rows if lock else ""),
+            (self._user_key(conn, user_id), self.provider),
+        )
+        if not rows:
+            return None
+
+        access_token, refresh_token, scope, expires_at = rows[0]
+        tokens = {
+            "access_token": access_token,
+            "refresh_token": refresh_token,
+            "expires_at": epoch(expires_at),
+        }
+        if scope:
+            tokens["scope"] = scope
+        return tokens
+
+    def list_user_ids(self):
+        rows = self._execute(
+            "SELECT a.user_id FROM providers.accounts a JOIN providers.tokens t ON t.account_id = a.id "
+            "WHERE a.provider = ? AND t.refresh_token IS NOT NULL",
+            (self.provider,),
+        )
+        return [str(row[0]) for row in rows]
+
+    def link_account(self, user_id: str, provider_user_id: str, display_name: str = None):
+        key = self.user_key(user_id)
+        with self._transaction() as conn:
+            self._run(
+                conn,
+                "UPDATE providers.accounts SET provider_user_id = ?, display_name = ? "
+                "WHERE user_id = ? AND provider = ?",
+                (provider_user_id, display_name, self._user_key(conn, key), self.provider),
+            )
+
+
+# -----------------------
+# SQLite Stand-In
+# -----------------------
+# Same queries as Postgres, for local runs and tests without a database
+# server. core.users is not there, so user ids are stored as given.
+
+class SqliteTokenManager(PostgresTokenManager):
+    placeholder = "?"
+    # No row locks in SQLite; the connection lock already serializes updates
+    lock_rows = ""
+
+    def __init__(self, path: str = ":memory:", cache_ttl: int = settings.TOKEN_CACHE_TTL_SECONDS):
+        self.path = path
+        self.lock = threading.Lock()
+        super().__init__(cache_ttl)
+
+    def _connect(self):
+        conn = sqlite3.connect(":memory:", check_same_thread=False)
+        # Attach the real database as 'providers' so the Postgres table names work unchanged
+        conn.execute("ATTACH DATABASE ? AS providers", (self.path,))
+        for statement in SQLITE_SCHEMA:
+            conn.execute(statement)
+        conn.commit()
+        return conn
+
+    @contextmanager
+    def _transaction(self):
+        # One shared connection stands in for the pool
+        with self.lock:
+            try:
+                yield self.pool
+                self.pool.commit()
+            except Exception:
+                self.pool.rollback()
+                raise
+
+    def _user_key(self, conn, user_id: str):
+        return user_id
+
+
+def iso_from_epoch(seconds: float) -> str:
+    return datetime.fromtimestamp(seconds, tz=timezone.utc).isoformat()
+
+
+def epoch(value) -> int:
+    # TIMESTAMPTZ comes back as a datetime from Postgres, as ISO text from SQLite
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    return int(value.timestamp())
+
+
+SQLITE_SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS providers.accounts (
+        id                  INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id             TEXT NOT NULL,
+        provider            VARCHAR(50) NOT NULL,
+        provider_user_id    VARCHAR(255) NOT NULL,
+        display_name        VARCHAR(255),
+        linked_at           TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+        UNIQUE (user_id, provider)
+    )""",
+    """CREATE TABLE IF NOT EXISTS providers.tokens (
+        id                  INTEGER PRIMARY KEY AUTOINCREMENT,
+        account_id          INTEGER NOT NULL REFERENCES accounts(id) ON DELETE CASCADE,
+        access_token        TEXT NOT NULL,
+        refresh_token       TEXT,
+        scope               TEXT,
+        expires_at          TEXT,
+        created_at          TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+        updated_at          TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+    )""",
+    """CREATE TABLE IF NOT EXISTS providers.oauth_states (
+        state               VARCHAR(64) PRIMARY KEY,
+        user_id             VARCHAR(255) NOT NULL,
+        provider            VARCHAR(50) NOT NULL,
+        created_at          TEXT NOT NULL
+    )""",
+    "CREATE INDEX IF NOT EXISTS providers.idx_provider_tokens_account_id ON tokens(account_id)",
+]
 
 
 # -----------------------
@@ -54,6 +368,8 @@ class PostgresTokenManager:
 def get_token_manager():
     if settings.STORAGE_BACKEND == "postgres":
         return PostgresTokenManager()
+    if settings.STORAGE_BACKEND == "sqlite":
+        return SqliteTokenManager(settings.TOKEN_SQLITE_PATH)
     return MemoryTokenManager()
 
 
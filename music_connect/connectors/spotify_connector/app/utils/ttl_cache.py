@@ -0,0 +1,40 @@
+import threading
+import time
+
+
+# -----------------------
+# Per-user TTL cache
+# -----------------------
+
+class TTLCache:
+    """
+    One dict per user, kept for ttl seconds. Callers get copies, so
+    changing a returned dict does not change the cached one.
+    """
+
+    def __init__(self, ttl: int):
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.entries = {}    # user_id → (expires_at, value)
+
+    def get(self, user_id: str):
+        with self.lock:
+            entry = self.entries.get(user_id)
+            if not entry:
+                return None
+            expires_at, value = entry
+            if expires_at < time.time():
+                del self.entries[user_id]
+                return None
+            return dict(value)
+
+    def set(self, user_id: str, value: dict):
+        if self.ttl <= 0:
+            return
+        with self.lock:
+            self.entries[user_id] = (time.time() + self.ttl, dict(value))
+
+    def invalidate(self, user_id: str):
+        with self.lock:
+            self.entries.pop(user_id, None)
+
@@ -0,0 +1,10 @@
+import os
+import sys
+
+# app.config needs the Spotify credentials; the tests never reach Spotify
+os.environ.setdefault("SPOTIFY_CLIENT_ID", "test-client")
+os.environ.setdefault("SPOTIFY_CLIENT_SECRET", "test-secret")
+os.environ.setdefault("SPOTIFY_REDIRECT_URI", "http://localhost/auth/callback")
+os.environ.setdefault("STORAGE_BACKEND", "memory")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
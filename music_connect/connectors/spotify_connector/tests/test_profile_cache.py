@@ -0,0 +1,75 @@
+import time
+
+import pytest
+
+from app.services import spotify_service
+from app.services.spotify_service import SpotifyService
+from app.storage.profile_cache import profile_cache
+from app.storage.token_manager import token_manager
+
+
+class FakeResponse:
+    def __init__(self, status_code: int, payload: dict):
+        self.status_code = status_code
+        self.payload = payload
+        self.headers = {}
+        self.text = str(payload)
+
+    def json(self):
+        return self.payload
+
+
+class SpotifyApi:
+    def __init__(self):
+        self.profile_calls = 0
+        self.status_code = 200
+        self.account = "spotify-ana"
+
+    def request(self, method, url, headers=None, params=None, json=None):
+        assert url.endswith("/me")
+        self.profile_calls += 1
+        return FakeResponse(self.status_code, {"id": self.account, "display_name": "Ana"})
+
+    def post(self, url, headers=None, data=None):
+        return FakeResponse(200, {"access_token": "new", "refresh_token": "r", "expires_in": 3600})
+
+
+@pytest.fixture
+def api(monkeypatch):
+    api = SpotifyApi()
+    monkeypatch.setattr(spotify_service.requests, "request", api.request)
+    monkeypatch.setattr(spotify_service.requests, "post", api.post)
+    token_manager.store_tokens("ana", {"access_token": "a1", "refresh_token": "r",
+                                       "expires_at": int(time.time()) + 3600})
+    profile_cache.invalidate("ana")
+    yield api
+    profile_cache.invalidate("ana")
+
+
+def test_profile_is_fetched_once_per_ttl(api):
+    service = SpotifyService("ana")
+
+    assert service.get_user_profile()["id"] == "spotify-ana"
+    assert SpotifyService("ana").get_user_profile()["id"] == "spotify-ana"
+    assert api.profile_calls == 1
+
+
+def test_failed_profile_lookups_are_not_cached(api):
+    api.status_code = 401
+    SpotifyService("ana").get_user_profile()
+    api.status_code = 200
+
+    assert SpotifyService("ana").get_user_profile()["id"] == "spotify-ana"
+    assert api.profile_calls == 2
+
+
+def test_login_drops_the_cached_profile(api):
+    SpotifyService("ana").get_user_profile()
+    state = SpotifyService.build_auth_url("ana")["state"]
+
+    # The user signs in again, as another Spotify account
+    api.account = "spotify-other"
+    SpotifyService.handle_auth_callback("code", state)
+
+    assert SpotifyService("ana").get_user_profile()["id"] == "spotify-other"
+    assert api.profile_calls == 2
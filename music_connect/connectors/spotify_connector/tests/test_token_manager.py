@@ -0,0 +1,268 @@
+import threading
+import time
+
+import pytest
+from fastapi import HTTPException
+
+from app.services import token_refresher as refresher_module
+from app.services.token_refresher import TokenRefresher
+from app.utils.ttl_cache import TTLCache
+from app.storage.token_manager import PostgresTokenManager, SqliteTokenManager
+
+
+def tokens(access_token: str, expires_in: int = 3600, refresh_token: str = "refresh-1") -> dict:
+    return {
+        "access_token": access_token,
+        "refresh_token": refresh_token,
+        "expires_at": int(time.time()) + expires_in,
+        "scope": "user-read-email",
+    }
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "tokens.db")
+
+
+# -----------------------
+# SqliteTokenManager
+# -----------------------
+
+def test_store_and_read_tokens(db_path):
+    manager = SqliteTokenManager(db_path)
+    manager.store_tokens("ana@example.com", tokens("a1"))
+
+    # A second manager on the same file sees them, like another replica
+    stored = SqliteTokenManager(db_path).get_tokens("ana@example.com")
+    assert stored["access_token"] == "a1"
+    assert stored["refresh_token"] == "refresh-1"
+    assert stored["scope"] == "user-read-email"
+    assert SqliteTokenManager(db_path).get_tokens("bob@example.com") is None
+
+
+def test_store_tokens_replaces_the_row(db_path):
+    manager = SqliteTokenManager(db_path)
+    manager.store_tokens("ana@example.com", tokens("a1"))
+    manager.store_tokens("ana@example.com", tokens("a2"))
+
+    rows = manager._execute("SELECT access_token FROM providers.tokens")
+    assert rows == [("a2",)]
+
+
+def test_oauth_state_is_used_once(db_path):
+    manager = SqliteTokenManager(db_path)
+    manager.set_state("state-1", "ana@example.com")
+
+    assert SqliteTokenManager(db_path).pop_state("state-1") == "ana@example.com"
+    assert manager.pop_state("state-1") is None
+
+
+def test_listed_users_match_the_cache_key(db_path):
+    manager = SqliteTokenManager(db_path)
+    manager.store_tokens("ana@example.com", tokens("a1"))
+    manager.store_tokens("bob@example.com", tokens("b1", refresh_token=None))
+
+    # Only users that can be refreshed are listed, under the key requests use
+    assert manager.list_user_ids() == [manager.user_key("ana@example.com")]
+    assert manager.cache.get(manager.list_user_ids()[0])["access_token"] == "a1"
+
+
+# -----------------------
+# Token cache
+# -----------------------
+
+def test_reads_are_cached_until_invalidated(db_path):
+    manager = SqliteTokenManager(db_path)
+    other_replica = SqliteTokenManager(db_path)
+    manager.store_tokens("ana@example.com", tokens("a1"))
+    other_replica.store_tokens("ana@example.com", tokens("a2"))
+
+    assert manager.get_tokens("ana@example.com")["access_token"] == "a1"
+
+    manager.cache.invalidate(manager.user_key("ana@example.com"))
+    assert manager.get_tokens("ana@example.com")["access_token"] == "a2"
+
+
+def test_reads_are_not_cached_with_ttl_zero(db_path):
+    manager = SqliteTokenManager(db_path, cache_ttl=0)
+    manager.store_tokens("ana@example.com", tokens("a1"))
+    SqliteTokenManager(db_path).store_tokens("ana@example.com", tokens("a2"))
+
+    assert manager.get_tokens("ana@example.com")["access_token"] == "a2"
+
+
+def test_cached_tokens_are_copies(db_path):
+    manager = SqliteTokenManager(db_path)
+    manager.store_tokens("ana@example.com", tokens("a1"))
+
+    manager.get_tokens("ana@example.com")["access_token"] = "changed"
+    assert manager.get_tokens("ana@example.com")["access_token"] == "a1"
+
+
+def test_update_tokens_reads_the_database_and_refreshes_the_cache(db_path):
+    manager = SqliteTokenManager(db_path)
+    manager.store_tokens("ana@example.com", tokens("a1"))
+    SqliteTokenManager(db_path).store_tokens("ana@example.com", tokens("a2"))
+
+    seen = []
+    result = manager.update_tokens("ana@example.com", lambda t: seen.append(t["access_token"]))
+
+    assert seen == ["a2"]
+    assert result["access_token"] == "a2"
+    assert manager.get_tokens("ana@example.com")["access_token"] == "a2"
+
+
+def test_update_tokens_stores_the_update(db_path):
+    manager = SqliteTokenManager(db_path)
+    manager.store_tokens("ana@example.com", tokens("a1"))
+
+    manager.update_tokens("ana@example.com", lambda t: {**t, "access_token": "a2"})
+
+    assert manager.get_tokens("ana@example.com")["access_token"] == "a2"
+    assert SqliteTokenManager(db_path).get_tokens("ana@example.com")["access_token"] == "a2"
+
+
+def test_failed_update_keeps_the_tokens(db_path):
+    manager = SqliteTokenManager(db_path)
+    manager.store_tokens("ana@example.com", tokens("a1"))
+
+    def update(t):
+        raise RuntimeError("token endpoint down")
+
+    with pytest.raises(RuntimeError):
+        manager.update_tokens("ana@example.com", update)
+    assert SqliteTokenManager(db_path).get_tokens("ana@example.com")["access_token"] == "a1"
+
+
+def test_ttl_cache_expires_and_invalidates():
+    cache = TTLCache(ttl=60)
+    cache.set("ana", {"id": "spotify-ana"})
+    assert cache.get("ana") == {"id": "spotify-ana"}
+
+    cache.invalidate("ana")
+    assert cache.get("ana") is None
+
+    cache.set("ana", {"id": "spotify-ana"})
+    cache.entries["ana"] = (time.time() - 1, {"id": "spotify-ana"})
+    assert cache.get("ana") is None
+
+
+# -----------------------
+# TokenRefresher
+# -----------------------
+
+class TokenEndpoint:
+    def __init__(self):
+        self.calls = 0
+        self.release = threading.Event()
+        self.release.set()
+
+    def post(self, url, headers=None, data=None):
+        self.calls += 1
+        self.release.wait(5)
+        return FakeResponse({"access_token": f"fresh-{self.calls}", "expires_in": 3600})
+
+
+class FakeResponse:
+    status_code = 200
+
+    def __init__(self, payload):
+        self.payload = payload
+
+    def json(self):
+        return self.payload
+
+
+@pytest.fixture
+def refresher(db_path, monkeypatch):
+    manager = SqliteTokenManager(db_path)
+    endpoint = TokenEndpoint()
+    monkeypatch.setattr(refresher_module, "token_manager", manager)
+    monkeypatch.setattr(refresher_module.requests, "post", endpoint.post)
+    refresher = TokenRefresher(margin=300, interval=0, workers=4)
+    yield refresher, manager, endpoint
+    refresher.executor.shutdown(wait=True)
+
+
+def test_refresh_stores_new_tokens(refresher):
+    refresher, manager, endpoint = refresher
+    manager.store_tokens("ana@example.com", tokens("a1", expires_in=-10))
+
+    assert refresher.refresh("ana@example.com").result(5) == "fresh-1"
+    stored = manager.get_tokens("ana@example.com")
+    assert stored["access_token"] == "fresh-1"
+    assert stored["refresh_token"] == "refresh-1"
+    assert endpoint.calls == 1
+
+
+def test_refresh_skips_tokens_another_replica_refreshed(refresher, db_path):
+    refresher, manager, endpoint = refresher
+    manager.store_tokens("ana@example.com", tokens("a1", expires_in=-10))
+    SqliteTokenManager(db_path).store_tokens("ana@example.com", tokens("a2"))
+
+    # The cache still holds the expired token; the refresh must not trust it
+    assert manager.get_tokens("ana@example.com")["access_token"] == "a1"
+    assert refresher.refresh("ana@example.com").result(5) == "a2"
+    assert endpoint.calls == 0
+    assert manager.get_tokens("ana@example.com")["access_token"] == "a2"
+
+
+def test_concurrent_refreshes_share_one_request(refresher):
+    refresher, manager, endpoint = refresher
+    manager.store_tokens("ana@example.com", tokens("a1", expires_in=-10))
+    endpoint.release.clear()
+
+    futures = [refresher.refresh("ana@example.com") for _ in range(5)]
+    endpoint.release.set()
+
+    assert {f.result(5) for f in futures} == {"fresh-1"}
+    assert endpoint.calls == 1
+
+
+def test_refresh_without_tokens_asks_for_login(refresher):
+    refresher, manager, endpoint = refresher
+
+    with pytest.raises(HTTPException) as error:
+        refresher.refresh("ana@example.com").result(5)
+    assert error.value.status_code == 401
+    assert endpoint.calls == 0
+
+
+# -----------------------
+# User lookup (Postgres)
+# -----------------------
+
+class UsersTokenManager(SqliteTokenManager):
+    """The SQLite stand-in with a core.users table and the Postgres user lookup."""
+
+    _user_key = PostgresTokenManager._user_key
+
+    def _connect(self):
+        conn = super()._connect()
+        conn.execute("ATTACH DATABASE ':memory:' AS core")
+        conn.execute("CREATE TABLE core.users (id INTEGER PRIMARY KEY, email TEXT UNIQUE, display_name TEXT)")
+        conn.executemany("INSERT INTO core.users VALUES (?, ?, ?)",
+                         [(1, "ana@example.com", "Sam"), (2, "bo@example.com", "Sam")])
+        conn.commit()
+        return conn
+
+
+def test_users_are_keyed_by_their_core_id(db_path):
+    manager = UsersTokenManager(db_path)
+    manager.store_tokens("ana@example.com", tokens("a1"))
+    manager.store_tokens("2", tokens("b1"))
+
+    assert manager.user_key("ana@example.com") == "1"
+    assert manager.get_tokens("1")["access_token"] == "a1"
+    assert manager.get_tokens("bo@example.com")["access_token"] == "b1"
+    assert sorted(manager.list_user_ids()) == ["1", "2"]
+
+
+def test_display_names_do_not_resolve_users(db_path):
+    manager = UsersTokenManager(db_path)
+
+    # Two users share the display name; neither may get the other's tokens
+    with pytest.raises(ValueError):
+        manager.user_key("Sam")
+    with pytest.raises(ValueError):
+        manager.user_key("nobody@example.com")
@@ -1,16 +1,18 @@
-from fastapi import FastAPI, Request
+from fastapi import FastAPI, Query, Request
 from dotenv import load_dotenv
 load_dotenv()
-from fastapi.responses import RedirectResponse
+from fastapi.responses import JSONResponse, RedirectResponse
 from app.oauth_handler import get_flow, get_authenticated_service
 from app.token_storage import save_tokens
 from pydantic import BaseModel
 from fastapi.middleware.cors import CORSMiddleware
 from googleapiclient.errors import HttpError
 from app.refresh_token import refresh_youtube_token
+from app import quota_tracker
 
 
 import os
+import re
 
 app = FastAPI()
 
@@ -66,6 +68,56 @@ def youtube_callback(request: Request):
     # Otherwise return JSON for easier local testing
     return {"message": "YouTube connected and tokens saved!"}
 
+def _quota_exceeded(endpoint: str) -> JSONResponse:
+    """
+    Google's own status for an exhausted quota, with how far short we are.
+    """
+    return JSONResponse(status_code=403, content={
+        "error": "quotaExceeded",
+        "detail": f"{endpoint} costs {quota_tracker.UNIT_COSTS[endpoint]} units, "
+                  f"{quota_tracker.remaining()} left today (resets at midnight Pacific)"
+    })
+
+
+"""
+Units spent today against the daily YouTube Data API quota, per endpoint,
+plus the totals of the last few days.
+"""
+@app.get("/youtube/quota")
+def get_quota_usage():
+    return quota_tracker.usage()
+
+_ISO_DURATION = re.compile(r"P(?:(\d+)D)?T?(?:(\d+)H)?(?:(\d+)M)?(?:(\d+)S)?")
+
+
+def _duration_ms(iso_duration: str | None) -> int | None:
+    """
+    "PT3M21S" -> 201000. None if the duration is missing or unparsable.
+    """
+    match = _ISO_DURATION.fullmatch(iso_duration or "")
+    if not match or not any(match.groups()):
+        return None
+    days, hours, minutes, seconds = (int(g or 0) for g in match.groups())
+    return (((days * 24 + hours) * 60 + minutes) * 60 + seconds) * 1000
+
+
+def _video_durations(youtube, video_ids: list[str]) -> dict[str, int | None]:
+    """
+    Durations for up to 50 videos in one videos.list call (1 quota unit).
+    """
+    if not video_ids:
+        return {}
+    quota_tracker.spend("videos.list")
+    response = youtube.videos().list(
+        part="contentDetails",
+        id=",".join(video_ids),
+        maxResults=50
+    ).execute()
+    return {
+        item["id"]: _duration_ms(item.get("contentDetails", {}).get("duration"))
+        for item in response.get("items", [])
+    }
+
 """
 Returns all items/videos inside a specific playlist.
 Automatically refreshes token if expired.
@@ -84,6 +136,7 @@ def get_playlist_items(playlist_id: str):
     next_page_token = None
 
     while True:
+        quota_tracker.spend("playlistItems.list")
         response = youtube.playlistItems().list(
             part="snippet,contentDetails",
             playlistId=playlist_id,
@@ -91,6 +144,10 @@ def get_playlist_items(playlist_id: str):
             pageToken=next_page_token
         ).execute()
 
+        durations = _video_durations(
+            youtube, [item["contentDetails"]["videoId"] for item in response["items"]]
+        )
+
         for item in response["items"]:
             snippet = item["snippet"]
 
@@ -99,7 +156,8 @@ def get_playlist_items(playlist_id: str):
                 "videoId": item["contentDetails"]["videoId"],
                 "thumbnail": snippet["thumbnails"]["default"]["url"],
                 "channel": snippet.get("videoOwnerChannelTitle")  # preferred field
-                            or snippet.get("channelTitle")        # fallback for older videos
+                            or snippet.get("channelTitle"),       # fallback for older videos
+                "durationMs": durations.get(item["contentDetails"]["videoId"])
             })
 
 
@@ -127,6 +185,7 @@ def get_user_playlists():
 
     try:
         while True:
+            quota_tracker.spend("playlists.list")
             response = youtube.playlists().list(
                 part="snippet,contentDetails",
                 mine=True,
@@ -168,29 +227,37 @@ def get_user_playlists():
 """
 Search YouTube for videos matching a query.
 Used for track lookup before adding to a playlist.
+limit (1-50) only shrinks the response; the call costs 100 quota units either way.
 """
 @app.get("/youtube/search")
-def search_tracks(q: str):
+def search_tracks(q: str, limit: int = Query(25, ge=1, le=50)):
     credentials = refresh_youtube_token()
     if credentials is None:
         return {"error": "Please login first using /auth/youtube/login"}
 
+    if not quota_tracker.can_afford("search.list"):
+        return _quota_exceeded("search.list")
+
     youtube = get_authenticated_service(credentials)
 
+    quota_tracker.spend("search.list")
     response = youtube.search().list(
         q=q,
         part="snippet",
-        maxResults=25,
+        maxResults=limit,
         type="video"
     ).execute()
 
+    durations = _video_durations(youtube, [item["id"]["videoId"] for item in response["items"]])
+
     results = []
     for item in response["items"]:
         results.append({
             "videoId": item["id"]["videoId"],
             "title": item["snippet"]["title"],
             "channel": item["snippet"]["channelTitle"],
-            "thumbnail": item["snippet"]["thumbnails"]["default"]["url"]
+            "thumbnail": item["snippet"]["thumbnails"]["default"]["url"],
+            "durationMs": durations.get(item["id"]["videoId"])
         })
 
     return {"results": results}
@@ -204,6 +271,9 @@ def add_track_to_playlist(playlist_id: str, videoId: str):
     if credentials is None:
         return {"error": "Please login first using /auth/youtube/login"}
 
+    if not quota_tracker.can_afford("playlistItems.insert"):
+        return _quota_exceeded("playlistItems.insert")
+
     youtube = get_authenticated_service(credentials)
 
     request_body = {
@@ -216,6 +286,7 @@ def add_track_to_playlist(playlist_id: str, videoId: str):
         }
     }
 
+    quota_tracker.spend("playlistItems.insert")
     response = youtube.playlistItems().insert(
         part="snippet",
         body=request_body
@@ -227,6 +298,89 @@ def add_track_to_playlist(playlist_id: str, videoId: str):
         "videoId": videoId
     }
 
+"""
+Add several videos to a playlist in one call.
+Inserts run in order; each video reports its own status so
+callers can tell exactly which ones made it in. Once today's quota
+cannot cover another insert, the rest report "quota_exceeded".
+"""
+class AddVideosRequest(BaseModel):
+    videoIds: list[str]
+
+
+@app.post("/youtube/playlist/{playlist_id}/add-batch")
+def add_tracks_to_playlist_batch(playlist_id: str, body: AddVideosRequest):
+    credentials = refresh_youtube_token()
+    if credentials is None:
+        return {"error": "Please login first using /auth/youtube/login"}
+
+    youtube = get_authenticated_service(credentials)
+
+    results = []
+    for video_id in body.videoIds:
+        if not quota_tracker.can_afford("playlistItems.insert"):
+            results.append({"status": "quota_exceeded", "videoId": video_id})
+            continue
+
+        request_body = {
+            "snippet": {
+                "playlistId": playlist_id,
+                "resourceId": {
+                    "kind": "youtube#video",
+                    "videoId": video_id
+                }
+            }
+        }
+
+        try:
+            quota_tracker.spend("playlistItems.insert")
+            response = youtube.playlistItems().insert(
+                part="snippet",
+                body=request_body
+            ).execute()
+            results.append({
+                "status": "added",
+                "playlistItemId": response["id"],
+                "videoId": video_id
+            })
+        except HttpError as e:
+            results.append({
+                "status": "failed",
+                "videoId": video_id,
+                "error": str(e)
+            })
+
+    return {"results": results}
+
+"""
+Cheap change marker for a playlist (1 quota unit).
+The playlist resource's ETag together with its item count changes when
+videos are added or removed, so callers can skip re-reading the items.
+"""
+@app.get("/youtube/playlist/{playlist_id}/version")
+def get_playlist_version(playlist_id: str):
+    credentials = refresh_youtube_token()
+    if credentials is None:
+        return {"error": "Please login first using /auth/youtube/login"}
+
+    youtube = get_authenticated_service(credentials)
+
+    quota_tracker.spend("playlists.list")
+    response = youtube.playlists().list(
+        part="id,contentDetails",
+        id=playlist_id
+    ).execute()
+
+    items = response.get("items", [])
+    if not items:
+        return {"error": "Playlist not found"}
+
+    return {
+        "playlistId": playlist_id,
+        "etag": items[0].get("etag"),
+        "itemCount": items[0].get("contentDetails", {}).get("itemCount", 0)
+    }
+
 """
 Removes a video from a playlist.
 The YouTube API requires a playlistItemId,
@@ -240,7 +394,11 @@ def remove_track_from_playlist(playlist_id: str, videoId: str):
 
     youtube = get_authenticated_service(credentials)
 
+    if not quota_tracker.can_afford("playlistItems.delete"):
+        return _quota_exceeded("playlistItems.delete")
+
     # Step 1 — find playlistItemId
+    quota_tracker.spend("playlistItems.list")
     search = youtube.playlistItems().list(
         part="id,contentDetails",
         playlistId=playlist_id,
@@ -257,6 +415,7 @@ def remove_track_from_playlist(playlist_id: str, videoId: str):
         return {"error": "Track not found in playlist"}
 
     # Step 2 — remove it
+    quota_tracker.spend("playlistItems.delete")
     youtube.playlistItems().delete(id=playlist_item_id).execute()
 
     return {
@@ -265,6 +424,72 @@ def remove_track_from_playlist(playlist_id: str, videoId: str):
         "videoId": videoId
     }
 
+"""
+Remove several videos from a playlist in one call.
+The playlist is listed once to map videoIds to playlistItemIds; each
+requested videoId removes one occurrence and reports its own status.
+"""
+class RemoveVideosRequest(BaseModel):
+    videoIds: list[str]
+
+
+@app.post("/youtube/playlist/{playlist_id}/remove-batch")
+def remove_tracks_from_playlist_batch(playlist_id: str, body: RemoveVideosRequest):
+    credentials = refresh_youtube_token()
+    if credentials is None:
+        return {"error": "Please login first using /auth/youtube/login"}
+
+    youtube = get_authenticated_service(credentials)
+
+    playlist_item_ids = {}
+    next_page_token = None
+
+    while True:
+        quota_tracker.spend("playlistItems.list")
+        response = youtube.playlistItems().list(
+            part="id,contentDetails",
+            playlistId=playlist_id,
+            maxResults=50,
+            pageToken=next_page_token
+        ).execute()
+
+        for item in response["items"]:
+            video_id = item["contentDetails"]["videoId"]
+            playlist_item_ids.setdefault(video_id, []).append(item["id"])
+
+        next_page_token = response.get("nextPageToken")
+        if not next_page_token:
+            break
+
+    results = []
+    for video_id in body.videoIds:
+        candidates = playlist_item_ids.get(video_id)
+        if not candidates:
+            results.append({"status": "not_found", "videoId": video_id})
+            continue
+
+        if not quota_tracker.can_afford("playlistItems.delete"):
+            results.append({"status": "quota_exceeded", "videoId": video_id})
+            continue
+
+        playlist_item_id = candidates.pop(0)
+        try:
+            quota_tracker.spend("playlistItems.delete")
+            youtube.playlistItems().delete(id=playlist_item_id).execute()
+            results.append({
+                "status": "removed",
+                "playlistItemId": playlist_item_id,
+                "videoId": video_id
+            })
+        except HttpError as e:
+            results.append({
+                "status": "failed",
+                "videoId": video_id,
+                "error": str(e)
+            })
+
+    return {"results": results}
+
 class CreatePlaylistRequest(BaseModel):
     title: str
     description: str | None = ""
@@ -277,6 +502,9 @@ def create_playlist(body: CreatePlaylistRequest):
     if credentials is None:
         return {"error": "Please login first using /auth/youtube/login"}
 
+    if not quota_tracker.can_afford("playlists.insert"):
+        return _quota_exceeded("playlists.insert")
+
     youtube = get_authenticated_service(credentials)
 
     playlist_body = {
@@ -289,6 +517,7 @@ def create_playlist(body: CreatePlaylistRequest):
         }
     }
 
+    quota_tracker.spend("playlists.insert")
     response = youtube.playlists().insert(
         part="snippet,status",
         body=playlist_body
@@ -312,6 +541,7 @@ def get_user_info():
     
     youtube = get_authenticated_service(credentials)
 
+    quota_tracker.spend("channels.list")
     response = youtube.channels().list(
         part="snippet,contentDetails",
         mine=True
@@ -0,0 +1,96 @@
+"""
+YouTube Data API quota accounting for this connector.
+
+Every API call is charged here when it is made, per endpoint and per day.
+Google resets the quota at midnight Pacific time. Usage is written to a
+JSON file next to the tokens, so a restart does not forget what was
+already spent today.
+"""
+import json
+import os
+import threading
+from datetime import datetime, timedelta, timezone
+
+try:
+    from zoneinfo import ZoneInfo
+    PACIFIC = ZoneInfo("America/Los_Angeles")
+except Exception:  # no tz database in the image
+    PACIFIC = timezone(timedelta(hours=-8))
+
+FILE_PATH = os.getenv("YOUTUBE_QUOTA_FILE", "youtube_quota.json")
+DAILY_LIMIT = int(os.getenv("YOUTUBE_DAILY_QUOTA", "10000"))
+HISTORY_DAYS = 7
+
+# Units per call, from the YouTube Data API v3 quota table
+UNIT_COSTS = {
+    "search.list": 100,
+    "playlistItems.insert": 50,
+    "playlistItems.delete": 50,
+    "playlists.insert": 50,
+    "playlistItems.list": 1,
+    "playlists.list": 1,
+    "videos.list": 1,
+    "channels.list": 1,
+}
+
+
+def _load() -> dict:
+    if not os.path.exists(FILE_PATH):
+        return {}
+    try:
+        with open(FILE_PATH, "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+_lock = threading.Lock()
+_days = _load()     # day -> endpoint -> units
+
+
+def _today():
+    return datetime.now(PACIFIC).date()
+
+
+def _used(day: str) -> int:
+    return sum(_days.get(day, {}).values())
+
+
+def remaining() -> int:
+    with _lock:
+        return max(0, DAILY_LIMIT - _used(_today().isoformat()))
+
+
+def can_afford(endpoint: str, calls: int = 1) -> bool:
+    return UNIT_COSTS[endpoint] * calls <= remaining()
+
+
+def spend(endpoint: str, calls: int = 1):
+    """
+    Charge calls to endpoint against today's quota. Charge before making
+    the call: Google bills failed calls too.
+    """
+    global _days
+    today = _today()
+    cutoff = (today - timedelta(days=HISTORY_DAYS)).isoformat()
+
+    with _lock:
+        usage = _days.setdefault(today.isoformat(), {})
+        usage[endpoint] = usage.get(endpoint, 0) + UNIT_COSTS[endpoint] * calls
+        _days = {day: spent for day, spent in _days.items() if day > cutoff}
+        with open(FILE_PATH, "w") as f:
+            json.dump(_days, f, indent=4)
+
+
+def usage() -> dict:
+    today = _today().isoformat()
+    with _lock:
+        used = _used(today)
+        return {
+            "day": today,
+            "daily_limit": DAILY_LIMIT,
+            "used": used,
+            "remaining": max(0, DAILY_LIMIT - used),
+            "by_endpoint": dict(_days.get(today, {})),
+            "history": {day: sum(spent.values()) for day, spent in sorted(_days.items())},
+        }
@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import List
+from typing import List, Optional
 
 
 class Settings(BaseSettings):
@@ -7,6 +7,86 @@ class Settings(BaseSettings):
     SPOTIFY_CONNECTOR_URL: str = "http://localhost:8081"
     YOUTUBE_CONNECTOR_URL: str = "http://localhost:8000"
 
+    # Shared keep-alive connection pool (httpx.AsyncClient) for the connector
+    # clients. HTTP_POOL_SIZE caps the connections per connector; calls over
+    # it wait on the event loop. Batch writes and library listings get the
+    # longer read timeout.
+    HTTP_POOL_SIZE: int = 32
+    HTTP_KEEPALIVE: bool = True
+    HTTP_CONNECT_TIMEOUT_SECONDS: float = 5.0
+    HTTP_READ_TIMEOUT_SECONDS: float = 30.0
+    HTTP_BULK_READ_TIMEOUT_SECONDS: float = 120.0
+    HTTP_RETRIES: int = 3
+    HTTP_RETRY_BACKOFF_SECONDS: float = 0.5
+
+    # Matching engine: per-track search/score runs on a bounded worker pool.
+    # MIGRATION_MAX_CONCURRENCY is the hard cap a single migration may request.
+    MIGRATION_DEFAULT_CONCURRENCY: int = 4
+    MIGRATION_MAX_CONCURRENCY: int = 8
+
+    # Candidate scoring: 'difflib' (reference scores) or 'rapidfuzz' (compiled, may score slightly higher)
+    MATCH_SCORING_BACKEND: str = "difflib"
+
+    # Duration tie-break: among candidates within the margin of the top score,
+    # prefer one whose duration is within the tolerance of the source track
+    MATCH_DURATION_TIE_MARGIN: float = 5.0
+    MATCH_DURATION_TOLERANCE_MS: int = 5000
+
+    # Playlist writes are flushed in batches (Spotify accepts up to 100 URIs per call)
+    SPOTIFY_ADD_BATCH_SIZE: int = 100
+    YOUTUBE_ADD_BATCH_SIZE: int = 50
+
+    # Failed playlist writes are queued and retried after the last batch:
+    # up to ADD_RETRY_ATTEMPTS rounds, waiting backoff * 2**round before each
+    ADD_RETRY_ATTEMPTS: int = 3
+    ADD_RETRY_BACKOFF_SECONDS: float = 2.0
+
+    # Adaptive search: candidate counts to request, widening only while the
+    # best score stays under min_score. Every YouTube search costs 101 quota
+    # units regardless of size, so widening there trades quota for payload.
+    SPOTIFY_SEARCH_LIMITS: List[int] = [5, 20]
+    YOUTUBE_SEARCH_LIMITS: List[int] = [10, 25]
+
+    # Global call rate per connector, shared by every migration (0 = unlimited)
+    SPOTIFY_CONNECTOR_CALLS_PER_SECOND: float = 10.0
+    YOUTUBE_CONNECTOR_CALLS_PER_SECOND: float = 5.0
+    CONNECTOR_RATE_BURST: int = 10
+
+    # Search response cache in front of the connector clients
+    SEARCH_CACHE_SIZE: int = 5000
+    SEARCH_CACHE_TTL_SECONDS: int = 3600
+
+    # Cross-user match cache (in-memory LRU + optional table in the migration store)
+    MATCH_CACHE_SIZE: int = 50000
+    MATCH_CACHE_TTL_SECONDS: int = 7 * 24 * 3600
+    MATCH_CACHE_PERSIST: bool = True
+
+    # Background migration jobs
+    MIGRATION_JOB_WORKERS: int = 2
+    MIGRATION_STORE_BACKEND: str = "sqlite"      # 'sqlite' or 'postgres'
+    MIGRATION_SQLITE_PATH: str = ":memory:"
+    # Postgres connections shared by the stores; calls beyond the maximum wait for one
+    MIGRATION_DB_POOL_MIN_SIZE: int = 1
+    MIGRATION_DB_POOL_MAX_SIZE: int = 10
+    # Track results per page of GET /migrate/jobs/{id} (at most JOB_RESULTS_MAX_PAGE_SIZE)
+    JOB_RESULTS_PAGE_SIZE: int = 500
+    JOB_RESULTS_MAX_PAGE_SIZE: int = 5000
+
+    # Bulk (whole-library) migrations: YouTube quota units one bulk job may plan for
+    YOUTUBE_QUOTA_BUDGET_UNITS: int = 10000
+
+    # YouTube Data API daily quota (resets at midnight Pacific). Tracks that
+    # would overrun it are deferred to a later run instead of failing.
+    YOUTUBE_DAILY_QUOTA_UNITS: int = 10000
+
+    # --- Postgres Settings ---
+    MC_PG_HOST: Optional[str] = None
+    MC_PG_PORT: Optional[int] = None
+    MC_PG_DB: Optional[str] = None
+    MC_PG_USER: Optional[str] = None
+    MC_PG_PASSWORD: Optional[str] = None
+    MC_PG_SSLMODE: Optional[str] = None
+
     # CORS
     CORS_ALLOWED_ORIGINS: List[str] = ["*"]
     CORS_ALLOWED_METHODS: List[str] = ["*"]
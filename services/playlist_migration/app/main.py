@@ -1,9 +1,21 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.routers.migrate import router  # Changed from services.playlist_migration.app.routers.migrate
+from app.routers.metrics import router as metrics_router
+from app.utils.http_pool import http_pool
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    # Close the keep-alive connections to the connectors
+    await http_pool.aclose()
+
 
-app = FastAPI(title="Playlist Migration Service")
+app = FastAPI(title="Playlist Migration Service", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -13,6 +25,7 @@ app.add_middleware(
 )
 
 app.include_router(router)
+app.include_router(metrics_router)
 
 @app.get("/health")
 def health():
@@ -0,0 +1,78 @@
+from typing import Dict, List, Literal, Optional
+
+from pydantic import BaseModel
+
+# How much of a migration's per-track results a response carries:
+# "summary" none, "unmatched" only tracks that were not added, "full" all
+ResultDetail = Literal["summary", "unmatched", "full"]
+
+
+class YouTubeToSpotifyRequest(BaseModel):
+    user_id: str
+    source_youtube_playlist_id: str
+    target_spotify_playlist_id: str | None = None
+    min_score: float = 70.0
+    max_concurrency: int | None = None
+    resume: bool = True
+    use_search_cache: bool = True
+    duplicates: Literal["keep_all", "keep_first"] = "keep_all"
+    incremental: bool = False
+    remove_deleted: bool = False
+    detail: ResultDetail = "full"
+
+
+class SpotifyToYouTubeRequest(BaseModel):
+    user_id: str
+    source_playlist_id: str
+    target_youtube_playlist_id: str | None = None
+    min_score: float = 70.0
+    max_concurrency: int | None = None
+    resume: bool = True
+    use_search_cache: bool = True
+    duplicates: Literal["keep_all", "keep_first"] = "keep_all"
+    incremental: bool = False
+    remove_deleted: bool = False
+    detail: ResultDetail = "full"
+
+
+class BulkYouTubeToSpotifyRequest(BaseModel):
+    user_id: str
+    source_youtube_playlist_ids: List[str] | None = None   # None = all of the user's playlists
+    min_score: float = 70.0
+    max_concurrency: int | None = None
+    resume: bool = True
+    use_search_cache: bool = True
+    duplicates: Literal["keep_all", "keep_first"] = "keep_all"
+    incremental: bool = False
+    remove_deleted: bool = False
+
+
+class BulkSpotifyToYouTubeRequest(BaseModel):
+    user_id: str
+    source_playlist_ids: List[str] | None = None            # None = all of the user's playlists
+    min_score: float = 70.0
+    max_concurrency: int | None = None
+    resume: bool = True
+    use_search_cache: bool = True
+    duplicates: Literal["keep_all", "keep_first"] = "keep_all"
+    incremental: bool = False
+    remove_deleted: bool = False
+    quota_budget: int | None = None                         # YouTube units; None = settings default
+
+
+class PlanCommitRequest(BaseModel):
+    min_score: float | None = None                          # None = the plan's own min_score
+    overrides: Dict[int, Optional[str]] = {}                # track index -> candidate track id, None = skip
+    target_playlist_id: str | None = None                   # None = create a new playlist
+
+
+class TrackMatchResult(BaseModel):
+    source_title: str
+    source_channel: str
+    matched_track_id: str | None
+    matched_title: str | None
+    matched_artist: str | None
+    score: float
+    added: bool
+    deferred: bool = False                                  # over the quota budget; a later run picks it up
+    duplicate_of: int | None = None                         # keep_first: index of the copy that was written
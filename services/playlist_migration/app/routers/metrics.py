@@ -0,0 +1,21 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from app.services.spotify_client import SpotifyClient
+from app.services.youtube_client import YouTubeClient
+from app.utils.metrics import metrics
+
+router = APIRouter(tags=["metrics"])
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics() -> PlainTextResponse:
+    """
+    Stage timings, cache lookups and connector retries in Prometheus text format
+    """
+    for provider, cache in (("spotify", SpotifyClient.search_cache), ("youtube", YouTubeClient.search_cache)):
+        stats = cache.stats()
+        metrics.set("search_cache_lookups_total", stats["hits"], provider=provider, result="hit")
+        metrics.set("search_cache_lookups_total", stats["misses"], provider=provider, result="miss")
+
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
@@ -1,323 +1,222 @@
-from typing import List, Dict, Any
-from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
+import asyncio
+from typing import Dict, Any
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
 
+from app.config import settings
+from app.models.migration_models import (
+    YouTubeToSpotifyRequest,
+    SpotifyToYouTubeRequest,
+    BulkYouTubeToSpotifyRequest,
+    BulkSpotifyToYouTubeRequest,
+    PlanCommitRequest,
+    ResultDetail,
+)
+from app.services.bulk_migration import plan_spotify_to_youtube, plan_youtube_to_spotify
+from app.services.match_plans import (
+    build_spotify_to_youtube_plan,
+    build_youtube_to_spotify_plan,
+    iter_commit_plan,
+)
+from app.services.migration_runner import (
+    collect_response,
+    estimate_spotify_to_youtube,
+    iter_ndjson,
+    iter_spotify_to_youtube,
+    iter_youtube_to_spotify,
+    prime,
+)
+from app.services.job_runner import submit_bulk_job, submit_job
+from app.services.match_cache import match_cache
 from app.services.spotify_client import SpotifyClient
 from app.services.youtube_client import YouTubeClient
-from app.utils.match_scoring import score_match
+from app.storage.job_store import UnknownUser, job_store
+from app.storage.plan_store import plan_store
+from app.utils.fast_json import FastJSONResponse
+from app.utils.quota import QuotaBudget
 
 router = APIRouter(prefix="/migrate", tags=["playlist-migration"])
 
-# ============================================
-# REQUEST MODELS
-# ============================================
-
-class YouTubeToSpotifyRequest(BaseModel):
-    user_id: str
-    source_youtube_playlist_id: str
-    target_spotify_playlist_id: str | None = None
-    min_score: float = 70.0
-
-class SpotifyToYouTubeRequest(BaseModel):
-    user_id: str
-    source_playlist_id: str
-    target_youtube_playlist_id: str | None = None
-    min_score: float = 70.0
-
-class TrackMatchResult(BaseModel):
-    source_title: str
-    source_channel: str
-    matched_track_id: str | None
-    matched_title: str | None
-    matched_artist: str | None
-    score: float
-    added: bool
-
 # ============================================
 # YOUTUBE → SPOTIFY
 # ============================================
 
 @router.post("/youtube-to-spotify")
-def migrate_youtube_to_spotify(body: YouTubeToSpotifyRequest) -> Dict[str, Any]:
+async def migrate_youtube_to_spotify(body: YouTubeToSpotifyRequest) -> FastJSONResponse:
     """
     Migrate YouTube playlist to Spotify
     """
-    
-    # 1. Get YouTube playlist videos
-    try:
-        videos = YouTubeClient.get_playlist_videos(body.source_youtube_playlist_id)
-    except Exception as e:
-        raise HTTPException(status_code=502, detail=f"Error fetching YouTube playlist: {e}")
-    
-    if not videos:
-        return {
-            "status": "no_videos",
-            "message": "YouTube playlist has no videos",
-            "matches": []
-        }
-    
-    # 2. Create Spotify playlist if not provided
-    target_playlist_id = body.target_spotify_playlist_id
-    created_playlist = False
-    
-    if not target_playlist_id:
-        try:
-            spotify_playlist = SpotifyClient.create_playlist(
-                user_id=body.user_id,
-                name="Migrated from YouTube",
-                description="Migrated from YouTube playlist",
-                public=False
-            )
-            target_playlist_id = spotify_playlist["id"]
-            created_playlist = True
-        except Exception as e:
-            raise HTTPException(status_code=502, detail=f"Error creating Spotify playlist: {e}")
-    
-    results: List[TrackMatchResult] = []
-    
-    # 3. For each YouTube video, search and match on Spotify
-    for video in videos:
-        source_title = video.get("title") or ""
-        source_channel = video.get("channel") or ""
-        
-        if not source_title:
-            results.append(TrackMatchResult(
-                source_title=source_title,
-                source_channel=source_channel,
-                matched_track_id=None,
-                matched_title=None,
-                matched_artist=None,
-                score=0.0,
-                added=False
-            ))
-            continue
-        
-        query = f"{source_title} {source_channel}".strip()
-        
-        try:
-            candidates = SpotifyClient.search_tracks(body.user_id, query)
-        except Exception:
-            results.append(TrackMatchResult(
-                source_title=source_title,
-                source_channel=source_channel,
-                matched_track_id=None,
-                matched_title=None,
-                matched_artist=None,
-                score=0.0,
-                added=False
-            ))
-            continue
-        
-        best_candidate = None
-        best_score = -1.0
-        
-        for c in candidates:
-            cand_title = c.get("title") or ""
-            cand_artist = c.get("artist") or ""
-            s = score_match(
-                source_title=source_title,
-                source_artist=source_channel,
-                candidate_title=cand_title,
-                candidate_channel=cand_artist
-            )
-            if s > best_score:
-                best_score = s
-                best_candidate = c
-        
-        if not best_candidate or best_score < body.min_score:
-            results.append(TrackMatchResult(
-                source_title=source_title,
-                source_channel=source_channel,
-                matched_track_id=None,
-                matched_title=None,
-                matched_artist=None,
-                score=best_score if best_score >= 0 else 0.0,
-                added=False
-            ))
-            continue
-        
-        # 4. Add to Spotify playlist
-        added_ok = False
-        track_uri = best_candidate.get("uri")
-        
-        if track_uri:
-            try:
-                SpotifyClient.add_tracks_to_playlist(
-                    user_id=body.user_id,
-                    playlist_id=target_playlist_id,
-                    uris=[track_uri]
-                )
-                added_ok = True
-            except Exception:
-                added_ok = False
-        
-        results.append(TrackMatchResult(
-            source_title=source_title,
-            source_channel=source_channel,
-            matched_track_id=best_candidate.get("id"),
-            matched_title=best_candidate.get("title"),
-            matched_artist=best_candidate.get("artist"),
-            score=best_score,
-            added=added_ok
-        ))
-    
-    # 5. Summary
-    total = len(results)
-    added = sum(1 for r in results if r.added)
-    failed = total - added
-    
-    return {
-        "status": "ok",
-        "created_new_playlist": created_playlist,
-        "target_playlist_id": target_playlist_id,
-        "summary": {
-            "total_tracks": total,
-            "added": added,
-            "failed": failed,
-            "min_score": body.min_score
-        },
-        "matches": [r.dict() for r in results]
-    }
+    return FastJSONResponse(await collect_response(iter_youtube_to_spotify(body), body.detail))
+
+
+@router.post("/youtube-to-spotify/stream")
+async def stream_youtube_to_spotify(body: YouTubeToSpotifyRequest) -> StreamingResponse:
+    """
+    Migrate YouTube playlist to Spotify, streaming each track result as NDJSON
+    """
+    events = await prime(iter_youtube_to_spotify(body))
+    return StreamingResponse(iter_ndjson(events, body.detail), media_type="application/x-ndjson")
 
 # ============================================
 # SPOTIFY → YOUTUBE
 # ============================================
 
 @router.post("/spotify-to-youtube")
-def migrate_spotify_to_youtube(body: SpotifyToYouTubeRequest) -> Dict[str, Any]:
+async def migrate_spotify_to_youtube(body: SpotifyToYouTubeRequest) -> FastJSONResponse:
     """
     Migrate Spotify playlist to YouTube
     """
-    
-    # 1. Get Spotify tracks
+    return FastJSONResponse(await collect_response(iter_spotify_to_youtube(body), body.detail))
+
+
+@router.post("/spotify-to-youtube/stream")
+async def stream_spotify_to_youtube(body: SpotifyToYouTubeRequest) -> StreamingResponse:
+    """
+    Migrate Spotify playlist to YouTube, streaming each track result as NDJSON
+    """
+    events = await prime(iter_spotify_to_youtube(body))
+    return StreamingResponse(iter_ndjson(events, body.detail), media_type="application/x-ndjson")
+
+
+@router.post("/spotify-to-youtube/estimate")
+async def estimate_migration_spotify_to_youtube(body: SpotifyToYouTubeRequest) -> Dict[str, Any]:
+    """
+    YouTube quota units a Spotify → YouTube migration would use, before running it
+    """
+    return await estimate_spotify_to_youtube(body)
+
+# ============================================
+# BACKGROUND JOBS
+# ============================================
+
+async def _create_job(user_id: str, source_provider: str, target_provider: str) -> int:
     try:
-        playlist_info = SpotifyClient.get_playlist_info(body.user_id, body.source_playlist_id)
-        tracks = SpotifyClient.get_playlist_tracks(body.user_id, body.source_playlist_id)
-    except Exception as e:
-        raise HTTPException(status_code=502, detail=f"Error fetching Spotify playlist: {e}")
-    
-    if not tracks:
-        return {
-            "status": "no_tracks",
-            "message": "Spotify playlist has no tracks",
-            "matches": []
-        }
-    
-    # 2. Create YouTube playlist if not provided
-    target_playlist_id = body.target_youtube_playlist_id
-    created_playlist = False
-    
-    if not target_playlist_id:
-        try:
-            youtube_playlist = YouTubeClient.create_playlist(
-                title=playlist_info.get("name", "Migrated Playlist"),
-                description=f"Migrated from Spotify",
-                privacy="private"
-            )
-            target_playlist_id = youtube_playlist["playlistId"]
-            created_playlist = True
-        except Exception as e:
-            raise HTTPException(status_code=502, detail=f"Error creating YouTube playlist: {e}")
-    
-    results: List[TrackMatchResult] = []
-    
-    # 3. For each Spotify track, search and match on YouTube
-    for t in tracks:
-        source_title = t.get("title") or ""
-        source_artist = t.get("artist") or ""
-        
-        if not source_title:
-            results.append(TrackMatchResult(
-                source_title=source_title,
-                source_channel=source_artist,
-                matched_track_id=None,
-                matched_title=None,
-                matched_artist=None,
-                score=0.0,
-                added=False
-            ))
-            continue
-        
-        query = f"{source_title} {source_artist}".strip()
-        
-        try:
-            candidates = YouTubeClient.search_videos(query)
-        except Exception:
-            results.append(TrackMatchResult(
-                source_title=source_title,
-                source_channel=source_artist,
-                matched_track_id=None,
-                matched_title=None,
-                matched_artist=None,
-                score=0.0,
-                added=False
-            ))
-            continue
-        
-        best_candidate = None
-        best_score = -1.0
-        
-        for c in candidates:
-            cand_title = c.get("title") or ""
-            cand_channel = c.get("channel") or ""
-            s = score_match(
-                source_title=source_title,
-                source_artist=source_artist,
-                candidate_title=cand_title,
-                candidate_channel=cand_channel
-            )
-            if s > best_score:
-                best_score = s
-                best_candidate = c
-        
-        if not best_candidate or best_score < body.min_score:
-            results.append(TrackMatchResult(
-                source_title=source_title,
-                source_channel=source_artist,
-                matched_track_id=None,
-                matched_title=None,
-                matched_artist=None,
-                score=best_score if best_score >= 0 else 0.0,
-                added=False
-            ))
-            continue
-        
-        # 4. Add to YouTube playlist
-        added_ok = False
-        video_id = best_candidate.get("videoId")
-        
-        if video_id:
-            try:
-                YouTubeClient.add_to_playlist(target_playlist_id, video_id)
-                added_ok = True
-            except Exception:
-                added_ok = False
-        
-        results.append(TrackMatchResult(
-            source_title=source_title,
-            source_channel=source_artist,
-            matched_track_id=video_id,
-            matched_title=best_candidate.get("title"),
-            matched_artist=best_candidate.get("channel"),
-            score=best_score,
-            added=added_ok
-        ))
-    
-    # 5. Summary
-    total = len(results)
-    added = sum(1 for r in results if r.added)
-    failed = total - added
-    
+        return await asyncio.to_thread(job_store.create_job, user_id, source_provider, target_provider)
+    except UnknownUser as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+
+@router.post("/jobs/youtube-to-spotify", status_code=202)
+async def enqueue_youtube_to_spotify(body: YouTubeToSpotifyRequest) -> Dict[str, Any]:
+    """
+    Queue a YouTube → Spotify migration and return its job id immediately.
+    """
+    job_id = await _create_job(body.user_id, "youtube", "spotify")
+    submit_job(job_id, body.source_youtube_playlist_id, iter_youtube_to_spotify(body))
+    return {"job_id": job_id, "status": "pending"}
+
+
+@router.post("/jobs/spotify-to-youtube", status_code=202)
+async def enqueue_spotify_to_youtube(body: SpotifyToYouTubeRequest) -> Dict[str, Any]:
+    """
+    Queue a Spotify → YouTube migration and return its job id immediately.
+    """
+    job_id = await _create_job(body.user_id, "spotify", "youtube")
+    submit_job(job_id, body.source_playlist_id, iter_spotify_to_youtube(body))
+    return {"job_id": job_id, "status": "pending"}
+
+
+@router.post("/jobs/bulk/youtube-to-spotify", status_code=202)
+async def enqueue_bulk_youtube_to_spotify(body: BulkYouTubeToSpotifyRequest) -> Dict[str, Any]:
+    """
+    Queue several (or all) YouTube playlists for migration to Spotify as one job.
+    """
+    migrations = await plan_youtube_to_spotify(body)
+    job_id = await _create_job(body.user_id, "youtube", "spotify")
+    submit_bulk_job(job_id, migrations)
+    return {"job_id": job_id, "status": "pending", "playlists": len(migrations)}
+
+
+@router.post("/jobs/bulk/spotify-to-youtube", status_code=202)
+async def enqueue_bulk_spotify_to_youtube(body: BulkSpotifyToYouTubeRequest) -> Dict[str, Any]:
+    """
+    Queue several (or all) Spotify playlists for migration to YouTube as one job.
+    Playlists that would exceed the job's YouTube quota budget are deferred.
+    """
+    quota_budget = body.quota_budget if body.quota_budget is not None else settings.YOUTUBE_QUOTA_BUDGET_UNITS
+    migrations = await plan_spotify_to_youtube(body, QuotaBudget(quota_budget))
+    job_id = await _create_job(body.user_id, "spotify", "youtube")
+    submit_bulk_job(job_id, migrations)
+    return {"job_id": job_id, "status": "pending", "playlists": len(migrations)}
+
+
+@router.get("/jobs/{job_id}")
+async def get_migration_job(
+    job_id: int,
+    detail: ResultDetail = "full",
+    offset: int = Query(0, ge=0),
+    limit: int = Query(settings.JOB_RESULTS_PAGE_SIZE, ge=1, le=settings.JOB_RESULTS_MAX_PAGE_SIZE),
+) -> FastJSONResponse:
+    """
+    Progress and per-track results of a queued migration. Track results
+    come one page at a time; follow page.next_offset for the rest.
+    """
+    job = await asyncio.to_thread(job_store.get_job, job_id, detail, offset, limit)
+    if not job:
+        raise HTTPException(status_code=404, detail="Migration job not found")
+    return FastJSONResponse(job)
+
+# ============================================
+# MATCH PLANS
+# ============================================
+
+@router.post("/plans/youtube-to-spotify")
+async def plan_youtube_to_spotify_migration(body: YouTubeToSpotifyRequest) -> Dict[str, Any]:
+    """
+    Dry run: match a YouTube playlist against Spotify and store every candidate as a plan.
+    """
+    return await build_youtube_to_spotify_plan(body)
+
+
+@router.post("/plans/spotify-to-youtube")
+async def plan_spotify_to_youtube_migration(body: SpotifyToYouTubeRequest) -> Dict[str, Any]:
+    """
+    Dry run: match a Spotify playlist against YouTube and store every candidate as a plan.
+    """
+    return await build_spotify_to_youtube_plan(body)
+
+
+@router.get("/plans/{plan_id}")
+async def get_match_plan(plan_id: int) -> Dict[str, Any]:
+    """
+    A stored match plan with all candidates and scores per source track.
+    """
+    plan = await asyncio.to_thread(plan_store.get_plan, plan_id)
+    if not plan:
+        raise HTTPException(status_code=404, detail="Match plan not found")
+    return plan
+
+
+@router.post("/plans/{plan_id}/commit")
+async def commit_match_plan(plan_id: int, body: PlanCommitRequest) -> Dict[str, Any]:
+    """
+    Apply a match plan with a threshold and/or manual overrides. Writes only, no searches.
+    Committing a plan again writes to the playlist its first commit used.
+    """
+    plan = await asyncio.to_thread(plan_store.get_plan, plan_id)
+    if not plan:
+        raise HTTPException(status_code=404, detail="Match plan not found")
+    return await collect_response(iter_commit_plan(plan, body))
+
+# ============================================
+# CACHES AND QUOTA
+# ============================================
+
+@router.get("/cache/stats")
+async def get_cache_stats() -> Dict[str, Any]:
+    """
+    Size and hit/miss counters of the in-process search and match caches.
+    """
     return {
-        "status": "ok",
-        "created_new_playlist": created_playlist,
-        "target_playlist_id": target_playlist_id,
-        "source_playlist_name": playlist_info.get("name"),
-        "summary": {
-            "total_tracks": total,
-            "added": added,
-            "failed": failed,
-            "min_score": body.min_score
-        },
-        "matches": [r.dict() for r in results]
+        "spotify_search": SpotifyClient.search_cache.stats(),
+        "youtube_search": YouTubeClient.search_cache.stats(),
+        "match": match_cache.memory.stats(),
     }
+
+
+@router.get("/quota/youtube")
+async def get_youtube_quota() -> Dict[str, Any]:
+    """
+    YouTube Data API units used today (all callers, per the connector) and per endpoint by this service.
+    """
+    return await YouTubeClient.sync_quota()
@@ -0,0 +1,71 @@
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException
+
+from app.models.migration_models import (
+    BulkSpotifyToYouTubeRequest,
+    BulkYouTubeToSpotifyRequest,
+    SpotifyToYouTubeRequest,
+    YouTubeToSpotifyRequest,
+)
+from app.services.migration_runner import (
+    MigrationEvent,
+    iter_spotify_to_youtube,
+    iter_youtube_to_spotify,
+)
+from app.services.spotify_client import SpotifyClient
+from app.services.youtube_client import YouTubeClient
+from app.utils.quota import QuotaBudget
+
+# A bulk migration is an ordered list of single-playlist migrations that
+# one background job works through:
+#
+#   (source_playlist_id, events)
+#
+# The event generators are lazy, so no playlist touches a connector until
+# the job scheduler starts it. Playlists run one after another, which keeps
+# the connector load of a bulk job equal to that of a single migration and
+# lets later playlists hit the search/match caches warmed by earlier ones.
+PlaylistMigration = Tuple[str, AsyncIterator[MigrationEvent]]
+
+
+async def _source_playlist_ids(requested: Optional[List[str]],
+                               list_all: Callable[[], Awaitable[List[Dict[str, Any]]]],
+                               provider_name: str) -> List[str]:
+    """
+    The requested playlist ids (deduplicated, in order), or every playlist the user has.
+    """
+    if requested is not None:
+        return list(dict.fromkeys(pid for pid in requested if pid))
+
+    try:
+        return [p["id"] for p in await list_all() if p.get("id")]
+    except Exception as e:
+        raise HTTPException(status_code=502, detail=f"Error listing {provider_name} playlists: {e}")
+
+
+async def plan_youtube_to_spotify(body: BulkYouTubeToSpotifyRequest) -> List[PlaylistMigration]:
+    playlist_ids = await _source_playlist_ids(body.source_youtube_playlist_ids, YouTubeClient.get_playlists, "YouTube")
+    options = body.model_dump(exclude={"source_youtube_playlist_ids"})
+
+    return [
+        (playlist_id, iter_youtube_to_spotify(
+            YouTubeToSpotifyRequest(source_youtube_playlist_id=playlist_id, **options)
+        ))
+        for playlist_id in playlist_ids
+    ]
+
+
+async def plan_spotify_to_youtube(body: BulkSpotifyToYouTubeRequest,
+                                  budget: Optional[QuotaBudget] = None) -> List[PlaylistMigration]:
+    playlist_ids = await _source_playlist_ids(
+        body.source_playlist_ids, lambda: SpotifyClient.get_playlists(body.user_id), "Spotify"
+    )
+    options = body.model_dump(exclude={"source_playlist_ids", "quota_budget"})
+
+    return [
+        (playlist_id, iter_spotify_to_youtube(
+            SpotifyToYouTubeRequest(source_playlist_id=playlist_id, **options), budget
+        ))
+        for playlist_id in playlist_ids
+    ]
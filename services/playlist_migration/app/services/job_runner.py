@@ -0,0 +1,161 @@
+import asyncio
+from typing import AsyncIterator, Awaitable, Dict, List, Optional, Set, Tuple
+
+from fastapi import HTTPException
+
+from app.config import settings
+from app.models.migration_models import TrackMatchResult
+from app.services.migration_runner import MigrationEvent
+from app.storage.job_store import job_store
+
+# Queued migrations run as tasks on the event loop. At most
+# MIGRATION_JOB_WORKERS run at once, so a burst of jobs queues up instead
+# of multiplying the load on the connectors.
+job_slots = asyncio.Semaphore(max(1, settings.MIGRATION_JOB_WORKERS))
+
+# Strong references to running jobs; the loop only keeps weak ones
+running_jobs: Set[asyncio.Task] = set()
+
+
+# Every job_store call is a blocking database round trip, so jobs make
+# them in a worker thread.
+
+async def _update_playlist(playlist_migration_id: int, **fields):
+    await asyncio.to_thread(job_store.update_playlist, playlist_migration_id, **fields)
+
+
+async def _set_job_status(job_id: int, status: str, message: Optional[str] = None):
+    await asyncio.to_thread(job_store.set_job_status, job_id, status, message)
+
+
+async def _drain_playlist(playlist_migration_id: int,
+                          events: AsyncIterator[MigrationEvent]) -> Tuple[str, Optional[str]]:
+    """
+    Write one playlist migration's events to the job store as they come.
+    Returns the playlist's final status and message.
+
+    A migration refused by its job's quota budget, or whose tracks were
+    partly deferred for quota, leaves the playlist 'deferred'.
+    """
+    row_ids = []
+    deferred = 0
+    window = 1
+    # row id -> latest result, written one window at a time
+    pending: Dict[int, TrackMatchResult] = {}
+
+    async def flush():
+        if pending:
+            updates = list(pending.items())
+            pending.clear()
+            await asyncio.to_thread(job_store.update_tracks, updates)
+
+    try:
+        async for event in events:
+            if event["type"] == "empty":
+                await _update_playlist(
+                    playlist_migration_id, target_playlist_id=event.get("target_playlist_id"), status="completed"
+                )
+                return "completed", event["message"]
+
+            if event["type"] == "deferred":
+                await _update_playlist(playlist_migration_id, status="deferred", error_message=event["message"])
+                return "deferred", event["message"]
+
+            if event["type"] == "start":
+                await _update_playlist(
+                    playlist_migration_id,
+                    source_name=event["source_playlist_name"],
+                    target_playlist_id=event["target_playlist_id"],
+                )
+                row_ids = await asyncio.to_thread(job_store.add_tracks, playlist_migration_id, event["tracks"])
+                window = event.get("window", 1)
+            elif event["type"] == "track":
+                pending[row_ids[event["index"]]] = event["result"]
+                if len(pending) >= window:
+                    await flush()
+            elif event["type"] == "summary":
+                await flush()
+                deferred = event["summary"].get("deferred", 0)
+                await _update_playlist(playlist_migration_id, timings=event["summary"].get("timings"))
+    finally:
+        # Rows matched before a failure still get their results
+        await flush()
+
+    if deferred:
+        message = f"{deferred} tracks deferred: over today's YouTube quota"
+        await _update_playlist(playlist_migration_id, status="deferred", error_message=message)
+        return "deferred", message
+
+    await _update_playlist(playlist_migration_id, status="completed")
+    return "completed", None
+
+
+async def run_job(job_id: int, source_playlist_id: str, events: AsyncIterator[MigrationEvent]):
+    """
+    Drain a migration, writing per-track rows to the job store as it goes.
+    """
+    await _set_job_status(job_id, "running")
+    playlist_migration_id = await asyncio.to_thread(job_store.add_playlist, job_id, source_playlist_id)
+
+    try:
+        _, message = await _drain_playlist(playlist_migration_id, events)
+        await _set_job_status(job_id, "completed", message)
+
+    except HTTPException as e:
+        await _update_playlist(playlist_migration_id, status="failed", error_message=str(e.detail))
+        await _set_job_status(job_id, "failed", str(e.detail))
+    except Exception as e:
+        print(f"Migration job {job_id} failed: {e}")
+        await _update_playlist(playlist_migration_id, status="failed", error_message=str(e))
+        await _set_job_status(job_id, "failed", str(e))
+
+
+async def run_bulk_job(job_id: int, migrations: List[Tuple[str, AsyncIterator[MigrationEvent]]]):
+    """
+    Work through several playlist migrations in order under one job.
+
+    A playlist that fails does not stop the others. Playlists over the
+    job's quota budget (see QuotaBudget) end 'deferred'.
+    """
+    await _set_job_status(job_id, "running")
+
+    # Rows up front, so the report lists every playlist from the start
+    playlists = [(await asyncio.to_thread(job_store.add_playlist, job_id, source_playlist_id), events)
+                 for source_playlist_id, events in migrations]
+    counts = {"completed": 0, "deferred": 0, "failed": 0}
+    for playlist_migration_id, events in playlists:
+        try:
+            status, _ = await _drain_playlist(playlist_migration_id, events)
+        except HTTPException as e:
+            status = "failed"
+            await _update_playlist(playlist_migration_id, status="failed", error_message=str(e.detail))
+        except Exception as e:
+            print(f"Bulk migration job {job_id}: playlist failed: {e}")
+            status = "failed"
+            await _update_playlist(playlist_migration_id, status="failed", error_message=str(e))
+        counts[status] += 1
+
+    message = (
+        f"{counts['completed']} of {len(playlists)} playlists migrated, "
+        f"{counts['deferred']} deferred, {counts['failed']} failed"
+    )
+    failed_all = playlists and counts["failed"] == len(playlists)
+    await _set_job_status(job_id, "failed" if failed_all else "completed", message)
+
+
+def _start(job: Awaitable[None]):
+    async def queued():
+        async with job_slots:
+            await job
+
+    task = asyncio.create_task(queued())
+    running_jobs.add(task)
+    task.add_done_callback(running_jobs.discard)
+
+
+def submit_job(job_id: int, source_playlist_id: str, events: AsyncIterator[MigrationEvent]):
+    _start(run_job(job_id, source_playlist_id, events))
+
+
+def submit_bulk_job(job_id: int, migrations: List[Tuple[str, AsyncIterator[MigrationEvent]]]):
+    _start(run_bulk_job(job_id, migrations))
@@ -0,0 +1,136 @@
+import asyncio
+import time
+from typing import Any, Dict, Optional
+
+from app.config import settings
+from app.storage.database import Database, db
+from app.utils.match_scoring import normalize_text
+from app.utils.ttl_cache import TTLCache
+
+# Cross-user cache of source → target resolutions, keyed by normalized
+# (target provider, title, artist). A hit carries the winning candidate
+# and its score, so the pipeline can skip both search and scoring.
+#
+# Exact entries are keyed by an external id of the source instead
+# ("isrc:<ISRC>", "<provider>:<id>") and are checked before the fuzzy key.
+#
+# Tier 1 is an in-process LRU; tier 2 (optional) is migrations.match_cache
+# in the shared database, so hits survive restarts and are shared by replicas.
+# Lookups and stores are coroutines: a tier-1 hit returns at once, database
+# round trips run in a worker thread so they never block the event loop.
+
+SQLITE_SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS migrations.match_cache (
+        cache_key               VARCHAR(600) PRIMARY KEY,
+        target_provider         VARCHAR(50) NOT NULL,
+        target_track_id         VARCHAR(255),
+        target_write_id         VARCHAR(255),
+        target_title            TEXT,
+        target_artist           TEXT,
+        match_score             NUMERIC(5,2) NOT NULL,
+        expires_at              DOUBLE PRECISION NOT NULL
+    )""",
+]
+
+
+class MatchCache:
+    def __init__(self, database: Optional[Database], maxsize: int, ttl: float):
+        self.memory = TTLCache(maxsize, ttl)
+        self.ttl = ttl
+        self.db = database
+        if self.db is not None:
+            self.db.create_tables(SQLITE_SCHEMA)
+
+    @staticmethod
+    def key(target_provider: str, title: str, artist: str) -> str:
+        return f"{target_provider}|{normalize_text(title)}|{normalize_text(artist)}"
+
+    @staticmethod
+    def exact_key(target_provider: str, external_key: str) -> str:
+        return f"{target_provider}#{external_key}"
+
+    async def get(self, target_provider: str, title: str, artist: str) -> Optional[Dict[str, Any]]:
+        """
+        Cached winner: {"track_id", "write_id", "title", "artist", "score"}, or None.
+        """
+        return await self._get(self.key(target_provider, title, artist))
+
+    async def get_exact(self, target_provider: str, external_key: str) -> Optional[Dict[str, Any]]:
+        return await self._get(self.exact_key(target_provider, external_key))
+
+    async def _get(self, key: str) -> Optional[Dict[str, Any]]:
+        entry = self.memory.get(key)
+        if entry is not None or self.db is None:
+            return entry
+        return await asyncio.to_thread(self._load, key)
+
+    def _load(self, key: str) -> Optional[Dict[str, Any]]:
+        rows = self.db.execute(
+            "SELECT target_track_id, target_write_id, target_title, target_artist, match_score, expires_at "
+            "FROM migrations.match_cache WHERE cache_key = ?",
+            (key,),
+        )
+        if not rows:
+            return None
+
+        row = rows[0]
+        remaining = row[5] - time.time()
+        if remaining <= 0:
+            self.db.execute("DELETE FROM migrations.match_cache WHERE cache_key = ?", (key,))
+            return None
+
+        entry = {
+            "track_id": row[0],
+            "write_id": row[1],
+            "title": row[2],
+            "artist": row[3],
+            "score": float(row[4]),
+        }
+        self.memory.set(key, entry, ttl=remaining)
+        return entry
+
+    async def put(self, target_provider: str, title: str, artist: str, entry: Dict[str, Any]):
+        await self._put(self.key(target_provider, title, artist), target_provider, entry)
+
+    async def put_exact(self, target_provider: str, external_key: str, entry: Dict[str, Any]):
+        await self._put(self.exact_key(target_provider, external_key), target_provider, entry)
+
+    async def _put(self, key: str, target_provider: str, entry: Dict[str, Any]):
+        self.memory.set(key, entry)
+        if self.db is not None:
+            await asyncio.to_thread(self._store, key, target_provider, entry)
+
+    def _store(self, key: str, target_provider: str, entry: Dict[str, Any]):
+        try:
+            self.db.execute(
+                "INSERT INTO migrations.match_cache "
+                "(cache_key, target_provider, target_track_id, target_write_id, target_title, "
+                "target_artist, match_score, expires_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (cache_key) DO UPDATE SET "
+                "target_track_id = excluded.target_track_id, target_write_id = excluded.target_write_id, "
+                "target_title = excluded.target_title, target_artist = excluded.target_artist, "
+                "match_score = excluded.match_score, expires_at = excluded.expires_at",
+                (key, target_provider, entry["track_id"], entry["write_id"], entry["title"],
+                 entry["artist"], round(entry["score"], 2), time.time() + self.ttl),
+            )
+        except Exception as e:
+            # The persistent tier is best-effort; the in-memory hit still counts
+            print(f"Error writing match cache: {e}")
+
+    def invalidate(self, target_provider: str, title: str, artist: str):
+        key = self.key(target_provider, title, artist)
+        self.memory.delete(key)
+        if self.db is not None:
+            self.db.execute("DELETE FROM migrations.match_cache WHERE cache_key = ?", (key,))
+
+    def purge_expired(self):
+        if self.db is not None:
+            self.db.execute("DELETE FROM migrations.match_cache WHERE expires_at < ?", (time.time(),))
+
+
+# Global instance used everywhere
+match_cache = MatchCache(
+    db if settings.MATCH_CACHE_PERSIST else None,
+    settings.MATCH_CACHE_SIZE,
+    settings.MATCH_CACHE_TTL_SECONDS,
+)
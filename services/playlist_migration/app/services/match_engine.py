@@ -0,0 +1,81 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple, TypeVar
+
+from app.config import settings
+from app.utils.match_scoring import SourceScorer
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+def resolve_concurrency(requested: Optional[int] = None) -> int:
+    """
+    In-flight match count for a single migration.
+    Falls back to the configured default and never exceeds MIGRATION_MAX_CONCURRENCY.
+    """
+    limit = max(1, settings.MIGRATION_MAX_CONCURRENCY)
+    if requested is None:
+        requested = settings.MIGRATION_DEFAULT_CONCURRENCY
+    return max(1, min(requested, limit))
+
+
+async def map_bounded(func: Callable[[T], Awaitable[R]], items: List[T], max_workers: int) -> List[R]:
+    """
+    Await func over items with at most max_workers in flight.
+    Results come back in the same order as items.
+    """
+    if max_workers <= 1 or len(items) <= 1:
+        return [await func(item) for item in items]
+
+    slots = asyncio.Semaphore(max_workers)
+
+    async def bounded(item: T) -> R:
+        async with slots:
+            return await func(item)
+
+    return list(await asyncio.gather(*(bounded(item) for item in items)))
+
+
+def pick_best_candidate(source_title: str, source_artist: str,
+                        candidates: List[Dict[str, Any]],
+                        artist_key: str, source_duration_ms: Optional[int] = None,
+                        duration_key: Optional[str] = None) -> Tuple[Optional[Dict[str, Any]], float]:
+    """
+    Score every candidate against the source track and return (best, score).
+    artist_key is the candidate field holding the artist/channel name.
+
+    With a source duration and a candidate duration_key, near-ties (within
+    MATCH_DURATION_TIE_MARGIN points of the top score) go to the best-scoring
+    candidate whose duration is within MATCH_DURATION_TOLERANCE_MS.
+    """
+    scorer = SourceScorer(source_title, source_artist, settings.MATCH_SCORING_BACKEND)
+    pairs = [(c.get("title") or "", c.get(artist_key) or "") for c in candidates]
+
+    if not source_duration_ms or not duration_key:
+        index, best_score = scorer.best(pairs)
+        if index < 0:
+            return None, -1.0
+        return candidates[index], best_score
+
+    if not candidates:
+        return None, -1.0
+
+    scores = scorer.score_all(pairs)
+    floor = max(scores) - settings.MATCH_DURATION_TIE_MARGIN
+
+    def rank(i: int) -> Tuple[bool, float, int]:
+        duration = candidates[i].get(duration_key)
+        off = not duration or abs(duration - source_duration_ms) > settings.MATCH_DURATION_TOLERANCE_MS
+        return off, -scores[i], i
+
+    index = min((i for i in range(len(candidates)) if scores[i] >= floor), key=rank)
+    return candidates[index], scores[index]
+
+
+def score_candidates(source_title: str, source_artist: str,
+                     candidates: List[Dict[str, Any]], artist_key: str) -> List[float]:
+    """
+    Score of every candidate against the source track, in order.
+    """
+    scorer = SourceScorer(source_title, source_artist, settings.MATCH_SCORING_BACKEND)
+    return scorer.score_all([(c.get("title") or "", c.get(artist_key) or "") for c in candidates])
@@ -0,0 +1,256 @@
+import asyncio
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from fastapi import HTTPException
+
+from app.config import settings
+from app.models.migration_models import (
+    PlanCommitRequest,
+    SpotifyToYouTubeRequest,
+    TrackMatchResult,
+    YouTubeToSpotifyRequest,
+)
+from app.services.match_engine import map_bounded, resolve_concurrency
+from app.services.migration_pipeline import (
+    SPOTIFY_FIELDS,
+    YOUTUBE_FIELDS,
+    Decision,
+    MigrationPipeline,
+    source_items,
+    unmatched,
+)
+from app.services.migration_runner import MigrationEvent
+from app.services.playlist_writer import RetryQueue, chunked, write_in_batches
+from app.services.spotify_client import SpotifyClient
+from app.services.target_playlist import prepare_target
+from app.services.youtube_client import YouTubeClient
+from app.storage.plan_store import plan_store
+from app.utils.metrics import StageTimings
+from app.utils.quota import QuotaExceeded
+
+# Two-phase migration:
+#   plan   - search and score every source track, store all candidates, write nothing
+#   commit - pick a candidate per track (threshold or manual override) and
+#            write the picks to the target in batches, without any search
+
+# ============================================
+# PLAN
+# ============================================
+
+async def _no_writes(ids: List[str]) -> List[bool]:
+    raise RuntimeError("Match plans never write to the target playlist")
+
+
+async def _build_plan(user_id: str, source_provider: str, source_playlist_id: str,
+                      source_name: Optional[str], items: List[Dict[str, Any]],
+                      pipeline: MigrationPipeline) -> Dict[str, Any]:
+    async def rank(item: Dict[str, Any]) -> Optional[List[Dict[str, Any]]]:
+        try:
+            return await pipeline.rank(item)
+        except QuotaExceeded:
+            return None     # deferred: out of quota, a later plan searches it
+
+    # One ranking per distinct song, fanned out to every copy
+    songs: Dict[str, Dict[str, Any]] = {}
+    for item in items:
+        songs.setdefault(item["song"], item)
+    ranked = dict(zip(songs.keys(), await map_bounded(rank, list(songs.values()), pipeline.concurrency)))
+
+    plan_id = await asyncio.to_thread(
+        plan_store.create_plan, user_id, source_provider, source_playlist_id, source_name, pipeline.fields["provider"],
+        pipeline.min_score,
+        [{**item, "candidates": ranked[item["song"]] or [], "deferred": ranked[item["song"]] is None}
+         for item in items]
+    )
+    return await asyncio.to_thread(plan_store.get_plan, plan_id)
+
+
+async def build_youtube_to_spotify_plan(body: YouTubeToSpotifyRequest) -> Dict[str, Any]:
+    """
+    Dry-run a YouTube → Spotify migration and store its match plan.
+    """
+    try:
+        videos = await YouTubeClient.get_playlist_videos(body.source_youtube_playlist_id)
+    except Exception as e:
+        raise HTTPException(status_code=502, detail=f"Error fetching YouTube playlist: {e}")
+
+    items = source_items(videos, "youtube", id_key="videoId", track_id_key="videoId",
+                         artist_key="channel", duration_key="durationMs")
+
+    async def search(query: str, limit: int) -> List[Dict[str, Any]]:
+        return await SpotifyClient.search_tracks(body.user_id, query, limit, use_cache=body.use_search_cache)
+
+    pipeline = MigrationPipeline(
+        search, SPOTIFY_FIELDS, _no_writes, settings.SPOTIFY_ADD_BATCH_SIZE,
+        resolve_concurrency(body.max_concurrency), body.min_score,
+        search_limits=settings.SPOTIFY_SEARCH_LIMITS
+    )
+    return await _build_plan(body.user_id, "youtube", body.source_youtube_playlist_id, None, items, pipeline)
+
+
+async def build_spotify_to_youtube_plan(body: SpotifyToYouTubeRequest) -> Dict[str, Any]:
+    """
+    Dry-run a Spotify → YouTube migration and store its match plan.
+    """
+    try:
+        playlist_info = await SpotifyClient.get_playlist_info(body.user_id, body.source_playlist_id)
+        tracks = await SpotifyClient.get_playlist_tracks(body.user_id, body.source_playlist_id)
+    except Exception as e:
+        raise HTTPException(status_code=502, detail=f"Error fetching Spotify playlist: {e}")
+
+    items = source_items(tracks, "spotify", id_key="uri", track_id_key="id",
+                         artist_key="artist", duration_key="duration_ms")
+
+    async def search(query: str, limit: int) -> List[Dict[str, Any]]:
+        return await YouTubeClient.search_videos(query, limit, use_cache=body.use_search_cache)
+
+    pipeline = MigrationPipeline(
+        search, YOUTUBE_FIELDS, _no_writes, settings.YOUTUBE_ADD_BATCH_SIZE,
+        resolve_concurrency(body.max_concurrency), body.min_score,
+        search_limits=settings.YOUTUBE_SEARCH_LIMITS
+    )
+    return await _build_plan(body.user_id, "spotify", body.source_playlist_id, playlist_info.get("name"),
+                       items, pipeline)
+
+# ============================================
+# COMMIT
+# ============================================
+
+def _pick(plan: Dict[str, Any], body: PlanCommitRequest) -> List[Decision]:
+    """
+    One decision per plan track. Overrides name a candidate's track id (or
+    None to skip the track) and win over the threshold. Tracks the plan
+    could not search stay deferred.
+    """
+    threshold = body.min_score if body.min_score is not None else plan["min_score"]
+    decisions = []
+
+    for track in plan["tracks"]:
+        title, artist = track["source_title"], track["source_channel"]
+        candidates = track["candidates"]
+
+        if track["index"] in body.overrides:
+            wanted = body.overrides[track["index"]]
+            if wanted is None:
+                decisions.append((unmatched(title, artist), None))
+                continue
+            chosen = next((c for c in candidates if c["track_id"] == wanted), None)
+            if chosen is None:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"Track {track['index']}: {wanted} is not one of the plan's candidates"
+                )
+        elif track["deferred"]:
+            result = unmatched(title, artist)
+            result.deferred = True
+            decisions.append((result, None))
+            continue
+        elif candidates and candidates[0]["score"] >= threshold:
+            chosen = candidates[0]
+        else:
+            score = candidates[0]["score"] if candidates else 0.0
+            decisions.append((unmatched(title, artist, score), None))
+            continue
+
+        result = TrackMatchResult(
+            source_title=title,
+            source_channel=artist,
+            matched_track_id=chosen["track_id"],
+            matched_title=chosen["title"],
+            matched_artist=chosen["artist"],
+            score=chosen["score"],
+            added=False
+        )
+        decisions.append((result, chosen["write_id"]))
+
+    return decisions
+
+
+async def iter_commit_plan(plan: Dict[str, Any], body: PlanCommitRequest) -> AsyncIterator[MigrationEvent]:
+    """
+    Apply a stored plan: batched writes only, zero searches. Emits the same
+    events as a migration, so it renders with collect_response.
+
+    The target is recorded on the plan as soon as it exists, so committing
+    the plan again (e.g. with another threshold, or after a failed commit)
+    writes to the same playlist and skips what is already there. On YouTube,
+    picks past today's insert quota are reported deferred, as in a
+    migration, and the next commit writes them.
+    """
+    timings = StageTimings(plan["target_provider"])
+    decisions = _pick(plan, body)
+    target = await prepare_target(
+        plan["target_provider"], plan["user_id"], body.target_playlist_id or plan["target_playlist_id"],
+        plan["source_playlist_name"]
+    )
+    await asyncio.to_thread(plan_store.set_target, plan["plan_id"], target.playlist_id)
+    add_batch, batch_size, existing = target.add_batch, target.batch_size, target.existing_ids
+    quota = YouTubeClient.quota if plan["target_provider"] == "youtube" else None
+
+    yield {
+        "type": "start",
+        "source_playlist_id": plan["source_playlist_id"],
+        "source_playlist_name": plan["source_playlist_name"],
+        "target_playlist_id": target.playlist_id,
+        "created_new_playlist": target.created,
+        "tracks": [{"id": t["source_track_id"], "title": t["source_title"], "artist": t["source_channel"]}
+                   for t in plan["tracks"]],
+        "new_tracks": len(plan["tracks"]),
+        "window": batch_size,
+    }
+
+    retry_queue = RetryQueue(add_batch, batch_size, landed=target.landed)
+    index = added = deferred = 0
+    for window in chunked(decisions, batch_size):
+        pending = []
+        for i, (result, write_id) in enumerate(window, index):
+            if not write_id:
+                continue
+            if write_id in existing:
+                result.added = True
+            else:
+                pending.append((i, result, write_id))
+
+        if quota is not None:
+            writable = min(len(pending), quota.remaining() // quota.cost("insert"))
+            for _, result, _ in pending[writable:]:
+                result.deferred = True
+            pending = pending[:writable]
+
+        with timings.stage("add"):
+            flags = await write_in_batches([write_id for _, _, write_id in pending], add_batch, batch_size)
+        for (i, result, write_id), added_ok in zip(pending, flags):
+            result.added = added_ok
+            if not added_ok:
+                retry_queue.defer((i, result), write_id)
+
+        for result, _ in window:
+            added += int(result.added)
+            deferred += int(result.deferred)
+            yield {"type": "track", "index": index, "result": result}
+            index += 1
+
+    if len(retry_queue):
+        with timings.stage("add_retry"):
+            outcomes = await retry_queue.drain()
+        for (i, result), added_ok in outcomes:
+            result.added = added_ok
+            added += int(added_ok)
+            yield {"type": "track", "index": i, "result": result}
+
+    await asyncio.to_thread(plan_store.mark_committed, plan["plan_id"], target.playlist_id)
+
+    yield {
+        "type": "summary",
+        "summary": {
+            "total_tracks": index,
+            "added": added,
+            "failed": index - added - deferred,
+            "deferred": deferred,
+            "min_score": body.min_score if body.min_score is not None else plan["min_score"],
+            "overridden": len(body.overrides),
+            "plan_id": plan["plan_id"],
+            "write_retries": retry_queue.stats(),
+            "timings": timings.breakdown()
+        }
+    }
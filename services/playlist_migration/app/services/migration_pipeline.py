@@ -0,0 +1,531 @@
+import asyncio
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Sequence, Set, Tuple
+
+from app.models.migration_models import TrackMatchResult
+from app.services.match_cache import match_cache
+from app.services.match_engine import map_bounded, pick_best_candidate, score_candidates
+from app.services.playlist_writer import LandedCheck, RetryQueue, write_in_batches
+from app.storage.checkpoint_store import checkpoint_store
+from app.utils.match_scoring import normalize_text, simplify_artist, simplify_title
+from app.utils.metrics import StageTimings
+from app.utils.quota import QuotaAccountant, QuotaExceeded
+
+# Candidate fields per target provider:
+#   artist_key   - artist/channel name used for scoring
+#   id_key       - id reported back as matched_track_id
+#   write_key    - id written to the target playlist
+#   duration_key - length in milliseconds, for the duration tie-break
+#   isrc_key     - ISRC, if the provider can search by it ("isrc:<code>")
+SPOTIFY_FIELDS = {"provider": "spotify", "artist_key": "artist", "id_key": "id", "write_key": "uri",
+                  "duration_key": "duration_ms", "isrc_key": "isrc"}
+YOUTUBE_FIELDS = {"provider": "youtube", "artist_key": "channel", "id_key": "videoId", "write_key": "videoId",
+                  "duration_key": "durationMs", "isrc_key": None}
+
+# (result, id to write to the target playlist or None)
+Decision = Tuple[TrackMatchResult, Optional[str]]
+
+# _resolve's answer for a song it could not afford to search
+DEFERRED: Dict[str, Any] = {"deferred": True}
+
+
+def source_items(raw: List[Dict[str, Any]], provider: str, id_key: str, track_id_key: str,
+                 artist_key: str, duration_key: str) -> List[Dict[str, Any]]:
+    """
+    Normalize source playlist entries to {"id", "title", "artist", "key", "song"}
+    plus the provider, track id and whatever exact-match data the source has
+    ("isrc", "duration_ms", "album").
+    key is the id plus its occurrence count, so duplicates stay distinct;
+    song is the normalized title/artist shared by every copy of a song.
+    """
+    seen: Dict[str, int] = {}
+    items = []
+    for entry in raw:
+        track_id = entry.get(id_key) or ""
+        title = entry.get("title") or ""
+        artist = entry.get(artist_key) or ""
+
+        base = track_id or f"{title}|{artist}"
+        occurrence = seen.get(base, 0)
+        seen[base] = occurrence + 1
+
+        items.append({
+            "id": track_id,
+            "title": title,
+            "artist": artist,
+            "key": f"{base}#{occurrence}",
+            "song": f"{normalize_text(title)}|{normalize_text(artist)}",
+            "provider": provider,
+            "track_id": entry.get(track_id_key) or track_id,
+            "isrc": (entry.get("isrc") or "").upper() or None,
+            "duration_ms": entry.get(duration_key),
+            "album": entry.get("album"),
+        })
+    return items
+
+
+def unmatched(source_title: str, source_channel: str, score: float = 0.0) -> TrackMatchResult:
+    return TrackMatchResult(
+        source_title=source_title,
+        source_channel=source_channel,
+        matched_track_id=None,
+        matched_title=None,
+        matched_artist=None,
+        score=score,
+        added=False
+    )
+
+
+def estimate_quota(items: List[Dict[str, Any]], checkpoint: Dict[str, Dict[str, Any]],
+                   quota: Optional[QuotaAccountant], keep_first: bool = False) -> Dict[str, int]:
+    """
+    Upper bound on what a run over items will cost: one search per song the
+    checkpoint has not settled and one insert per track not yet added (or,
+    with keep_first, already skipped as a duplicate).
+    Cache hits and newly skipped duplicates make the real run cheaper.
+    """
+    songs: Set[str] = set()
+    inserts = 0
+    for item in items:
+        entry = checkpoint.get(item["key"])
+        if entry and (entry["added"] or (keep_first and entry["duplicate"])):
+            continue
+        inserts += 1
+        if not (entry and entry["target_write_id"]):
+            songs.add(item["song"])
+
+    estimate = {"searches": len(songs), "inserts": inserts}
+    if quota is not None:
+        estimate["estimated_units"] = len(songs) * quota.cost("search") + inserts * quota.cost("insert")
+        estimate["remaining_units"] = quota.remaining()
+    return estimate
+
+
+class MigrationPipeline:
+    """
+    Matches normalized source items against one target provider and writes
+    the matches to the target playlist.
+
+    Work proceeds one add-batch window at a time: the window is matched
+    concurrently, its matches are flushed in one write, and its results are
+    yielded in source order. Each finished window is checkpointed.
+
+    Every copy of a song (same normalized title + artist) is searched and
+    scored once per run and the winner is fanned back out to each copy.
+    duplicates="keep_first" writes only the first copy to the target.
+
+    Searches start small: search(query, limit) is called with the first of
+    search_limits and only widened, then retried with a simplified query,
+    while the best score is still under min_score.
+
+    Writes that fail are queued rather than given up on; retry_failed_writes()
+    retries them with backoff once run() is done, first asking landed()
+    which of them reached the target anyway.
+
+    With a quota accountant, a song is only searched while today's quota
+    still covers the search plus its insert, and a window only writes as
+    many tracks as the quota has inserts left. Tracks past that point are
+    deferred: reported with deferred=True and left out of the checkpoint,
+    so a later resumed run picks them up (matches found so far are cached).
+    """
+
+    def __init__(self, search: Callable[[str, int], Awaitable[List[Dict[str, Any]]]], fields: Dict[str, str],
+                 add_batch: Callable[[List[str]], Awaitable[List[bool]]], batch_size: int,
+                 concurrency: int, min_score: float, duplicates: str = "keep_all",
+                 search_limits: Sequence[int] = (10,), timings: Optional[StageTimings] = None,
+                 quota: Optional[QuotaAccountant] = None, landed: Optional[LandedCheck] = None):
+        self.search = search
+        self.search_limits = list(search_limits) or [10]
+        self.fields = fields
+        self.add_batch = add_batch
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.min_score = min_score
+        self.duplicates = duplicates
+        self.timings = timings or StageTimings(fields["provider"])
+        self.quota = quota
+        # insert units promised to songs searched in the current window
+        self.reserved_units = 0
+        self.deferred = 0
+
+        # song -> winning candidate (None if nothing matched), for this run
+        self.resolved: Dict[str, Optional[Dict[str, Any]]] = {}
+        # song -> index of its copy written (or settled) in the target, for keep_first
+        self.kept: Dict[str, int] = {}
+        self.duplicates_skipped = 0
+
+        self.checkpoint_id: Optional[int] = None
+        self.checkpoint: Dict[str, Dict[str, Any]] = {}
+        self.existing_ids: Set[str] = set()
+        self.resumed = 0
+        self.removed = 0
+        self.write_failures = 0
+        self.retry_queue = RetryQueue(add_batch, batch_size, landed=landed)
+
+    def resume_from(self, checkpoint_id: int, entries: Dict[str, Dict[str, Any]],
+                    existing_ids: Set[str]):
+        """
+        Record progress under checkpoint_id, skip tracks the checkpoint already
+        finished, and never re-add ids that are already in the target.
+        """
+        self.checkpoint_id = checkpoint_id
+        self.checkpoint = entries
+        self.existing_ids = existing_ids
+
+    # Matching
+    async def _resolve(self, item: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Best candidate for the item's song: exact keys first (cached ISRC or
+        source id, then an ISRC search), then the fuzzy cache and search.
+        A cached entry under this run's min_score is ignored, so the song is
+        searched again.
+        """
+        source_title = item["title"]
+        source_artist = item["artist"]
+
+        if not source_title:
+            return None
+
+        provider = self.fields["provider"]
+        exact_keys = self._exact_keys(item)
+        for key in exact_keys:
+            cached = await match_cache.get_exact(provider, key)
+            if cached is not None and cached["score"] >= self.min_score:
+                self.timings.cache_lookup("exact_hit")
+                return cached
+
+        # A cached winner under this run's min_score was found with a lower
+        # threshold, so its search may have stopped short of widening
+        cached = await match_cache.get(provider, source_title, source_artist)
+        if cached is not None and cached["score"] >= self.min_score:
+            self.timings.cache_lookup("hit")
+            winner = cached
+        else:
+            self.timings.cache_lookup("miss" if cached is None else "below_threshold")
+            if not self._reserve_search():
+                return DEFERRED
+            try:
+                winner = await self._search_isrc(item) or await self._search_fuzzy(item)
+            except QuotaExceeded:
+                return DEFERRED
+            if cached is not None and (winner is None or cached["score"] >= winner["score"]):
+                return cached
+            if winner is None:
+                return None
+            # A winner under min_score is only as good as how far its search
+            # widened; a later run should search again rather than reuse it
+            if winner["score"] >= self.min_score:
+                await match_cache.put(provider, source_title, source_artist, winner)
+
+        await self._remember(item, winner, exact_keys)
+        return winner
+
+    @staticmethod
+    def _exact_keys(item: Dict[str, Any]) -> List[str]:
+        keys = []
+        if item["isrc"]:
+            keys.append(f"isrc:{item['isrc']}")
+        if item["id"]:
+            keys.append(f"{item['provider']}:{item['id']}")
+        return keys
+
+    async def _remember(self, item: Dict[str, Any], winner: Dict[str, Any], exact_keys: List[str]):
+        """
+        Cache the winner under the item's exact keys, and the item as the
+        answer for the opposite direction: a later migration of the winning
+        track back to the source provider then needs no search at all.
+        A winner under min_score was not written, so it is not remembered.
+        """
+        if winner["score"] < self.min_score:
+            return
+
+        provider = self.fields["provider"]
+        for key in exact_keys:
+            await match_cache.put_exact(provider, key, winner)
+
+        if winner["write_id"] and item["id"]:
+            await match_cache.put_exact(item["provider"], f"{provider}:{winner['write_id']}", {
+                "track_id": item["track_id"],
+                "write_id": item["id"],
+                "title": item["title"],
+                "artist": item["artist"],
+                "score": winner["score"],
+            })
+
+    async def _search(self, query: str, limit: int) -> List[Dict[str, Any]]:
+        with self.timings.stage("search"):
+            return await self.search(query, limit)
+
+    def _pick(self, title: str, artist: str, candidates: List[Dict[str, Any]],
+              duration_ms: Optional[int]) -> Tuple[Optional[Dict[str, Any]], float]:
+        with self.timings.stage("score"):
+            return pick_best_candidate(
+                title, artist, candidates, artist_key=self.fields["artist_key"],
+                source_duration_ms=duration_ms, duration_key=self.fields["duration_key"]
+            )
+
+    def _winner(self, candidate: Dict[str, Any], score: float) -> Dict[str, Any]:
+        return {
+            "track_id": candidate.get(self.fields["id_key"]),
+            "write_id": candidate.get(self.fields["write_key"]) or None,
+            "title": candidate.get("title"),
+            "artist": candidate.get(self.fields["artist_key"]),
+            "score": score,
+        }
+
+    async def _search_isrc(self, item: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Exact recording lookup on providers that support it. Any release of
+        the same ISRC is a perfect match; the duration tie-break picks among them.
+        """
+        isrc_key = self.fields["isrc_key"]
+        if not isrc_key or not item["isrc"]:
+            return None
+
+        try:
+            candidates = await self._search(f"isrc:{item['isrc']}", self.search_limits[0])
+        except QuotaExceeded:
+            raise
+        except Exception:
+            return None
+
+        same_recording = [c for c in candidates if (c.get(isrc_key) or "").upper() == item["isrc"]]
+        if not same_recording:
+            return None
+
+        best_candidate, _ = self._pick(item["title"], item["artist"], same_recording, item["duration_ms"])
+        return self._winner(best_candidate, 100.0)
+
+    async def _search_fuzzy(self, item: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Best candidate over an adaptive search: each query form is tried at
+        growing limits until a candidate reaches min_score. A form stops
+        widening once the provider returns fewer results than asked for.
+        The simplified form is also scored against the simplified source.
+        """
+        forms = [(item["title"], item["artist"])]
+        simplified = (simplify_title(item["title"]), simplify_artist(item["artist"]))
+        if simplified[0] and normalize_text(" ".join(simplified)) != normalize_text(" ".join(forms[0])):
+            forms.append(simplified)
+
+        best: Optional[Dict[str, Any]] = None
+        for title, artist in forms:
+            query = f"{title} {artist}".strip()
+            for limit in self.search_limits:
+                try:
+                    candidates = await self._search(query, limit)
+                except QuotaExceeded:
+                    raise
+                except Exception:
+                    break
+
+                best_candidate, best_score = self._pick(title, artist, candidates, item["duration_ms"])
+                if best_candidate and (best is None or best_score > best["score"]):
+                    best = self._winner(best_candidate, best_score)
+
+                if best is not None and best["score"] >= self.min_score:
+                    return best
+                if len(candidates) < limit:
+                    break
+
+        return best
+
+    async def rank(self, item: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """
+        Every candidate for the item as winner dicts, best first: the ISRC
+        match if any, then one search at the widest limit ordered the way
+        pick_best_candidate would choose. Used to build match plans.
+        Raises QuotaExceeded when the item cannot be searched today.
+        """
+        if not item["title"]:
+            return []
+
+        ranked = []
+        exact = await self._search_isrc(item)
+        if exact:
+            ranked.append(exact)
+
+        try:
+            candidates = await self._search(f"{item['title']} {item['artist']}".strip(), max(self.search_limits))
+        except QuotaExceeded:
+            raise
+        except Exception:
+            candidates = []
+
+        best_candidate, _ = self._pick(item["title"], item["artist"], candidates, item["duration_ms"])
+        with self.timings.stage("score"):
+            scores = score_candidates(item["title"], item["artist"], candidates, self.fields["artist_key"])
+        order = sorted(range(len(candidates)), key=lambda i: (candidates[i] is not best_candidate, -scores[i]))
+
+        seen = {w["track_id"] for w in ranked}
+        for i in order:
+            winner = self._winner(candidates[i], scores[i])
+            if winner["track_id"] not in seen:
+                seen.add(winner["track_id"])
+                ranked.append(winner)
+        return ranked
+
+    # Quota
+    def _reserve_search(self) -> bool:
+        """
+        Whether today's quota still covers one more search plus the insert
+        it should lead to, on top of the inserts already promised in this
+        window. Promises the insert if so.
+        """
+        if self.quota is None:
+            return True
+        insert = self.quota.cost("insert")
+        if self.quota.remaining() - self.reserved_units < self.quota.cost("search") + insert:
+            return False
+        self.reserved_units += insert
+        return True
+
+    def _writable(self, count: int) -> int:
+        """How many of count pending inserts today's quota still covers."""
+        if self.quota is None:
+            return count
+        return min(count, self.quota.remaining() // self.quota.cost("insert"))
+
+    def estimate(self, items: List[Dict[str, Any]]) -> Dict[str, int]:
+        return estimate_quota(items, self.checkpoint, self.quota, self.duplicates == "keep_first")
+
+    @staticmethod
+    def _deferred(item: Dict[str, Any]) -> Decision:
+        result = unmatched(item["title"], item["artist"])
+        result.deferred = True
+        return result, None
+
+    def _decide(self, item: Dict[str, Any], winner: Optional[Dict[str, Any]]) -> Decision:
+        """
+        Turn a winning candidate (fresh or cached) into a decision under this run's min_score.
+        """
+        if winner is None:
+            return unmatched(item["title"], item["artist"]), None
+        if winner["score"] < self.min_score:
+            return unmatched(item["title"], item["artist"], winner["score"]), None
+
+        result = TrackMatchResult(
+            source_title=item["title"],
+            source_channel=item["artist"],
+            matched_track_id=winner["track_id"],
+            matched_title=winner["title"],
+            matched_artist=winner["artist"],
+            score=winner["score"],
+            added=False
+        )
+        return result, winner["write_id"]
+
+    def _from_checkpoint(self, item: Dict[str, Any]) -> Optional[Decision]:
+        entry = self.checkpoint.get(item["key"])
+        if not entry:
+            return None
+
+        already_added = entry["added"]
+        if not already_added and not (entry["target_write_id"] and entry["score"] >= self.min_score):
+            return None
+
+        result = TrackMatchResult(
+            source_title=item["title"],
+            source_channel=item["artist"],
+            matched_track_id=entry["target_track_id"],
+            matched_title=entry["target_title"],
+            matched_artist=entry["target_artist"],
+            score=entry["score"],
+            added=already_added
+        )
+        return result, entry["target_write_id"]
+
+    # Pipeline
+    async def run(self, items: List[Dict[str, Any]]) -> AsyncIterator[TrackMatchResult]:
+        for offset in range(0, len(items), self.batch_size):
+            window = items[offset:offset + self.batch_size]
+            decisions: List[Optional[Decision]] = [self._from_checkpoint(item) for item in window]
+            self.resumed += sum(1 for d in decisions if d is not None)
+
+            # Only songs the checkpoint could not settle reach the provider, once each
+            to_search = [i for i, d in enumerate(decisions) if d is None]
+            songs = {}
+            for i in to_search:
+                if window[i]["song"] not in self.resolved:
+                    songs.setdefault(window[i]["song"], window[i])
+            winners = await map_bounded(self._resolve, list(songs.values()), self.concurrency)
+            self.reserved_units = 0
+            self.resolved.update((song, winner) for song, winner in zip(songs.keys(), winners)
+                                 if winner is not DEFERRED)
+            for i in to_search:
+                song = window[i]["song"]
+                if song in self.resolved:
+                    decisions[i] = self._decide(window[i], self.resolved[song])
+                else:
+                    decisions[i] = self._deferred(window[i])
+
+            pending = []
+            for index, (item, (result, write_id)) in enumerate(zip(window, decisions), offset):
+                if not write_id:
+                    continue
+                if self.duplicates == "keep_first" and not result.added and item["song"] in self.kept:
+                    result.duplicate_of = self.kept[item["song"]]
+                    self.duplicates_skipped += 1
+                    continue
+                self.kept.setdefault(item["song"], index)
+                if result.added:
+                    continue
+                if write_id in self.existing_ids:
+                    result.added = True
+                else:
+                    pending.append((index, item["key"], result, write_id))
+
+            # Matches the quota cannot insert today wait for a later run
+            writable = self._writable(len(pending))
+            for index, _, result, _ in pending[writable:]:
+                result.deferred = True
+                decisions[index - offset] = (result, None)
+                self.kept.pop(window[index - offset]["song"], None)
+            pending = pending[:writable]
+
+            flags: List[bool] = []
+            if pending:
+                with self.timings.stage("add"):
+                    flags = await write_in_batches(
+                        [write_id for *_, write_id in pending], self.add_batch, self.batch_size
+                    )
+            for entry, added_ok in zip(pending, flags):
+                entry[2].added = added_ok
+                if not added_ok:
+                    self.retry_queue.defer(entry, entry[3])
+            self.write_failures += flags.count(False)
+
+            self.deferred += sum(1 for result, _ in decisions if result.deferred)
+            if self.checkpoint_id is not None:
+                await asyncio.to_thread(
+                    checkpoint_store.record, self.checkpoint_id,
+                    [(item["key"], result, write_id) for item, (result, write_id) in zip(window, decisions)
+                     if not result.deferred]
+                )
+
+            for result, _ in decisions:
+                yield result
+
+    async def retry_failed_writes(self) -> AsyncIterator[Tuple[int, TrackMatchResult]]:
+        """
+        Retry the writes that failed during run() and yield (index, result)
+        for each of them with its final outcome. Recovered tracks land at the
+        end of the target playlist rather than in source order.
+        """
+        if not len(self.retry_queue):
+            return
+
+        with self.timings.stage("add_retry"):
+            outcomes = await self.retry_queue.drain()
+
+        for (_, _, result, _), added_ok in outcomes:
+            result.added = added_ok
+        self.write_failures = sum(1 for _, added_ok in outcomes if not added_ok)
+
+        if self.checkpoint_id is not None:
+            await asyncio.to_thread(
+                checkpoint_store.record, self.checkpoint_id,
+                [(key, result, write_id) for (_, key, result, write_id), _ in outcomes]
+            )
+
+        for (index, _, result, _), _ in outcomes:
+            yield index, result
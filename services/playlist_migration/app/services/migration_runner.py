@@ -0,0 +1,500 @@
+import asyncio
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Set
+
+from fastapi import HTTPException
+
+from app.config import settings
+from app.models.migration_models import (
+    SpotifyToYouTubeRequest,
+    YouTubeToSpotifyRequest,
+)
+from app.services.match_engine import resolve_concurrency
+from app.services.migration_pipeline import (
+    SPOTIFY_FIELDS,
+    YOUTUBE_FIELDS,
+    MigrationPipeline,
+    estimate_quota,
+    source_items,
+)
+from app.services.spotify_client import SpotifyClient
+from app.services.target_playlist import prepare_target
+from app.services.youtube_client import YouTubeClient
+from app.storage.checkpoint_store import checkpoint_store
+from app.utils.fast_json import dumps
+from app.utils.metrics import StageTimings
+from app.utils.quota import QuotaBudget
+
+# A migration is an async generator of progress events, consumed by the
+# JSON endpoints, background jobs and streaming responses alike:
+#
+#   {"type": "empty", "status": ..., "message": ...}       source has no tracks, or
+#                                                           (incremental) has not changed
+#   {"type": "deferred", "status": ..., "message": ...}    over a bulk job's quota budget;
+#                                                           nothing was created or written
+#   {"type": "start", "tracks": [...], "new_tracks": n, ...} target playlist is ready;
+#                                                           n tracks are not yet checkpointed;
+#                                                           quota-limited targets add the
+#                                                           run's "quota" estimate; "window"
+#                                                           is how many tracks are decided
+#                                                           (and written) together
+#   {"type": "track", "index": i, "result": TrackMatchResult}
+#   {"type": "summary", "summary": {...}}
+#
+# Tracks whose write failed are sent a second time, after the last window,
+# with the outcome of the deferred retry; the later event for an index wins.
+#
+# Errors fetching the source or creating the target raise HTTPException
+# before the first event.
+#
+# Store calls are blocking database round trips; they run in a worker
+# thread (asyncio.to_thread) so they never stall the event loop.
+MigrationEvent = Dict[str, Any]
+
+# ============================================
+# SHARED STEPS
+# ============================================
+
+async def _resume_target(user_id: str, source_provider: str, source_playlist_id: str,
+                         target_provider: str, resume: bool) -> Optional[str]:
+    """
+    Target playlist left behind by an unfinished earlier run of this source, if any.
+    """
+    if not resume:
+        return None
+    return await asyncio.to_thread(
+        checkpoint_store.find_unfinished_target, user_id, source_provider, source_playlist_id, target_provider
+    )
+
+
+async def _last_sync(user_id: str, source_provider: str, source_playlist_id: str,
+                     target_provider: str, target_playlist_id: Optional[str],
+                     incremental: bool) -> Optional[Dict[str, Any]]:
+    """
+    Checkpoint of the previous sync of this source, for incremental runs.
+    """
+    if not incremental:
+        return None
+    return await asyncio.to_thread(
+        checkpoint_store.find_last_sync, user_id, source_provider, source_playlist_id, target_provider,
+        target_playlist_id
+    )
+
+
+def _unchanged_event(last_sync: Optional[Dict[str, Any]],
+                     source_version: Optional[str]) -> Optional[MigrationEvent]:
+    """
+    The skip event when the source still has the version of the last completed sync.
+    """
+    if not last_sync or not source_version:
+        return None
+    if last_sync["status"] != "completed" or last_sync["source_version"] != source_version:
+        return None
+    return {
+        "type": "empty",
+        "status": "unchanged",
+        "message": "Source playlist has not changed since the last sync",
+        "target_playlist_id": last_sync["target_playlist_id"],
+    }
+
+
+async def _remove_deleted(pipeline: MigrationPipeline, items: List[Dict[str, Any]],
+                          remove: Callable[[List[str]], Awaitable[Any]]):
+    """
+    Remove from the target what was synced for source tracks that are gone.
+    Ids still backing a remaining source track are left in place.
+    """
+    current = {item["key"] for item in items}
+    gone = [key for key in pipeline.checkpoint if key not in current]
+    if not gone:
+        return
+
+    still_used = {
+        entry["target_write_id"] for key, entry in pipeline.checkpoint.items() if key in current
+    }
+    write_ids = sorted({
+        pipeline.checkpoint[key]["target_write_id"] for key in gone
+        if pipeline.checkpoint[key]["added"] and pipeline.checkpoint[key]["target_write_id"]
+    } - still_used)
+
+    if write_ids:
+        try:
+            await remove(write_ids)
+        except Exception as e:
+            # Keep the rows so the next incremental run retries the removal
+            print(f"Could not remove deleted tracks from target: {e}")
+            return
+
+    await asyncio.to_thread(checkpoint_store.forget, pipeline.checkpoint_id, gone)
+    for key in gone:
+        del pipeline.checkpoint[key]
+    pipeline.existing_ids.difference_update(write_ids)
+    pipeline.removed = len(write_ids)
+
+
+async def _prepare_resume(pipeline: MigrationPipeline, user_id: str, source_provider: str,
+                          source_playlist_id: str, target_provider: str, target_playlist_id: str,
+                          resume: bool, existing_ids: Set[str]):
+    checkpoint_id = await asyncio.to_thread(
+        checkpoint_store.open, user_id, source_provider, source_playlist_id, target_provider, target_playlist_id
+    )
+    entries = await asyncio.to_thread(checkpoint_store.load, checkpoint_id) if resume else {}
+    pipeline.resume_from(checkpoint_id, entries, existing_ids)
+
+
+async def _finish_checkpoint(pipeline: MigrationPipeline, source_version: Optional[str]):
+    # Runs with failed writes or deferred tracks stay resumable so a re-run picks up the same target
+    if pipeline.write_failures == 0 and pipeline.deferred == 0:
+        await asyncio.to_thread(checkpoint_store.complete, pipeline.checkpoint_id, source_version)
+
+
+def _over_budget_event() -> MigrationEvent:
+    return {"type": "deferred", "status": "over_budget", "message": "Deferred: over the job's quota budget"}
+
+
+def _start_event(pipeline: MigrationPipeline, source_playlist_id: str,
+                 source_playlist_name: Optional[str], target_playlist_id: str,
+                 created_playlist: bool, items: List[Dict[str, Any]]) -> MigrationEvent:
+    event = {
+        "type": "start",
+        "source_playlist_id": source_playlist_id,
+        "source_playlist_name": source_playlist_name,
+        "target_playlist_id": target_playlist_id,
+        "created_new_playlist": created_playlist,
+        "tracks": items,
+        "new_tracks": sum(1 for item in items if item["key"] not in pipeline.checkpoint),
+        "window": pipeline.batch_size,
+    }
+    if pipeline.quota is not None:
+        event["quota"] = pipeline.estimate(items)
+    return event
+
+
+async def _track_events(pipeline: MigrationPipeline, items: List[Dict[str, Any]]) -> AsyncIterator[MigrationEvent]:
+    total = 0
+    added = 0
+    async for result in pipeline.run(items):
+        added += int(result.added)
+        yield {"type": "track", "index": total, "result": result}
+        total += 1
+
+    async for index, result in pipeline.retry_failed_writes():
+        added += int(result.added)
+        yield {"type": "track", "index": index, "result": result}
+
+    summary = {
+        "total_tracks": total,
+        "added": added,
+        "failed": total - added - pipeline.duplicates_skipped - pipeline.deferred,
+        "deferred": pipeline.deferred,
+        "duplicates_skipped": pipeline.duplicates_skipped,
+        "removed": pipeline.removed,
+        "min_score": pipeline.min_score,
+        "resumed_from_checkpoint": pipeline.resumed,
+        "write_retries": pipeline.retry_queue.stats(),
+        "timings": pipeline.timings.breakdown()
+    }
+    if pipeline.quota is not None:
+        summary["quota"] = pipeline.quota.usage()
+    yield {"type": "summary", "summary": summary}
+
+# ============================================
+# YOUTUBE → SPOTIFY
+# ============================================
+
+async def iter_youtube_to_spotify(body: YouTubeToSpotifyRequest) -> AsyncIterator[MigrationEvent]:
+    """
+    Migrate YouTube playlist to Spotify
+    """
+
+    timings = StageTimings("spotify")
+
+    # 0. Incremental runs skip a source that has not changed since the last sync
+    last_sync = await _last_sync(body.user_id, "youtube", body.source_youtube_playlist_id, "spotify",
+                                 body.target_spotify_playlist_id, body.incremental)
+    source_version = None
+    if body.incremental:
+        source_version = await YouTubeClient.get_playlist_version(body.source_youtube_playlist_id)
+
+    unchanged = _unchanged_event(last_sync, source_version)
+    if unchanged:
+        yield unchanged
+        return
+
+    # 1. Get YouTube playlist videos
+    try:
+        with timings.stage("fetch_source", "youtube"):
+            videos = await YouTubeClient.get_playlist_videos(body.source_youtube_playlist_id)
+    except Exception as e:
+        raise HTTPException(status_code=502, detail=f"Error fetching YouTube playlist: {e}")
+
+    if not videos:
+        yield {"type": "empty", "status": "no_videos", "message": "YouTube playlist has no videos"}
+        return
+
+    items = source_items(videos, "youtube", id_key="videoId", track_id_key="videoId",
+                         artist_key="channel", duration_key="durationMs")
+
+    # 2. Create Spotify playlist if not provided (or resume an unfinished one);
+    #    never re-add what an existing target already holds
+    target = await prepare_target("spotify", body.user_id, body.target_spotify_playlist_id or (
+        last_sync["target_playlist_id"] if last_sync else None
+    ) or await _resume_target(
+        body.user_id, "youtube", body.source_youtube_playlist_id, "spotify", body.resume
+    ))
+
+    # 3. Search/score on Spotify, 4. add matches in source-ordered batches
+    async def search(query: str, limit: int) -> List[Dict[str, Any]]:
+        return await SpotifyClient.search_tracks(body.user_id, query, limit, use_cache=body.use_search_cache)
+
+    pipeline = MigrationPipeline(
+        search, SPOTIFY_FIELDS, target.add_batch, target.batch_size,
+        resolve_concurrency(body.max_concurrency), body.min_score, body.duplicates,
+        settings.SPOTIFY_SEARCH_LIMITS, timings, landed=target.landed
+    )
+    await _prepare_resume(pipeline, body.user_id, "youtube", body.source_youtube_playlist_id,
+                          "spotify", target.playlist_id, body.resume or body.incremental, target.existing_ids)
+
+    if body.incremental and body.remove_deleted:
+        await _remove_deleted(pipeline, items, target.remove)
+
+    yield _start_event(pipeline, body.source_youtube_playlist_id, None, target.playlist_id,
+                       target.created, items)
+
+    # 5. Per-track results and summary
+    async for event in _track_events(pipeline, items):
+        yield event
+    await _finish_checkpoint(pipeline, source_version)
+
+# ============================================
+# SPOTIFY → YOUTUBE
+# ============================================
+
+async def iter_spotify_to_youtube(body: SpotifyToYouTubeRequest,
+                                  budget: Optional[QuotaBudget] = None) -> AsyncIterator[MigrationEvent]:
+    """
+    Migrate Spotify playlist to YouTube
+
+    With a bulk job's budget, the run reserves its estimated cost before it
+    creates the target or writes to it, and stops with a "deferred" event
+    if the budget cannot cover it.
+    """
+
+    timings = StageTimings("youtube")
+
+    # 0. Incremental runs skip a source that has not changed since the last sync
+    last_sync = await _last_sync(body.user_id, "spotify", body.source_playlist_id, "youtube",
+                                 body.target_youtube_playlist_id, body.incremental)
+    source_version = None
+    playlist_info = None
+    if body.incremental:
+        playlist_info = await SpotifyClient.get_playlist_info(body.user_id, body.source_playlist_id)
+        source_version = playlist_info.get("snapshot_id")
+
+    unchanged = _unchanged_event(last_sync, source_version)
+    if unchanged:
+        yield unchanged
+        return
+
+    # 1. Get Spotify tracks
+    try:
+        with timings.stage("fetch_source", "spotify"):
+            if playlist_info is None:
+                playlist_info = await SpotifyClient.get_playlist_info(body.user_id, body.source_playlist_id)
+            tracks = await SpotifyClient.get_playlist_tracks(body.user_id, body.source_playlist_id)
+    except Exception as e:
+        raise HTTPException(status_code=502, detail=f"Error fetching Spotify playlist: {e}")
+
+    if not tracks:
+        yield {"type": "empty", "status": "no_tracks", "message": "Spotify playlist has no tracks"}
+        return
+
+    items = source_items(tracks, "spotify", id_key="uri", track_id_key="id",
+                         artist_key="artist", duration_key="duration_ms")
+
+    # Every YouTube call below is charged against today's quota; start from
+    # the connector's count so other callers' usage is included
+    await YouTubeClient.sync_quota()
+
+    # 2. Create YouTube playlist if not provided (or resume an unfinished one);
+    #    never re-add what an existing target already holds
+    target_playlist_id = body.target_youtube_playlist_id or (
+        last_sync["target_playlist_id"] if last_sync else None
+    ) or await _resume_target(
+        body.user_id, "spotify", body.source_playlist_id, "youtube", body.resume
+    )
+    if budget is not None and not target_playlist_id:
+        # A new playlist has nothing checkpointed yet; refusing here keeps
+        # an over-budget run from creating an empty playlist
+        estimate = estimate_quota(items, {}, YouTubeClient.quota, body.duplicates == "keep_first")
+        if not budget.reserve(estimate["estimated_units"] + YouTubeClient.quota.cost("create_playlist")):
+            yield _over_budget_event()
+            return
+    target = await prepare_target("youtube", body.user_id, target_playlist_id, playlist_info.get("name"))
+
+    # 3. Search/score on YouTube, 4. add matches in source-ordered batches
+    async def search(query: str, limit: int) -> List[Dict[str, Any]]:
+        return await YouTubeClient.search_videos(query, limit, use_cache=body.use_search_cache)
+
+    pipeline = MigrationPipeline(
+        search, YOUTUBE_FIELDS, target.add_batch, target.batch_size,
+        resolve_concurrency(body.max_concurrency), body.min_score, body.duplicates,
+        settings.YOUTUBE_SEARCH_LIMITS, timings, YouTubeClient.quota, target.landed
+    )
+    await _prepare_resume(pipeline, body.user_id, "spotify", body.source_playlist_id,
+                          "youtube", target.playlist_id, body.resume or body.incremental, target.existing_ids)
+
+    # An existing target is charged what its checkpoint leaves to do
+    if budget is not None and not target.created and not budget.reserve(
+        pipeline.estimate(items)["estimated_units"]
+    ):
+        yield _over_budget_event()
+        return
+
+    if body.incremental and body.remove_deleted:
+        await _remove_deleted(pipeline, items, target.remove)
+
+    yield _start_event(pipeline, body.source_playlist_id, playlist_info.get("name"), target.playlist_id,
+                       target.created, items)
+
+    # 5. Per-track results and summary
+    async for event in _track_events(pipeline, items):
+        yield event
+    await _finish_checkpoint(pipeline, source_version)
+
+
+async def estimate_spotify_to_youtube(body: SpotifyToYouTubeRequest) -> Dict[str, Any]:
+    """
+    YouTube quota a Spotify → YouTube migration would use, against what is
+    left today. Reads the Spotify playlist and the connector's quota count;
+    nothing is searched or written.
+    """
+    try:
+        tracks = await SpotifyClient.get_playlist_tracks(body.user_id, body.source_playlist_id)
+    except Exception as e:
+        raise HTTPException(status_code=502, detail=f"Error fetching Spotify playlist: {e}")
+
+    items = source_items(tracks, "spotify", id_key="uri", track_id_key="id",
+                         artist_key="artist", duration_key="duration_ms")
+    await YouTubeClient.sync_quota()
+
+    quota = YouTubeClient.quota
+    estimate = estimate_quota(items, {}, quota)
+    if not body.target_youtube_playlist_id:
+        estimate["estimated_units"] += quota.cost("create_playlist")
+
+    per_track = quota.cost("search") + quota.cost("insert")
+    return {
+        "source_playlist_id": body.source_playlist_id,
+        "total_tracks": len(items),
+        **estimate,
+        "fits": estimate["estimated_units"] <= estimate["remaining_units"],
+        # Worst case: every track needs its own search
+        "tracks_affordable_today": estimate["remaining_units"] // per_track,
+    }
+
+# ============================================
+# RESPONSES
+# ============================================
+
+async def collect_response(events: AsyncIterator[MigrationEvent], detail: str = "full") -> Dict[str, Any]:
+    """
+    Drain a migration and build the classic single-body response.
+    detail="summary" leaves out "matches"; "unmatched" keeps only tracks
+    that were not added (skipped duplicates aside), each with its "index"
+    in the source playlist.
+    """
+    response: Dict[str, Any] = {}
+    matches: List[Dict[str, Any]] = []
+    unmatched: Dict[int, Dict[str, Any]] = {}
+
+    async for event in events:
+        if event["type"] in ("empty", "deferred"):
+            response = {k: v for k, v in event.items() if k != "type"}
+            break
+
+        if event["type"] == "start":
+            response["status"] = "ok"
+            response["created_new_playlist"] = event["created_new_playlist"]
+            response["target_playlist_id"] = event["target_playlist_id"]
+            if event["source_playlist_name"] is not None:
+                response["source_playlist_name"] = event["source_playlist_name"]
+        elif event["type"] == "track":
+            index, result = event["index"], event["result"]
+            if detail == "full":
+                if index < len(matches):
+                    matches[index] = result.model_dump()
+                else:
+                    matches.append(result.model_dump())
+            elif detail == "unmatched":
+                # A retried write may turn an earlier failure into a success
+                if result.added or result.duplicate_of is not None:
+                    unmatched.pop(index, None)
+                else:
+                    unmatched[index] = {"index": index, **result.model_dump()}
+        elif event["type"] == "summary":
+            response["summary"] = event["summary"]
+
+    if detail == "full":
+        response["matches"] = matches
+    elif detail == "unmatched":
+        response["matches"] = [unmatched[index] for index in sorted(unmatched)]
+    return response
+
+
+async def prime(events: AsyncIterator[MigrationEvent]) -> AsyncIterator[MigrationEvent]:
+    """
+    Run a migration up to its first event so that source/target errors
+    surface as HTTPException before a streaming response has started.
+    """
+    first = await anext(events, None)
+
+    async def resumed() -> AsyncIterator[MigrationEvent]:
+        if first is not None:
+            yield first
+        async for event in events:
+            yield event
+
+    return resumed()
+
+
+async def iter_ndjson(events: AsyncIterator[MigrationEvent], detail: str = "full") -> AsyncIterator[bytes]:
+    """
+    Render a migration as NDJSON: one record per event, written as soon as
+    it is decided. Nothing but the current window is kept in memory.
+    detail filters track records as in collect_response.
+    """
+    start: Dict[str, Any] = {}
+    reported: Set[int] = set()
+
+    try:
+        async for event in events:
+            if event["type"] in ("empty", "deferred"):
+                record = dict(event)
+            elif event["type"] == "start":
+                start = {
+                    "status": "ok",
+                    "created_new_playlist": event["created_new_playlist"],
+                    "target_playlist_id": event["target_playlist_id"],
+                }
+                if event["source_playlist_name"] is not None:
+                    start["source_playlist_name"] = event["source_playlist_name"]
+                record = {"type": "start", **start, "total_tracks": len(event["tracks"])}
+            elif event["type"] == "track":
+                index, result = event["index"], event["result"]
+                if detail == "summary":
+                    continue
+                if detail == "unmatched":
+                    # Skip added tracks and skipped duplicates, unless an
+                    # earlier record reported them failed
+                    if (result.added or result.duplicate_of is not None) and index not in reported:
+                        continue
+                    reported.add(index)
+                record = {"type": "track", "index": index, **result.model_dump()}
+            else:
+                record = {"type": "summary", **start, "summary": event["summary"]}
+
+            yield dumps(record) + b"\n"
+
+    except Exception as e:
+        message = e.detail if isinstance(e, HTTPException) else str(e)
+        yield dumps({"type": "error", "detail": message}) + b"\n"
@@ -0,0 +1,152 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from app.config import settings
+from app.utils.http_pool import WriteRejected
+from app.utils.quota import QuotaExceeded
+
+# Writes one batch of ids to the target playlist.
+# Returns one added-flag per id, or raises if the whole call failed.
+BatchWriter = Callable[[List[str]], Awaitable[List[bool]]]
+
+# Re-reads the target: for each id whose write looked failed, whether it
+# landed after all. Each copy found is claimed by one id only.
+LandedCheck = Callable[[List[str]], Awaitable[List[bool]]]
+
+
+def chunked(items: List[str], size: int) -> List[List[str]]:
+    size = max(1, size)
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+async def write_batch(ids: List[str], writer: BatchWriter) -> List[bool]:
+    """
+    Write a single batch. If the provider rejects it outright, split it in
+    half and retry each half so that one bad id does not sink its whole
+    batch. Any other failure (a timeout, a 5xx) may have been applied, so
+    the batch is reported failed without being sent again; RetryQueue
+    checks the target before replaying it.
+    """
+    if not ids:
+        return []
+
+    try:
+        return await writer(ids)
+    except (WriteRejected, QuotaExceeded):
+        if len(ids) == 1:
+            return [False]
+    except Exception:
+        return [False] * len(ids)
+
+    mid = len(ids) // 2
+    return await write_batch(ids[:mid], writer) + await write_batch(ids[mid:], writer)
+
+
+async def write_in_batches(ids: List[str], writer: BatchWriter, batch_size: int) -> List[bool]:
+    """
+    Flush ids to the target playlist in provider-sized batches, in order.
+    Returns an added-flag for every id, aligned with the input list.
+    """
+    flags: List[bool] = []
+    for batch in chunked(ids, batch_size):
+        flags.extend(await write_batch(batch, writer))
+    return flags
+
+
+class RetryQueue:
+    """
+    Writes that failed during a migration, set aside and retried together
+    once its last window is done, so a transient connector error does not
+    become a permanent miss. Each round waits backoff * 2**round seconds,
+    then rewrites everything still failing in provider-sized batches; after
+    `attempts` rounds the rest stay failed.
+
+    Entries carry an opaque token (whatever the caller needs to map the
+    outcome back) next to the id to write.
+
+    A failed write may have reached the provider anyway. With a landed
+    check, every round first re-reads the target and drops the entries
+    that are already there, so they are never written twice; a round whose
+    re-read fails sends nothing.
+    """
+
+    def __init__(self, writer: BatchWriter, batch_size: int,
+                 attempts: int = settings.ADD_RETRY_ATTEMPTS,
+                 backoff: float = settings.ADD_RETRY_BACKOFF_SECONDS,
+                 landed: Optional[LandedCheck] = None):
+        self.writer = writer
+        self.batch_size = batch_size
+        self.attempts = max(0, attempts)
+        self.backoff = backoff
+        self.landed = landed
+        self.entries: List[Tuple[Any, str]] = []
+        self.deferred = 0
+        self.rounds = 0
+        self.recovered = 0
+        self.already_landed = 0
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def defer(self, token: Any, write_id: str):
+        self.entries.append((token, write_id))
+        self.deferred += 1
+
+    async def drain(self) -> List[Tuple[Any, bool]]:
+        """
+        Retry every deferred write. Returns (token, added) for each entry,
+        in the order they were deferred, and empties the queue.
+        """
+        outcome: Dict[int, bool] = {}
+        remaining = list(range(len(self.entries)))
+
+        for attempt in range(self.attempts):
+            if not remaining:
+                break
+            await asyncio.sleep(self.backoff * (2 ** attempt))
+            self.rounds += 1
+
+            missing = await self._missing(remaining, outcome)
+            if missing is None:
+                continue
+            remaining = missing
+            if not remaining:
+                break
+
+            flags = await write_in_batches([self.entries[i][1] for i in remaining], self.writer, self.batch_size)
+            for i, added in zip(remaining, flags):
+                outcome[i] = added
+            remaining = [i for i in remaining if not outcome[i]]
+
+        # The last round's failures may have landed too
+        if remaining:
+            await self._missing(remaining, outcome)
+
+        drained = [(token, outcome.get(i, False)) for i, (token, _) in enumerate(self.entries)]
+        self.recovered += sum(1 for _, added in drained if added)
+        self.entries = []
+        return drained
+
+    async def _missing(self, remaining: List[int], outcome: Dict[int, bool]) -> Optional[List[int]]:
+        """
+        Mark the entries the target already holds as added and return the
+        rest, or None if the target could not be read.
+        """
+        if self.landed is None:
+            return remaining
+
+        try:
+            flags = await self.landed([self.entries[i][1] for i in remaining])
+        except Exception as e:
+            print(f"Could not re-read the target before retrying writes: {e}")
+            return None
+
+        for i, landed in zip(remaining, flags):
+            if landed:
+                outcome[i] = True
+                self.already_landed += 1
+        return [i for i in remaining if not outcome.get(i)]
+
+    def stats(self) -> Dict[str, int]:
+        return {"deferred": self.deferred, "recovered": self.recovered,
+                "already_landed": self.already_landed, "rounds": self.rounds}
@@ -1,18 +1,43 @@
-import requests
 from typing import List, Dict, Any
 from app.config import settings
+from app.utils.http_pool import WriteRejected, http_pool, rejects_write
+from app.utils.match_scoring import normalize_text
+from app.utils.rate_limiter import RateLimiter
+from app.utils.ttl_cache import TTLCache
 
 class SpotifyClient:
     
+    # Normalized candidate lists per query, shared across migrations
+    search_cache = TTLCache(settings.SEARCH_CACHE_SIZE, settings.SEARCH_CACHE_TTL_SECONDS)
+
+    # One call budget for every migration talking to the connector
+    rate_limit = RateLimiter(settings.SPOTIFY_CONNECTOR_CALLS_PER_SECOND, settings.CONNECTOR_RATE_BURST)
+
+    @staticmethod
+    def _external_fields(track: Dict[str, Any]) -> Dict[str, Any]:
+        """ISRC, duration and album of a Spotify track object, for exact matching"""
+        return {
+            "isrc": (track.get("external_ids") or {}).get("isrc"),
+            "duration_ms": track.get("duration_ms"),
+            "album": (track.get("album") or {}).get("name")
+        }
+
     @staticmethod
-    def search_tracks(user_id: str, query: str) -> List[Dict[str, Any]]:
-        """Search Spotify for tracks"""
+    async def search_tracks(user_id: str, query: str, limit: int = 10, use_cache: bool = True) -> List[Dict[str, Any]]:
+        """Search Spotify for up to limit tracks (use_cache=False always asks the connector)"""
+        cache_key = (normalize_text(query), limit)
+        if use_cache:
+            cached = SpotifyClient.search_cache.get(cache_key)
+            if cached is not None:
+                return list(cached)
+
         url = f"{settings.SPOTIFY_CONNECTOR_URL}/music/search"
         headers = {"X-User-Id": user_id}
-        params = {"q": query}
+        params = {"q": query, "limit": limit}
         
         try:
-            response = requests.get(url, headers=headers, params=params, timeout=30)
+            await SpotifyClient.rate_limit.acquire()
+            response = await http_pool.get(url, headers=headers, params=params)
             response.raise_for_status()
             tracks = response.json()
             
@@ -33,18 +58,20 @@ class SpotifyClient:
                     "id": track.get("id", ""),
                     "title": track.get("name", ""),
                     "artist": artist_name,
-                    "uri": track.get("uri", "")
+                    "uri": track.get("uri", ""),
+                    **SpotifyClient._external_fields(track)
                 })
             
             print(f"Spotify search for '{query}' returned {len(results)} results")
-            return results
+            SpotifyClient.search_cache.set(cache_key, results)
+            return list(results)
             
         except Exception as e:
             print(f"Error searching Spotify for '{query}': {e}")
             return []
     
     @staticmethod
-    def create_playlist(user_id: str, name: str, description: str = "", public: bool = False) -> Dict[str, Any]:
+    async def create_playlist(user_id: str, name: str, description: str = "", public: bool = False) -> Dict[str, Any]:
         """Create a new Spotify playlist"""
         url = f"{settings.SPOTIFY_CONNECTOR_URL}/music/playlists"
         headers = {"X-User-Id": user_id}
@@ -55,7 +82,7 @@ class SpotifyClient:
         }
         
         try:
-            response = requests.post(url, headers=headers, json=payload, timeout=30)
+            response = await http_pool.post(url, headers=headers, json=payload)
             response.raise_for_status()
             return response.json()
         except Exception as e:
@@ -63,51 +90,117 @@ class SpotifyClient:
             raise Exception(f"Failed to create Spotify playlist: {str(e)}")
     
     @staticmethod
-    def add_tracks_to_playlist(user_id: str, playlist_id: str, uris: List[str]):
+    async def add_tracks_to_playlist(user_id: str, playlist_id: str, uris: List[str]):
         """Add tracks to Spotify playlist"""
         url = f"{settings.SPOTIFY_CONNECTOR_URL}/music/playlist/{playlist_id}/add"
         headers = {"X-User-Id": user_id}
         payload = {"uris": uris}
         
         try:
-            response = requests.post(url, headers=headers, json=payload, timeout=30)
+            await SpotifyClient.rate_limit.acquire()
+            response = await http_pool.post(url, headers=headers, json=payload)
+            if rejects_write(response.status_code):
+                raise WriteRejected(f"{response.status_code}: {response.text}")
             response.raise_for_status()
+            data = response.json()
+
+            # The connector passes Spotify's error body through with a 200
+            if isinstance(data, dict) and data.get("error"):
+                error = data["error"]
+                status = error.get("status") if isinstance(error, dict) else None
+                if isinstance(status, int) and rejects_write(status):
+                    raise WriteRejected(f"{status}: {error.get('message', '')}")
+                raise Exception(error)
+
             print(f"Successfully added {len(uris)} track(s) to playlist {playlist_id}")
-            return response.json()
+            return data
+        except WriteRejected as e:
+            print(f"Spotify rejected tracks for playlist {playlist_id}: {e}")
+            raise
         except Exception as e:
             print(f"Error adding tracks to Spotify playlist {playlist_id}: {e}")
             raise Exception(f"Failed to add tracks: {str(e)}")
     
     @staticmethod
-    def get_playlist_info(user_id: str, playlist_id: str) -> Dict[str, Any]:
-        """Get Spotify playlist info"""
+    async def remove_tracks_from_playlist(user_id: str, playlist_id: str, uris: List[str]):
+        """Remove tracks (every occurrence of each uri) from Spotify playlist"""
+        url = f"{settings.SPOTIFY_CONNECTOR_URL}/music/playlist/{playlist_id}/remove"
+        headers = {"X-User-Id": user_id}
+        payload = {"uris": uris}
+
         try:
-            url = f"{settings.SPOTIFY_CONNECTOR_URL}/music/playlists"
-            headers = {"X-User-Id": user_id}
-            response = requests.get(url, headers=headers, timeout=30)
+            await SpotifyClient.rate_limit.acquire()
+            response = await http_pool.post(url, headers=headers, json=payload)
             response.raise_for_status()
             data = response.json()
-            items = data.get("items", [])
-            
-            for playlist in items:
-                if playlist.get("id") == playlist_id:
-                    return {
-                        "name": playlist.get("name", "Migrated Playlist"),
-                        "description": playlist.get("description", "")
-                    }
+            if isinstance(data, dict) and data.get("error"):
+                raise Exception(data["error"])
+            return data
+        except Exception as e:
+            print(f"Error removing tracks from Spotify playlist {playlist_id}: {e}")
+            raise Exception(f"Failed to remove tracks: {str(e)}")
+
+    @staticmethod
+    async def get_playlists(user_id: str) -> List[Dict[str, Any]]:
+        """All of the user's Spotify playlists as {"id", "name", "track_count"}"""
+        url = f"{settings.SPOTIFY_CONNECTOR_URL}/music/playlists"
+        headers = {"X-User-Id": user_id}
+        params = {"limit": 50, "offset": 0}
+        playlists = []
+
+        try:
+            while True:
+                response = await http_pool.get(url, headers=headers, params=params)
+                response.raise_for_status()
+                data = response.json()
+
+                for playlist in data.get("items", []):
+                    playlists.append({
+                        "id": playlist.get("id", ""),
+                        "name": playlist.get("name", ""),
+                        "track_count": (playlist.get("tracks") or {}).get("total", 0)
+                    })
+
+                if not data.get("next"):
+                    break
+                params["offset"] += params["limit"]
+
+            return playlists
+        except Exception as e:
+            print(f"Error listing Spotify playlists: {e}")
+            raise Exception(f"Failed to list Spotify playlists: {str(e)}")
+
+    @staticmethod
+    async def get_playlist_info(user_id: str, playlist_id: str) -> Dict[str, Any]:
+        """
+        Spotify playlist metadata: name, description, snapshot_id and track_count
+        """
+        url = f"{settings.SPOTIFY_CONNECTOR_URL}/music/playlist/{playlist_id}"
+        headers = {"X-User-Id": user_id}
+
+        try:
+            response = await http_pool.get(url, headers=headers)
+            response.raise_for_status()
+            playlist = response.json()
+            return {
+                "name": playlist.get("name") or "Migrated Playlist",
+                "description": playlist.get("description") or "",
+                "snapshot_id": playlist.get("snapshot_id"),
+                "track_count": (playlist.get("tracks") or {}).get("total", 0),
+            }
         except Exception as e:
             print(f"Error fetching playlist info: {e}")
-        
+
         return {"name": "Migrated Playlist", "description": ""}
-    
+
     @staticmethod
-    def get_playlist_tracks(user_id: str, playlist_id: str) -> List[Dict[str, Any]]:
+    async def get_playlist_tracks(user_id: str, playlist_id: str) -> List[Dict[str, Any]]:
         """Get tracks from Spotify playlist"""
         url = f"{settings.SPOTIFY_CONNECTOR_URL}/music/playlist/{playlist_id}/tracks"
         headers = {"X-User-Id": user_id}
         
         try:
-            response = requests.get(url, headers=headers, timeout=30)
+            response = await http_pool.get(url, headers=headers)
             response.raise_for_status()
             data = response.json()
             items = data.get("items", [])
@@ -121,9 +214,11 @@ class SpotifyClient:
                 artist_name = artists[0].get("name", "") if artists else ""
                 
                 tracks.append({
+                    "id": track.get("id", ""),
                     "title": track.get("name", ""),
                     "artist": artist_name,
-                    "uri": track.get("uri", "")
+                    "uri": track.get("uri", ""),
+                    **SpotifyClient._external_fields(track)
                 })
             
             return tracks
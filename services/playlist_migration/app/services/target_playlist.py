@@ -0,0 +1,130 @@
+from collections import Counter
+from typing import List, Optional, Set
+
+from fastapi import HTTPException
+
+from app.config import settings
+from app.services.spotify_client import SpotifyClient
+from app.services.youtube_client import YouTubeClient
+
+# The playlist a migration or a plan commit writes to. Both paths create
+# (or reuse) it, read what it already holds and write batches to it
+# through here, so they cannot drift apart.
+
+
+class TargetPlaylist:
+    """
+    A target playlist on Spotify or YouTube: its id, whether this run
+    created it, the write ids it already held, and batch writes to it.
+
+    counts is how many copies of each id the playlist is known to hold:
+    what it held when read plus every confirmed add, less removals. Any
+    copies beyond that were added by writes that looked failed (e.g. timed
+    out after the provider applied them); landed() claims those.
+    """
+
+    def __init__(self, provider: str, user_id: str, playlist_id: str, created: bool,
+                 existing_ids: Set[str]):
+        self.provider = provider
+        self.user_id = user_id
+        self.playlist_id = playlist_id
+        self.created = created
+        self.existing_ids = existing_ids
+        self.counts: Counter = Counter()
+        self.batch_size = (
+            settings.SPOTIFY_ADD_BATCH_SIZE if provider == "spotify" else settings.YOUTUBE_ADD_BATCH_SIZE
+        )
+
+    async def read_ids(self) -> List[str]:
+        """Write ids currently in the playlist, one per entry, in playlist order."""
+        if self.provider == "spotify":
+            tracks = await SpotifyClient.get_playlist_tracks(self.user_id, self.playlist_id)
+            return [t["uri"] for t in tracks if t.get("uri")]
+        videos = await YouTubeClient.get_playlist_videos(self.playlist_id)
+        return [v["videoId"] for v in videos if v.get("videoId")]
+
+    async def add_batch(self, ids: List[str]) -> List[bool]:
+        """One write call; an added-flag per id. Raises if the whole call failed."""
+        if self.provider == "spotify":
+            await SpotifyClient.add_tracks_to_playlist(
+                user_id=self.user_id, playlist_id=self.playlist_id, uris=ids
+            )
+            flags = [True] * len(ids)
+        else:
+            added = await YouTubeClient.add_videos_to_playlist(self.playlist_id, ids)
+            if len(added) != len(ids):
+                raise Exception("YouTube connector returned a partial batch result")
+            flags = [item.get("status") == "added" for item in added]
+
+        self.counts.update(i for i, ok in zip(ids, flags) if ok)
+        return flags
+
+    async def landed(self, ids: List[str]) -> List[bool]:
+        """
+        Re-read the playlist and report, per id, whether an unaccounted copy
+        of it is there. Claimed copies count as added from then on.
+        """
+        surplus = Counter(await self.read_ids()) - self.counts
+        flags = []
+        for write_id in ids:
+            found = surplus[write_id] > 0
+            if found:
+                surplus[write_id] -= 1
+                self.counts[write_id] += 1
+            flags.append(found)
+        return flags
+
+    async def remove(self, ids: List[str]):
+        if self.provider == "spotify":
+            # Spotify drops every copy of a uri
+            await SpotifyClient.remove_tracks_from_playlist(self.user_id, self.playlist_id, ids)
+            for write_id in ids:
+                self.counts.pop(write_id, None)
+        else:
+            await YouTubeClient.remove_videos_from_playlist(self.playlist_id, ids)
+            self.counts.subtract(ids)
+
+
+async def _create(provider: str, user_id: str, name: Optional[str]) -> str:
+    if provider == "spotify":
+        try:
+            playlist = await SpotifyClient.create_playlist(
+                user_id=user_id,
+                name="Migrated from YouTube",
+                description="Migrated from YouTube playlist",
+                public=False
+            )
+            return playlist["id"]
+        except Exception as e:
+            raise HTTPException(status_code=502, detail=f"Error creating Spotify playlist: {e}")
+
+    try:
+        playlist = await YouTubeClient.create_playlist(
+            title=name or "Migrated Playlist",
+            description="Migrated from Spotify",
+            privacy="private"
+        )
+        return playlist["playlistId"]
+    except Exception as e:
+        raise HTTPException(status_code=502, detail=f"Error creating YouTube playlist: {e}")
+
+
+async def prepare_target(provider: str, user_id: str, playlist_id: Optional[str],
+                         name: Optional[str] = None) -> TargetPlaylist:
+    """
+    Create the target playlist if playlist_id is None (YouTube playlists are
+    titled after name), otherwise read which ids it already holds so they
+    are never added again.
+    """
+    if not playlist_id:
+        return TargetPlaylist(provider, user_id, await _create(provider, user_id, name), True, set())
+
+    target = TargetPlaylist(provider, user_id, playlist_id, False, set())
+    try:
+        ids = await target.read_ids()
+        target.existing_ids = set(ids)
+        target.counts = Counter(ids)
+    except Exception as e:
+        label = "Spotify" if provider == "spotify" else "YouTube"
+        print(f"Could not read target {label} playlist {playlist_id}: {e}")
+    return target
@@ -1,45 +1,116 @@
-import requests
-from typing import List, Dict, Any
+import math
+from typing import List, Dict, Any, Optional
 from app.config import settings
+from app.utils.http_pool import WriteRejected, http_pool, rejects_write
+from app.utils.match_scoring import normalize_text
+from app.utils.quota import YOUTUBE_UNIT_COSTS, QuotaAccountant, QuotaExceeded
+from app.utils.rate_limiter import RateLimiter
+from app.utils.ttl_cache import TTLCache
 
 class YouTubeClient:
     
+    # One call budget for every migration talking to the connector
+    rate_limit = RateLimiter(settings.YOUTUBE_CONNECTOR_CALLS_PER_SECOND, settings.CONNECTOR_RATE_BURST)
+
+    # Daily YouTube Data API units; calls that would overrun it raise QuotaExceeded
+    quota = QuotaAccountant(settings.YOUTUBE_DAILY_QUOTA_UNITS, YOUTUBE_UNIT_COSTS)
+
     @staticmethod
-    def get_playlist_videos(playlist_id: str) -> List[Dict[str, Any]]:
+    def _raise_if_quota_exceeded(response):
+        """
+        The connector answers 403 quotaExceeded once Google refuses calls
+        for today; that is the quota running out, not an empty result.
+        """
+        if response.status_code != 403:
+            return
+        try:
+            data = response.json()
+        except ValueError:
+            return
+        if isinstance(data, dict) and data.get("error") == "quotaExceeded":
+            YouTubeClient.quota.exhaust()
+            raise QuotaExceeded(f"youtube quota exhausted: {data.get('detail', '')}")
+
+    @staticmethod
+    async def get_playlist_videos(playlist_id: str) -> List[Dict[str, Any]]:
         """Get videos from YouTube playlist"""
         url = f"{settings.YOUTUBE_CONNECTOR_URL}/youtube/playlist/{playlist_id}/items"
         
         try:
-            response = requests.get(url, timeout=30)
+            response = await http_pool.get(url)
             response.raise_for_status()
             videos = response.json()
             
             if not isinstance(videos, list):
                 print(f"Unexpected YouTube response: {videos}")
                 return []
-            
+
+            # The connector lists 50 items per page and looks up their durations
+            YouTubeClient.quota.record("list", 2 * max(1, math.ceil(len(videos) / 50)))
             return videos
         except Exception as e:
             print(f"Error fetching YouTube playlist: {e}")
             raise Exception(f"Failed to fetch YouTube playlist: {str(e)}")
     
     @staticmethod
-    def search_videos(query: str) -> List[Dict[str, Any]]:
-        """Search YouTube for videos"""
+    async def get_playlists() -> List[Dict[str, Any]]:
+        """All of the user's YouTube playlists as {"id", "name", "track_count"}"""
+        url = f"{settings.YOUTUBE_CONNECTOR_URL}/youtube/playlists"
+
+        try:
+            response = await http_pool.get(url, timeout=http_pool.timeout(bulk=True))
+            response.raise_for_status()
+            data = response.json()
+            if isinstance(data, dict) and data.get("error"):
+                raise Exception(data["error"])
+            YouTubeClient.quota.record("list", max(1, math.ceil(len(data) / 50)))
+
+            return [
+                {"id": p.get("id", ""), "name": p.get("title", ""), "track_count": p.get("videoCount", 0)}
+                for p in data
+            ]
+        except Exception as e:
+            print(f"Error listing YouTube playlists: {e}")
+            raise Exception(f"Failed to list YouTube playlists: {str(e)}")
+
+    # Normalized candidate lists per query; every miss costs 101 quota units
+    search_cache = TTLCache(settings.SEARCH_CACHE_SIZE, settings.SEARCH_CACHE_TTL_SECONDS)
+
+    @staticmethod
+    async def search_videos(query: str, limit: int = 25, use_cache: bool = True) -> List[Dict[str, Any]]:
+        """Search YouTube for up to limit videos (use_cache=False always asks the connector)"""
+        cache_key = (normalize_text(query), limit)
+        if use_cache:
+            cached = YouTubeClient.search_cache.get(cache_key)
+            if cached is not None:
+                return list(cached)
+
         url = f"{settings.YOUTUBE_CONNECTOR_URL}/youtube/search"
-        params = {"q": query}
-        
+        params = {"q": query, "limit": limit}
+        # Outside the try: running out of quota must not look like "no results"
+        YouTubeClient.quota.spend("search")
+
         try:
-            response = requests.get(url, params=params, timeout=30)
+            await YouTubeClient.rate_limit.acquire()
+            response = await http_pool.get(url, params=params)
+            YouTubeClient._raise_if_quota_exceeded(response)
             response.raise_for_status()
             data = response.json()
-            return data.get("results", [])
+            results = data.get("results", [])
+            if not isinstance(results, list):
+                print(f"Unexpected YouTube search response: {data}")
+                return []
+
+            YouTubeClient.search_cache.set(cache_key, results)
+            return list(results)
+        except QuotaExceeded:
+            raise
         except Exception as e:
             print(f"Error searching YouTube: {e}")
             return []
     
     @staticmethod
-    def create_playlist(title: str, description: str = "", privacy: str = "private") -> Dict[str, Any]:
+    async def create_playlist(title: str, description: str = "", privacy: str = "private") -> Dict[str, Any]:
         """Create YouTube playlist"""
         url = f"{settings.YOUTUBE_CONNECTOR_URL}/youtube/playlists/create"
         payload = {
@@ -49,7 +120,8 @@ class YouTubeClient:
         }
         
         try:
-            response = requests.post(url, json=payload, timeout=30)
+            YouTubeClient.quota.spend("create_playlist")
+            response = await http_pool.post(url, json=payload)
             response.raise_for_status()
             return response.json()
         except Exception as e:
@@ -57,15 +129,111 @@ class YouTubeClient:
             raise Exception(f"Failed to create YouTube playlist: {str(e)}")
     
     @staticmethod
-    def add_to_playlist(playlist_id: str, video_id: str):
+    async def add_to_playlist(playlist_id: str, video_id: str):
         """Add video to YouTube playlist"""
         url = f"{settings.YOUTUBE_CONNECTOR_URL}/youtube/playlist/{playlist_id}/add"
         params = {"videoId": video_id}
         
         try:
-            response = requests.post(url, params=params, timeout=30)
+            YouTubeClient.quota.spend("insert")
+            await YouTubeClient.rate_limit.acquire()
+            response = await http_pool.post(url, params=params)
             response.raise_for_status()
             return response.json()
         except Exception as e:
             print(f"Error adding video: {e}")
             raise Exception(f"Failed to add video: {str(e)}")
+
+    @staticmethod
+    async def add_videos_to_playlist(playlist_id: str, video_ids: List[str]) -> List[Dict[str, Any]]:
+        """
+        Add several videos to YouTube playlist in one connector call.
+        Inserts are charged once the outcome is known: only those the
+        connector attempted, none if it refused the call, all of them if
+        the call failed in a way that may have run them.
+        """
+        url = f"{settings.YOUTUBE_CONNECTOR_URL}/youtube/playlist/{playlist_id}/add-batch"
+        payload = {"videoIds": video_ids}
+        attempted = len(video_ids)
+
+        try:
+            YouTubeClient.quota.check("insert", len(video_ids))
+            await YouTubeClient.rate_limit.acquire()
+            response = await http_pool.post(url, json=payload, timeout=http_pool.timeout(bulk=True))
+            YouTubeClient._raise_if_quota_exceeded(response)
+            if rejects_write(response.status_code):
+                raise WriteRejected(f"{response.status_code}: {response.text}")
+            response.raise_for_status()
+            data = response.json()
+            if data.get("error"):
+                # Not logged in: the connector refused before inserting anything
+                raise WriteRejected(data["error"])
+            results = data.get("results", [])
+            # Videos past the connector's own quota check were never inserted
+            attempted = sum(1 for item in results if item.get("status") != "quota_exceeded")
+            return results
+        except (WriteRejected, QuotaExceeded) as e:
+            attempted = 0
+            print(f"YouTube rejected videos for playlist {playlist_id}: {e}")
+            raise
+        except Exception as e:
+            print(f"Error adding videos: {e}")
+            raise Exception(f"Failed to add videos: {str(e)}")
+        finally:
+            YouTubeClient.quota.record("insert", attempted)
+
+    @staticmethod
+    async def remove_videos_from_playlist(playlist_id: str, video_ids: List[str]) -> List[Dict[str, Any]]:
+        """Remove one occurrence of each video from YouTube playlist in one connector call"""
+        url = f"{settings.YOUTUBE_CONNECTOR_URL}/youtube/playlist/{playlist_id}/remove-batch"
+        payload = {"videoIds": video_ids}
+
+        try:
+            YouTubeClient.quota.spend("delete", len(video_ids))
+            await YouTubeClient.rate_limit.acquire()
+            response = await http_pool.post(url, json=payload, timeout=http_pool.timeout(bulk=True))
+            response.raise_for_status()
+            data = response.json()
+            if data.get("error"):
+                raise Exception(data["error"])
+            return data.get("results", [])
+        except Exception as e:
+            print(f"Error removing videos: {e}")
+            raise Exception(f"Failed to remove videos: {str(e)}")
+
+    @staticmethod
+    async def get_playlist_version(playlist_id: str) -> Optional[str]:
+        """ETag + item count of a YouTube playlist, or None if unavailable"""
+        url = f"{settings.YOUTUBE_CONNECTOR_URL}/youtube/playlist/{playlist_id}/version"
+
+        try:
+            YouTubeClient.quota.record("list")
+            response = await http_pool.get(url)
+            response.raise_for_status()
+            data = response.json()
+            if data.get("error") or not data.get("etag"):
+                return None
+            return f"{data['etag']}:{data.get('itemCount', 0)}"
+        except Exception as e:
+            print(f"Error fetching YouTube playlist version: {e}")
+            return None
+
+    @staticmethod
+    async def sync_quota() -> Dict[str, Any]:
+        """
+        Fold the connector's count of today's quota use (every caller, not
+        just this service) into the local accountant. Keeps the local count
+        if the connector cannot be reached.
+        """
+        url = f"{settings.YOUTUBE_CONNECTOR_URL}/youtube/quota"
+
+        try:
+            response = await http_pool.get(url)
+            response.raise_for_status()
+            data = response.json()
+            if data.get("day") == YouTubeClient.quota.today().isoformat():
+                YouTubeClient.quota.sync(int(data.get("used", 0)))
+        except Exception as e:
+            print(f"Error fetching YouTube quota usage: {e}")
+
+        return YouTubeClient.quota.usage()
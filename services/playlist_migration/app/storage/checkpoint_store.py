@@ -0,0 +1,165 @@
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.models.migration_models import TrackMatchResult
+from app.storage.database import Database, db, now
+
+
+# -----------------------
+# Checkpoint Store
+# -----------------------
+# One checkpoint per (user, source playlist, target playlist). It records,
+# per source track, what the track matched and whether it reached the
+# target, so a re-run can skip finished tracks without provider calls.
+#
+# Source tracks are keyed by id plus occurrence ("<id>#<n>") so duplicate
+# entries in a playlist keep separate checkpoints.
+#
+# A completed checkpoint doubles as the last synced state for incremental
+# runs: source_version (Spotify snapshot_id / YouTube ETag) tells whether
+# the source changed since, and the track rows are what was synced.
+
+SQLITE_SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS migrations.checkpoints (
+        id                      INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id                 TEXT NOT NULL,
+        source_provider         VARCHAR(50) NOT NULL,
+        source_playlist_id      VARCHAR(255) NOT NULL,
+        target_provider         VARCHAR(50) NOT NULL,
+        target_playlist_id      VARCHAR(255) NOT NULL,
+        status                  VARCHAR(20) NOT NULL DEFAULT 'running',
+        source_version          VARCHAR(255),
+        updated_at              TEXT NOT NULL,
+        UNIQUE (user_id, source_provider, source_playlist_id, target_provider, target_playlist_id)
+    )""",
+    """CREATE TABLE IF NOT EXISTS migrations.checkpoint_tracks (
+        checkpoint_id           INTEGER NOT NULL REFERENCES checkpoints(id) ON DELETE CASCADE,
+        source_track_key        VARCHAR(300) NOT NULL,
+        target_track_id         VARCHAR(255),
+        target_write_id         VARCHAR(255),
+        target_title            TEXT,
+        target_artist           TEXT,
+        match_score             NUMERIC(5,2),
+        added                   BOOLEAN NOT NULL DEFAULT FALSE,
+        duplicate               BOOLEAN NOT NULL DEFAULT FALSE,
+        updated_at              TEXT NOT NULL,
+        PRIMARY KEY (checkpoint_id, source_track_key)
+    )""",
+]
+
+
+class CheckpointStore:
+    def __init__(self, database: Database):
+        self.db = database
+        self.db.create_tables(SQLITE_SCHEMA)
+
+    def open(self, user_id: str, source_provider: str, source_playlist_id: str,
+             target_provider: str, target_playlist_id: str) -> int:
+        """
+        Get or create the checkpoint for this migration and mark it running.
+        """
+        rows = self.db.execute(
+            "INSERT INTO migrations.checkpoints "
+            "(user_id, source_provider, source_playlist_id, target_provider, target_playlist_id, status, updated_at) "
+            "VALUES (?, ?, ?, ?, ?, 'running', ?) "
+            "ON CONFLICT (user_id, source_provider, source_playlist_id, target_provider, target_playlist_id) "
+            "DO UPDATE SET status = 'running', updated_at = excluded.updated_at "
+            "RETURNING id",
+            (user_id, source_provider, source_playlist_id, target_provider, target_playlist_id, now()),
+        )
+        return rows[0][0]
+
+    def find_unfinished_target(self, user_id: str, source_provider: str, source_playlist_id: str,
+                               target_provider: str) -> Optional[str]:
+        """
+        Target playlist of the most recent run of this source that never completed.
+        """
+        rows = self.db.execute(
+            "SELECT target_playlist_id FROM migrations.checkpoints "
+            "WHERE user_id = ? AND source_provider = ? AND source_playlist_id = ? "
+            "AND target_provider = ? AND status = 'running' "
+            "ORDER BY updated_at DESC LIMIT 1",
+            (user_id, source_provider, source_playlist_id, target_provider),
+        )
+        return rows[0][0] if rows else None
+
+    def find_last_sync(self, user_id: str, source_provider: str, source_playlist_id: str,
+                       target_provider: str, target_playlist_id: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        Most recent checkpoint of this source (optionally for one target), finished or not.
+        """
+        query = (
+            "SELECT id, target_playlist_id, status, source_version FROM migrations.checkpoints "
+            "WHERE user_id = ? AND source_provider = ? AND source_playlist_id = ? AND target_provider = ?"
+        )
+        params: List[Any] = [user_id, source_provider, source_playlist_id, target_provider]
+        if target_playlist_id:
+            query += " AND target_playlist_id = ?"
+            params.append(target_playlist_id)
+
+        rows = self.db.execute(query + " ORDER BY updated_at DESC LIMIT 1", tuple(params))
+        if not rows:
+            return None
+
+        row = rows[0]
+        return {"id": row[0], "target_playlist_id": row[1], "status": row[2], "source_version": row[3]}
+
+    def load(self, checkpoint_id: int) -> Dict[str, Dict[str, Any]]:
+        rows = self.db.execute(
+            "SELECT source_track_key, target_track_id, target_write_id, target_title, target_artist, "
+            "match_score, added, duplicate FROM migrations.checkpoint_tracks WHERE checkpoint_id = ?",
+            (checkpoint_id,),
+        )
+        return {
+            r[0]: {
+                "target_track_id": r[1],
+                "target_write_id": r[2],
+                "target_title": r[3],
+                "target_artist": r[4],
+                "score": float(r[5] or 0),
+                "added": bool(r[6]),
+                "duplicate": bool(r[7]),
+            }
+            for r in rows
+        }
+
+    def record(self, checkpoint_id: int, entries: List[Tuple[str, TrackMatchResult, Optional[str]]]):
+        """
+        Upsert (source_track_key, result, target_write_id) for a finished window.
+        A duplicate skipped under keep_first keeps its match but is not a failed write.
+        """
+        updated_at = now()
+        self.db.execute_each(
+            "INSERT INTO migrations.checkpoint_tracks "
+            "(checkpoint_id, source_track_key, target_track_id, target_write_id, target_title, "
+            "target_artist, match_score, added, duplicate, updated_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT (checkpoint_id, source_track_key) DO UPDATE SET "
+            "target_track_id = excluded.target_track_id, target_write_id = excluded.target_write_id, "
+            "target_title = excluded.target_title, target_artist = excluded.target_artist, "
+            "match_score = excluded.match_score, added = excluded.added, duplicate = excluded.duplicate, "
+            "updated_at = excluded.updated_at",
+            [(checkpoint_id, key, result.matched_track_id, write_id, result.matched_title,
+              result.matched_artist, round(result.score, 2), result.added, result.duplicate_of is not None,
+              updated_at)
+             for key, result, write_id in entries],
+        )
+
+    def forget(self, checkpoint_id: int, keys: List[str]):
+        """
+        Drop track rows for source tracks that no longer exist.
+        """
+        self.db.execute_each(
+            "DELETE FROM migrations.checkpoint_tracks WHERE checkpoint_id = ? AND source_track_key = ?",
+            [(checkpoint_id, key) for key in keys],
+        )
+
+    def complete(self, checkpoint_id: int, source_version: Optional[str] = None):
+        self.db.execute(
+            "UPDATE migrations.checkpoints SET status = 'completed', source_version = ?, updated_at = ? "
+            "WHERE id = ?",
+            (source_version, now(), checkpoint_id),
+        )
+
+
+# Global instance used everywhere
+checkpoint_store = CheckpointStore(db)
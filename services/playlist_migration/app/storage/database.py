@@ -0,0 +1,130 @@
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Any, List, Sequence
+
+from app.config import settings
+
+
+def now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def iso(value: Any) -> Any:
+    return value.isoformat() if hasattr(value, "isoformat") else value
+
+
+# -----------------------
+# Database access
+# -----------------------
+# Stores write to the migrations.* tables from docs/musiconnect_pgdb_schema_v2.sql.
+# Queries are written once with '?' placeholders and run unchanged against
+# the SQLite stand-in and Postgres.
+#
+# Every call is a blocking round trip; async callers run it in a worker
+# thread. Postgres hands each call a connection from a pool, so calls from
+# different threads run side by side; the SQLite stand-in has one
+# connection, and its calls take turns.
+
+class Database:
+    backend = "sqlite"
+    placeholder = "?"
+
+    def _sql(self, sql: str) -> str:
+        return sql.replace("?", self.placeholder)
+
+    @contextmanager
+    def _transaction(self):
+        """A connection whose statements commit together when the block exits cleanly."""
+        raise NotImplementedError
+
+    def execute(self, sql: str, params: Sequence[Any] = ()) -> List[tuple]:
+        with self._transaction() as conn:
+            cur = conn.cursor()
+            cur.execute(self._sql(sql), params)
+            return cur.fetchall() if cur.description else []
+
+    def execute_each(self, sql: str, param_rows: List[Sequence[Any]]) -> List[tuple]:
+        """
+        Run one statement per parameter row in a single transaction: if one
+        fails, none of them is kept.
+        Returns the first row produced by each (e.g. RETURNING id).
+        """
+        results = []
+        with self._transaction() as conn:
+            cur = conn.cursor()
+            for params in param_rows:
+                cur.execute(self._sql(sql), params)
+                results.append(cur.fetchone() if cur.description else None)
+        return results
+
+    def create_tables(self, ddl: List[str]):
+        """
+        Create local tables. Postgres tables come from the schema file instead.
+        """
+
+
+class SqliteDatabase(Database):
+    def __init__(self, path: str = ":memory:"):
+        self.conn = sqlite3.connect(":memory:", check_same_thread=False)
+        self.lock = threading.Lock()
+        # Attach the real database as 'migrations' so the Postgres table names work unchanged
+        self.conn.execute("ATTACH DATABASE ? AS migrations", (path,))
+
+    @contextmanager
+    def _transaction(self):
+        with self.lock:
+            try:
+                yield self.conn
+                self.conn.commit()
+            except Exception:
+                self.conn.rollback()
+                raise
+
+    def create_tables(self, ddl: List[str]):
+        with self._transaction() as conn:
+            for statement in ddl:
+                conn.execute(statement)
+
+
+class PostgresDatabase(Database):
+    backend = "postgres"
+    placeholder = "%s"
+
+    def __init__(self):
+        from psycopg_pool import ConnectionPool
+
+        self.pool = ConnectionPool(
+            min_size=settings.MIGRATION_DB_POOL_MIN_SIZE,
+            max_size=settings.MIGRATION_DB_POOL_MAX_SIZE,
+            kwargs={
+                "host": settings.MC_PG_HOST,
+                "port": settings.MC_PG_PORT,
+                "dbname": settings.MC_PG_DB,
+                "user": settings.MC_PG_USER,
+                "password": settings.MC_PG_PASSWORD,
+                "sslmode": settings.MC_PG_SSLMODE,
+            },
+            open=True,
+        )
+
+    @contextmanager
+    def _transaction(self):
+        # The pool commits when the block exits cleanly and rolls back otherwise
+        with self.pool.connection() as conn:
+            yield conn
+
+
+# -----------------------
+# Backend Selector
+# -----------------------
+
+def get_database() -> Database:
+    if settings.MIGRATION_STORE_BACKEND == "postgres":
+        return PostgresDatabase()
+    return SqliteDatabase(settings.MIGRATION_SQLITE_PATH)
+
+
+# Global instance used by every store
+db = get_database()
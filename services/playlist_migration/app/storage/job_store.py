@@ -0,0 +1,315 @@
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.models.migration_models import TrackMatchResult
+from app.storage.database import Database, db, iso, now
+
+
+# -----------------------
+# Job Store
+# -----------------------
+# Reads and writes migrations.jobs / migrations.playlists / migrations.tracks.
+#
+# Track rows are inserted as 'pending' when the target playlist is
+# ready and moved to 'matched' (found and added), 'failed', 'duplicate'
+# (a repeat skipped under keep_first), or 'deferred'
+# (over the YouTube quota, left for a later run) as the migration works
+# through them.
+
+class UnknownUser(LookupError):
+    """The user id names no MusicConnect user (Postgres backend only)."""
+
+
+class JobStore:
+    def __init__(self, database: Database):
+        self.db = database
+        self.db.create_tables(SQLITE_SCHEMA)
+
+    def _execute(self, sql: str, params: tuple = ()) -> List[tuple]:
+        return self.db.execute(sql, params)
+
+    def _user_key(self, user_id: str) -> Any:
+        if self.db.backend != "postgres":
+            return user_id
+
+        # migrations.jobs.user_id references core.users(id)
+        if user_id.isdigit():
+            return int(user_id)
+
+        rows = self._execute(
+            "SELECT id FROM core.users WHERE email = ?",
+            (user_id,),
+        )
+        if not rows:
+            raise UnknownUser(f"Unknown MusicConnect user: {user_id}")
+        return rows[0][0]
+
+    # Jobs
+    def create_job(self, user_id: str, source_provider: str, target_provider: str) -> int:
+        rows = self._execute(
+            "INSERT INTO migrations.jobs (user_id, source_provider, target_provider, status, created_at) "
+            "VALUES (?, ?, ?, 'pending', ?) RETURNING id",
+            (self._user_key(user_id), source_provider, target_provider, now()),
+        )
+        return rows[0][0]
+
+    def set_job_status(self, job_id: int, status: str, message: Optional[str] = None):
+        column = {"running": "started_at", "completed": "finished_at", "failed": "finished_at"}.get(status)
+        if column:
+            self._execute(
+                f"UPDATE migrations.jobs SET status = ?, status_message = ?, {column} = ? WHERE id = ?",
+                (status, message, now(), job_id),
+            )
+        else:
+            self._execute(
+                "UPDATE migrations.jobs SET status = ?, status_message = ? WHERE id = ?",
+                (status, message, job_id),
+            )
+
+    # Playlists
+    def add_playlist(self, job_id: int, source_playlist_id: str) -> int:
+        rows = self._execute(
+            "INSERT INTO migrations.playlists (job_id, source_playlist_id, status, created_at) "
+            "VALUES (?, ?, 'pending', ?) RETURNING id",
+            (job_id, source_playlist_id, now()),
+        )
+        return rows[0][0]
+
+    def update_playlist(self, playlist_migration_id: int, source_name: Optional[str] = None,
+                        target_playlist_id: Optional[str] = None, status: Optional[str] = None,
+                        error_message: Optional[str] = None, timings: Optional[Dict[str, Any]] = None):
+        self._execute(
+            "UPDATE migrations.playlists SET "
+            "source_name = COALESCE(?, source_name), "
+            "target_playlist_id = COALESCE(?, target_playlist_id), "
+            "status = COALESCE(?, status), "
+            "error_message = COALESCE(?, error_message), "
+            "timings = COALESCE(?, timings) "
+            "WHERE id = ?",
+            (source_name, target_playlist_id, status, error_message,
+             json.dumps(timings) if timings is not None else None, playlist_migration_id),
+        )
+
+    # Tracks
+    def add_tracks(self, playlist_migration_id: int, tracks: List[Dict[str, Any]]) -> List[int]:
+        """
+        Insert one pending row per source track, in order. Returns the row ids.
+        """
+        created_at = now()
+        rows = self.db.execute_each(
+            "INSERT INTO migrations.tracks "
+            "(playlist_migration_id, source_track_id, source_title, source_artist, status, created_at) "
+            "VALUES (?, ?, ?, ?, 'pending', ?) RETURNING id",
+            [(playlist_migration_id, t.get("id") or "", t.get("title"), t.get("artist"), created_at)
+             for t in tracks],
+        )
+        return [row[0] for row in rows]
+
+    def update_tracks(self, updates: List[Tuple[int, TrackMatchResult]]):
+        """
+        Record (row id, result) pairs in one transaction.
+        """
+        self.db.execute_each(
+            "UPDATE migrations.tracks SET target_track_id = ?, target_title = ?, target_artist = ?, "
+            "match_score = ?, status = ?, error_message = ? WHERE id = ?",
+            [(result.matched_track_id, result.matched_title, result.matched_artist,
+              round(result.score, 2), *self._track_status(result), track_row_id)
+             for track_row_id, result in updates],
+        )
+
+    @staticmethod
+    def _track_status(result: TrackMatchResult) -> Tuple[str, Optional[str]]:
+        if result.deferred:
+            status, error = "deferred", "over the YouTube quota budget"
+        elif result.added:
+            status, error = "matched", None
+        elif result.duplicate_of is not None:
+            status, error = "duplicate", f"duplicate of track {result.duplicate_of}"
+        elif result.matched_track_id:
+            status, error = "failed", "add failed"
+        else:
+            status, error = "failed", "no match"
+        return status, error
+
+    # Reads
+    def get_job(self, job_id: int, detail: str = "full", offset: int = 0,
+                limit: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """
+        Job status, progress counts and per-playlist results.
+
+        detail="summary" leaves out track results, "unmatched" returns only
+        tracks that failed or were deferred (not skipped duplicates), "full"
+        returns every track.
+        Track results are paged over the whole job, in playlist then source
+        order; each carries its index in its playlist. limit=None returns
+        them all.
+        """
+        rows = self._execute(
+            "SELECT id, user_id, source_provider, target_provider, status, status_message, "
+            "created_at, started_at, finished_at FROM migrations.jobs WHERE id = ?",
+            (job_id,),
+        )
+        if not rows:
+            return None
+
+        job = rows[0]
+        playlists = []
+        by_id: Dict[int, Dict[str, Any]] = {}
+        playlist_statuses: Dict[str, int] = {}
+
+        for p in self._execute(
+            "SELECT id, source_playlist_id, source_name, target_playlist_id, status, error_message, timings "
+            "FROM migrations.playlists WHERE job_id = ? ORDER BY id",
+            (job_id,),
+        ):
+            playlist_statuses[p[4]] = playlist_statuses.get(p[4], 0) + 1
+            playlist = {
+                "source_playlist_id": p[1],
+                "source_name": p[2],
+                "target_playlist_id": p[3],
+                "status": p[4],
+                "error_message": p[5],
+                # JSONB comes back parsed from Postgres, as text from SQLite
+                "timings": json.loads(p[6]) if isinstance(p[6], str) else p[6],
+            }
+            if detail != "summary":
+                playlist["matches"] = []
+            playlists.append(playlist)
+            by_id[p[0]] = playlist
+
+        # Counts in SQL, so progress stays cheap however large the job is
+        counts: Dict[str, int] = {}
+        for status, count in self._execute(
+            "SELECT t.status, COUNT(*) FROM migrations.tracks t "
+            "JOIN migrations.playlists p ON p.id = t.playlist_migration_id "
+            "WHERE p.job_id = ? GROUP BY t.status",
+            (job_id,),
+        ):
+            counts[status] = int(count)
+        total = sum(counts.values())
+        added = counts.get("matched", 0)
+        deferred = counts.get("deferred", 0)
+        duplicates = counts.get("duplicate", 0)
+        processed = total - counts.get("pending", 0)
+
+        response = {
+            "job_id": job[0],
+            "user_id": job[1],
+            "source_provider": job[2],
+            "target_provider": job[3],
+            "status": job[4],
+            "status_message": job[5],
+            "created_at": iso(job[6]),
+            "started_at": iso(job[7]),
+            "finished_at": iso(job[8]),
+            "progress": {
+                "total_tracks": total,
+                "processed": processed,
+                "added": added,
+                "failed": processed - added - deferred - duplicates,
+                "deferred": deferred,
+                "duplicates_skipped": duplicates,
+                "playlists": playlist_statuses,
+            },
+            "playlists": playlists,
+        }
+        if detail == "summary":
+            return response
+
+        matching = processed - added - duplicates if detail == "unmatched" else total
+
+        page_sql = (
+            "SELECT playlist_migration_id, track_index, source_title, source_artist, target_track_id, "
+            "target_title, target_artist, match_score, status FROM ("
+            "SELECT t.id, t.playlist_migration_id, t.source_title, t.source_artist, t.target_track_id, "
+            "t.target_title, t.target_artist, t.match_score, t.status, "
+            "ROW_NUMBER() OVER (PARTITION BY t.playlist_migration_id ORDER BY t.id) - 1 AS track_index "
+            "FROM migrations.tracks t JOIN migrations.playlists p ON p.id = t.playlist_migration_id "
+            "WHERE p.job_id = ?) ranked "
+        )
+        params: tuple = (job_id,)
+        if detail == "unmatched":
+            page_sql += "WHERE status IN ('failed', 'deferred') "
+        page_sql += "ORDER BY playlist_migration_id, track_index"
+        if limit is not None:
+            page_sql += " LIMIT ? OFFSET ?"
+            params += (limit, offset)
+        else:
+            offset = 0
+
+        returned = 0
+        for t in self._execute(page_sql, params):
+            returned += 1
+            by_id[t[0]]["matches"].append({
+                "index": int(t[1]),
+                "source_title": t[2] or "",
+                "source_channel": t[3] or "",
+                "matched_track_id": t[4],
+                "matched_title": t[5],
+                "matched_artist": t[6],
+                "score": float(t[7] or 0),
+                "added": t[8] == "matched",
+                "deferred": t[8] == "deferred",
+                "status": t[8],
+            })
+
+        next_offset = offset + returned
+        response["page"] = {
+            "offset": offset,
+            "limit": limit,
+            "returned": returned,
+            "total": matching,
+            "next_offset": next_offset if next_offset < matching else None,
+        }
+        return response
+
+
+# -----------------------
+# Local schema (SQLite stand-in)
+# -----------------------
+
+SQLITE_SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS migrations.jobs (
+        id                  INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id             TEXT NOT NULL,
+        source_provider     VARCHAR(50) NOT NULL,
+        target_provider     VARCHAR(50) NOT NULL,
+        status              VARCHAR(20) NOT NULL,
+        status_message      TEXT,
+        created_at          TEXT NOT NULL,
+        started_at          TEXT,
+        finished_at         TEXT
+    )""",
+    """CREATE TABLE IF NOT EXISTS migrations.playlists (
+        id                      INTEGER PRIMARY KEY AUTOINCREMENT,
+        job_id                  INTEGER NOT NULL REFERENCES jobs(id) ON DELETE CASCADE,
+        source_playlist_id      VARCHAR(255) NOT NULL,
+        source_name             TEXT,
+        target_playlist_id      VARCHAR(255),
+        target_name             TEXT,
+        status                  VARCHAR(20) NOT NULL DEFAULT 'pending',
+        error_message           TEXT,
+        timings                 TEXT,
+        created_at              TEXT NOT NULL
+    )""",
+    """CREATE TABLE IF NOT EXISTS migrations.tracks (
+        id                      INTEGER PRIMARY KEY AUTOINCREMENT,
+        playlist_migration_id   INTEGER NOT NULL REFERENCES playlists(id) ON DELETE CASCADE,
+        source_track_id         VARCHAR(255) NOT NULL,
+        source_title            TEXT,
+        source_artist           TEXT,
+        target_track_id         VARCHAR(255),
+        target_title            TEXT,
+        target_artist           TEXT,
+        match_score             NUMERIC(5,2),
+        status                  VARCHAR(20) NOT NULL DEFAULT 'pending',
+        error_message           TEXT,
+        created_at              TEXT NOT NULL
+    )""",
+    "CREATE INDEX IF NOT EXISTS migrations.idx_migration_playlists_job ON playlists(job_id)",
+    "CREATE INDEX IF NOT EXISTS migrations.idx_migration_tracks_playlist ON tracks(playlist_migration_id)",
+]
+
+
+# Global instance used everywhere
+job_store = JobStore(db)
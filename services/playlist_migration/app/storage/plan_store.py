@@ -0,0 +1,135 @@
+import json
+from typing import Any, Dict, List, Optional
+
+from app.storage.database import Database, db, iso, now
+
+
+# -----------------------
+# Plan Store
+# -----------------------
+# A match plan is a dry run of a migration: for every source track, all
+# candidates found on the target with their scores, best first. Nothing is
+# written to the target until the plan is committed, and committing needs
+# no searches, so a plan can be re-applied with other thresholds.
+#
+# candidates is a JSON list of
+#   {"track_id", "write_id", "title", "artist", "score"}
+# A track is deferred when the quota ran out before it could be searched;
+# it has no candidates and a new plan is needed to match it.
+
+SQLITE_SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS migrations.match_plans (
+        id                      INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id                 TEXT NOT NULL,
+        source_provider         VARCHAR(50) NOT NULL,
+        source_playlist_id      VARCHAR(255) NOT NULL,
+        source_name             TEXT,
+        target_provider         VARCHAR(50) NOT NULL,
+        min_score               NUMERIC(5,2) NOT NULL,
+        status                  VARCHAR(20) NOT NULL DEFAULT 'planned',
+        target_playlist_id      VARCHAR(255),
+        created_at              TEXT NOT NULL,
+        committed_at            TEXT
+    )""",
+    """CREATE TABLE IF NOT EXISTS migrations.match_plan_tracks (
+        plan_id                 INTEGER NOT NULL REFERENCES match_plans(id) ON DELETE CASCADE,
+        position                INTEGER NOT NULL,
+        source_track_id         VARCHAR(255),
+        source_title            TEXT,
+        source_artist           TEXT,
+        candidates              TEXT NOT NULL,
+        deferred                BOOLEAN NOT NULL DEFAULT 0,
+        PRIMARY KEY (plan_id, position)
+    )""",
+]
+
+
+class PlanStore:
+    def __init__(self, database: Database):
+        self.db = database
+        self.db.create_tables(SQLITE_SCHEMA)
+
+    def create_plan(self, user_id: str, source_provider: str, source_playlist_id: str,
+                    source_name: Optional[str], target_provider: str, min_score: float,
+                    tracks: List[Dict[str, Any]]) -> int:
+        """
+        Store a plan. tracks are source items with a "candidates" list (and
+        "deferred" if they were not searched), in source order.
+        """
+        rows = self.db.execute(
+            "INSERT INTO migrations.match_plans "
+            "(user_id, source_provider, source_playlist_id, source_name, target_provider, min_score, "
+            "status, created_at) VALUES (?, ?, ?, ?, ?, ?, 'planned', ?) RETURNING id",
+            (user_id, source_provider, source_playlist_id, source_name, target_provider,
+             round(min_score, 2), now()),
+        )
+        plan_id = rows[0][0]
+
+        self.db.execute_each(
+            "INSERT INTO migrations.match_plan_tracks "
+            "(plan_id, position, source_track_id, source_title, source_artist, candidates, deferred) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [(plan_id, position, t.get("id") or "", t.get("title"), t.get("artist"), json.dumps(t["candidates"]),
+              bool(t.get("deferred"))) for position, t in enumerate(tracks)],
+        )
+        return plan_id
+
+    def set_target(self, plan_id: int, target_playlist_id: str):
+        self.db.execute(
+            "UPDATE migrations.match_plans SET target_playlist_id = ? WHERE id = ?",
+            (target_playlist_id, plan_id),
+        )
+
+    def mark_committed(self, plan_id: int, target_playlist_id: str):
+        self.db.execute(
+            "UPDATE migrations.match_plans SET status = 'committed', target_playlist_id = ?, "
+            "committed_at = ? WHERE id = ?",
+            (target_playlist_id, now(), plan_id),
+        )
+
+    def get_plan(self, plan_id: int) -> Optional[Dict[str, Any]]:
+        rows = self.db.execute(
+            "SELECT id, user_id, source_provider, source_playlist_id, source_name, target_provider, "
+            "min_score, status, target_playlist_id, created_at, committed_at "
+            "FROM migrations.match_plans WHERE id = ?",
+            (plan_id,),
+        )
+        if not rows:
+            return None
+
+        plan = rows[0]
+        tracks = []
+        for t in self.db.execute(
+            "SELECT position, source_track_id, source_title, source_artist, candidates, deferred "
+            "FROM migrations.match_plan_tracks WHERE plan_id = ? ORDER BY position",
+            (plan_id,),
+        ):
+            # JSONB comes back parsed from Postgres, as text from SQLite
+            candidates = json.loads(t[4]) if isinstance(t[4], str) else t[4]
+            tracks.append({
+                "index": t[0],
+                "source_track_id": t[1],
+                "source_title": t[2] or "",
+                "source_channel": t[3] or "",
+                "candidates": candidates,
+                "deferred": bool(t[5]),
+            })
+
+        return {
+            "plan_id": plan[0],
+            "user_id": plan[1],
+            "source_provider": plan[2],
+            "source_playlist_id": plan[3],
+            "source_playlist_name": plan[4],
+            "target_provider": plan[5],
+            "min_score": float(plan[6]),
+            "status": plan[7],
+            "target_playlist_id": plan[8],
+            "created_at": iso(plan[9]),
+            "committed_at": iso(plan[10]),
+            "tracks": tracks,
+        }
+
+
+# Global instance used everywhere
+plan_store = PlanStore(db)
@@ -0,0 +1,28 @@
+import json
+from typing import Any
+
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson as _orjson
+except ImportError:  # optional encoder
+    _orjson = None
+
+
+def dumps(content: Any) -> bytes:
+    """
+    Compact JSON bytes: orjson when installed, the standard library otherwise.
+    """
+    if _orjson is not None:
+        return _orjson.dumps(content, option=_orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSONResponse rendered with dumps(). Return it directly from a route to
+    skip FastAPI's jsonable_encoder pass over large result lists.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -0,0 +1,97 @@
+import asyncio
+from typing import Optional
+
+import httpx
+
+from app.config import settings
+from app.utils.metrics import metrics
+
+
+class WriteRejected(Exception):
+    """
+    The provider refused a write outright (a 4xx other than 429), so none
+    of it was applied and it is safe to retry, e.g. in smaller pieces.
+    """
+
+
+def rejects_write(status_code: int) -> bool:
+    return 400 <= status_code < 500 and status_code != 429
+
+
+class ConnectorPool:
+    """
+    One keep-alive httpx.AsyncClient shared by every connector client, so
+    all migrations on the event loop reuse a few warm connections instead
+    of opening one per call. The transport retries failed connects on any
+    method; GETs are also retried on 429/5xx. Batch writes are never replayed
+    here: a timed-out write may still have been applied, so only the
+    caller, after re-reading the target, can tell whether to send it again.
+    """
+
+    RETRY_STATUSES = (429, 502, 503, 504)
+
+    def __init__(self, pool_size: int, keepalive: bool, connect_timeout: float,
+                 read_timeout: float, bulk_read_timeout: float, retries: int, backoff: float):
+        self.pool_size = max(1, pool_size)
+        self.keepalive = keepalive
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.bulk_read_timeout = bulk_read_timeout
+        self.retries = retries
+        self.backoff = backoff
+        self._client: Optional[httpx.AsyncClient] = None
+
+    def _build(self) -> httpx.AsyncClient:
+        limits = httpx.Limits(
+            max_connections=self.pool_size * 2,     # one pool for both connectors
+            max_keepalive_connections=self.pool_size * 2 if self.keepalive else 0,
+        )
+        return httpx.AsyncClient(
+            timeout=self.timeout(),
+            transport=httpx.AsyncHTTPTransport(limits=limits, retries=self.retries),
+        )
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        # Built lazily so the pool can be reopened after aclose()
+        if self._client is None:
+            self._client = self._build()
+        return self._client
+
+    def timeout(self, bulk: bool = False) -> httpx.Timeout:
+        """Connect/read timeouts; bulk is for batch writes and library listings"""
+        read = self.bulk_read_timeout if bulk else self.read_timeout
+        return httpx.Timeout(read, connect=self.connect_timeout)
+
+    async def get(self, url: str, **kwargs) -> httpx.Response:
+        attempt = 0
+        while True:
+            response = await self.client.get(url, **kwargs)
+            if response.status_code not in self.RETRY_STATUSES or attempt >= self.retries:
+                return response
+
+            metrics.inc("connector_retries_total", status=response.status_code)
+            retry_after = response.headers.get("Retry-After", "")
+            delay = float(retry_after) if retry_after.isdigit() else self.backoff * (2 ** attempt)
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    async def post(self, url: str, **kwargs) -> httpx.Response:
+        return await self.client.post(url, **kwargs)
+
+    async def aclose(self):
+        if self._client is not None:
+            client, self._client = self._client, None
+            await client.aclose()
+
+
+# Global instance used by every connector client
+http_pool = ConnectorPool(
+    pool_size=settings.HTTP_POOL_SIZE,
+    keepalive=settings.HTTP_KEEPALIVE,
+    connect_timeout=settings.HTTP_CONNECT_TIMEOUT_SECONDS,
+    read_timeout=settings.HTTP_READ_TIMEOUT_SECONDS,
+    bulk_read_timeout=settings.HTTP_BULK_READ_TIMEOUT_SECONDS,
+    retries=settings.HTTP_RETRIES,
+    backoff=settings.HTTP_RETRY_BACKOFF_SECONDS,
+)
@@ -1,4 +1,47 @@
+import logging
+import re
 from difflib import SequenceMatcher
+from typing import List, Optional, Sequence, Tuple
+
+try:
+    from rapidfuzz import fuzz as _rapidfuzz
+except ImportError:  # optional backend
+    _rapidfuzz = None
+
+_WHITESPACE = re.compile(r"\s+")
+# "(Official Video)", "[HD]", "- Remastered 2011", "ft. Someone", "| Lyrics"...
+_TITLE_NOISE = re.compile(
+    r"[\(\[][^\)\]]*[\)\]]"
+    r"|\s[-|]\s*(?:remaster(?:ed)?|live|lyrics?|official|audio|video)\b.*$"
+    r"|\s(?:feat\.?|ft\.?|featuring)\s.*$",
+    re.IGNORECASE,
+)
+_CHANNEL_NOISE = re.compile(r"(?:vevo|\s-\stopic|\s*official)$", re.IGNORECASE)
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_text(text: str) -> str:
+    """
+    Lower-case, trim and collapse whitespace. Used for cache keys.
+    """
+    return _WHITESPACE.sub(" ", (text or "").lower()).strip()
+
+
+def simplify_title(title: str) -> str:
+    """
+    Drop bracketed tags, version suffixes and featured artists from a title.
+    Used as an alternate search query when the full title finds nothing good.
+    """
+    return _WHITESPACE.sub(" ", _TITLE_NOISE.sub(" ", title or "")).strip()
+
+
+def simplify_artist(artist: str) -> str:
+    """
+    "ArtistVEVO" / "Artist - Topic" / "Artist Official" -> "Artist".
+    """
+    return _CHANNEL_NOISE.sub("", (artist or "").strip()).strip()
+
 
 def score_match(source_title: str, source_artist: str, 
                 candidate_title: str, candidate_channel: str) -> float:
@@ -28,4 +71,145 @@ def score_match(source_title: str, source_artist: str,
     
     total_score = min(title_score + artist_score, 100)
     
-    return total_score
\ No newline at end of file
+    return total_score
+
+
+# ============================================
+# BATCH SCORING
+# ============================================
+# score_match above is the reference scorer. SourceScorer gives the same
+# 0-100 scores but normalizes the source once per track and, when only the
+# best candidate is wanted, skips candidates whose score cannot beat the
+# best so far. Upper bounds on a similarity ratio, cheapest first:
+#   length bound - 2 * min(len) / total len (difflib's real_quick_ratio)
+#   quick_ratio  - shared character counts, ignoring order (difflib only)
+#
+# backend "difflib" reproduces score_match exactly. "rapidfuzz" uses the
+# compiled InDel ratio from rapidfuzz, which is much faster but can score
+# a little higher on some pairs.
+#
+# difflib indexes seq2 when it is set, and its ratio is not symmetric, so
+# the candidate has to stay seq2 as in score_match: nothing carries over
+# between candidates. Each candidate gets one matcher, shared by its
+# quick_ratio bound and its exact ratio.
+
+TITLE_WEIGHT = 60
+ARTIST_WEIGHT = 40
+CONTAINS_BONUS = 10
+
+SCORING_BACKENDS = ("difflib", "rapidfuzz")
+
+
+_warned_no_rapidfuzz = False
+
+
+def _length_bound(a: str, b: str) -> float:
+    total = len(a) + len(b)
+    return 2.0 * min(len(a), len(b)) / total if total else 1.0
+
+
+class SourceScorer:
+    """
+    Scores many candidates against one source track.
+    """
+
+    def __init__(self, source_title: str, source_artist: str, backend: str = "difflib"):
+        if backend not in SCORING_BACKENDS:
+            raise ValueError(f"Unknown scoring backend: {backend}")
+        if backend == "rapidfuzz" and _rapidfuzz is None:
+            global _warned_no_rapidfuzz
+            if not _warned_no_rapidfuzz:
+                _warned_no_rapidfuzz = True
+                logger.warning("rapidfuzz is not installed; scoring with difflib")
+            backend = "difflib"
+
+        self.title = source_title.lower().strip()
+        self.artist = source_artist.lower().strip()
+        self.backend = backend
+
+    def _matcher(self, source: str, candidate: str) -> Optional[SequenceMatcher]:
+        if self.backend == "rapidfuzz":
+            return None
+        return SequenceMatcher(None, source, candidate)
+
+    def _ratio(self, source: str, candidate: str, matcher: Optional[SequenceMatcher] = None) -> float:
+        if self.backend == "rapidfuzz":
+            return _rapidfuzz.ratio(source, candidate) / 100
+        return (matcher or SequenceMatcher(None, source, candidate)).ratio()
+
+    @staticmethod
+    def _quick_bound(matcher: Optional[SequenceMatcher]) -> float:
+        # For rapidfuzz the exact ratio is cheaper than a Python quick_ratio
+        if matcher is None:
+            return 1.0
+        return matcher.quick_ratio()
+
+    @staticmethod
+    def _total(title_ratio: float, artist_ratio: float, title_bonus: int, artist_bonus: int) -> float:
+        # Same operation order as score_match, so scores match to the last bit
+        title_score = title_ratio * TITLE_WEIGHT + title_bonus
+        artist_score = artist_ratio * ARTIST_WEIGHT + artist_bonus
+        return min(title_score + artist_score, 100)
+
+    def _bonuses(self, candidate_title: str) -> Tuple[int, int]:
+        title_bonus = CONTAINS_BONUS if self.title and self.title in candidate_title else 0
+        artist_bonus = CONTAINS_BONUS if self.artist and self.artist in candidate_title else 0
+        return title_bonus, artist_bonus
+
+    def score(self, candidate_title: str, candidate_channel: str) -> float:
+        """
+        Same score as score_match(source_title, source_artist, candidate_title, candidate_channel).
+        """
+        candidate_title = candidate_title.lower().strip()
+        candidate_channel = candidate_channel.lower().strip()
+        title_bonus, artist_bonus = self._bonuses(candidate_title)
+
+        return self._total(
+            self._ratio(self.title, candidate_title),
+            self._ratio(self.artist, candidate_channel),
+            title_bonus, artist_bonus
+        )
+
+    def score_all(self, candidates: Sequence[Tuple[str, str]]) -> List[float]:
+        """
+        Scores for (title, channel) pairs, in order.
+        """
+        return [self.score(title, channel) for title, channel in candidates]
+
+    def best(self, candidates: Sequence[Tuple[str, str]]) -> Tuple[int, float]:
+        """
+        (index, score) of the first highest-scoring (title, channel) pair,
+        or (-1, -1.0) if there are none. Candidates that cannot beat the
+        best score so far are pruned without computing their ratios.
+        """
+        best_index = -1
+        best_score = -1.0
+
+        for index, (candidate_title, candidate_channel) in enumerate(candidates):
+            candidate_title = candidate_title.lower().strip()
+            candidate_channel = candidate_channel.lower().strip()
+            title_bonus, artist_bonus = self._bonuses(candidate_title)
+
+            # An equal score never replaces the earlier candidate, so ties are pruned too
+            title_ratio = _length_bound(self.title, candidate_title)
+            artist_ratio = _length_bound(self.artist, candidate_channel)
+            if self._total(title_ratio, artist_ratio, title_bonus, artist_bonus) <= best_score:
+                continue
+
+            title_matcher = self._matcher(self.title, candidate_title)
+            artist_matcher = self._matcher(self.artist, candidate_channel)
+            title_ratio = min(title_ratio, self._quick_bound(title_matcher))
+            artist_ratio = min(artist_ratio, self._quick_bound(artist_matcher))
+            if self._total(title_ratio, artist_ratio, title_bonus, artist_bonus) <= best_score:
+                continue
+
+            title_ratio = self._ratio(self.title, candidate_title, title_matcher)
+            if self._total(title_ratio, artist_ratio, title_bonus, artist_bonus) <= best_score:
+                continue
+
+            artist_ratio = self._ratio(self.artist, candidate_channel, artist_matcher)
+            score = self._total(title_ratio, artist_ratio, title_bonus, artist_bonus)
+            if score > best_score:
+                best_index, best_score = index, score
+
+        return best_index, best_score
@@ -0,0 +1,138 @@
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Tuple
+
+# Histogram buckets (seconds) for stage durations: a cached search takes
+# microseconds, a 10k-track source fetch or a throttled batch write seconds.
+STAGE_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+HELP = {
+    "migration_stage_seconds": "Duration of one migration stage call (fetch_source, search, score, add)",
+    "migration_cache_lookups_total": "Match cache lookups by the migration pipeline, by result",
+    "connector_retries_total": "Connector calls retried after a throttled or failed response",
+    "search_cache_lookups_total": "Search response cache lookups in the connector clients, by result",
+    "quota_units_total": "Provider API quota units spent by the migration service, by endpoint",
+}
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def _labels(labels: Dict[str, Any]) -> Labels:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format(labels: Labels) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels) + "}"
+
+
+class MetricsRegistry:
+    """
+    Process-wide counters and histograms, rendered in the Prometheus text
+    exposition format. Kept dependency-free on purpose: the service only
+    needs a handful of series.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counters: Dict[str, Dict[Labels, float]] = defaultdict(dict)
+        # name -> labels -> [bucket counts..., sum, count]
+        self.histograms: Dict[str, Dict[Labels, List[float]]] = defaultdict(dict)
+
+    def inc(self, name: str, value: float = 1.0, **labels):
+        key = _labels(labels)
+        with self.lock:
+            series = self.counters[name]
+            series[key] = series.get(key, 0.0) + value
+
+    def set(self, name: str, value: float, **labels):
+        """Set a counter to a total kept elsewhere (e.g. cache hit counters)."""
+        with self.lock:
+            self.counters[name][_labels(labels)] = float(value)
+
+    def observe(self, name: str, seconds: float, **labels):
+        key = _labels(labels)
+        with self.lock:
+            series = self.histograms[name]
+            if key not in series:
+                series[key] = [0.0] * (len(STAGE_BUCKETS) + 2)
+            values = series[key]
+            for i, bound in enumerate(STAGE_BUCKETS):
+                if seconds <= bound:
+                    values[i] += 1
+            values[-2] += seconds
+            values[-1] += 1
+
+    def render(self) -> str:
+        lines: List[str] = []
+        with self.lock:
+            for name, series in sorted(self.counters.items()):
+                lines.append(f"# HELP {name} {HELP.get(name, name)}")
+                lines.append(f"# TYPE {name} counter")
+                for labels, value in sorted(series.items()):
+                    lines.append(f"{name}{_format(labels)} {value:g}")
+
+            for name, series in sorted(self.histograms.items()):
+                lines.append(f"# HELP {name} {HELP.get(name, name)}")
+                lines.append(f"# TYPE {name} histogram")
+                for labels, values in sorted(series.items()):
+                    for i, bound in enumerate(STAGE_BUCKETS):
+                        lines.append(f"{name}_bucket{_format(labels + (('le', f'{bound:g}'),))} {values[i]:g}")
+                    lines.append(f"{name}_bucket{_format(labels + (('le', '+Inf'),))} {values[-1]:g}")
+                    lines.append(f"{name}_sum{_format(labels)} {values[-2]:.6f}")
+                    lines.append(f"{name}_count{_format(labels)} {values[-1]:g}")
+        return "\n".join(lines) + "\n"
+
+
+# Global instance used everywhere
+metrics = MetricsRegistry()
+
+
+class StageTimings:
+    """
+    Time spent and calls made per stage by one migration, reported in its
+    summary. Every stage call is also observed in the global registry.
+
+    Stage seconds add up the calls, so for concurrently matched tracks
+    (search, score) they can exceed the migration's wall-clock time.
+    """
+
+    def __init__(self, provider: str):
+        self.provider = provider
+        self.started = time.perf_counter()
+        self.seconds: Dict[str, float] = defaultdict(float)
+        self.calls: Dict[str, int] = defaultdict(int)
+        self.cache: Dict[str, int] = defaultdict(int)
+
+    @contextmanager
+    def stage(self, name: str, provider: str = "") -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.seconds[name] += elapsed
+            self.calls[name] += 1
+            metrics.observe("migration_stage_seconds", elapsed, stage=name, provider=provider or self.provider)
+
+    def cache_lookup(self, result: str):
+        """result: 'exact_hit', 'hit', 'below_threshold' (searched again) or 'miss'"""
+        self.cache[result] += 1
+        metrics.inc("migration_cache_lookups_total", result=result, provider=self.provider)
+
+    def breakdown(self) -> Dict[str, Any]:
+        return {
+            "total_seconds": round(time.perf_counter() - self.started, 3),
+            "stages": {
+                name: {"seconds": round(self.seconds[name], 3), "calls": self.calls[name]}
+                for name in self.seconds
+            },
+            "match_cache": dict(self.cache),
+        }
@@ -0,0 +1,159 @@
+import threading
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict
+
+from app.utils.metrics import metrics
+
+try:
+    from zoneinfo import ZoneInfo
+    PACIFIC = ZoneInfo("America/Los_Angeles")
+except Exception:  # no tz database in the image
+    PACIFIC = timezone(timedelta(hours=-8))
+
+# YouTube Data API units per connector call the migration service makes.
+# A search costs the same whatever its maxResults: 100 for search.list plus
+# 1 for the videos.list call the connector makes for durations. "list"
+# covers the cheap playlistItems/playlists reads behind fetches and
+# version checks.
+YOUTUBE_UNIT_COSTS = {
+    "search": 101,
+    "insert": 50,
+    "delete": 50,
+    "create_playlist": 50,
+    "list": 1,
+}
+
+
+class QuotaExceeded(Exception):
+    """A call would spend more units than are left in today's quota."""
+
+
+class QuotaBudget:
+    """
+    Units one bulk job may spend across its playlists. Each playlist
+    reserves its estimate before it creates or writes anything; one that
+    no longer fits is refused, smaller ones after it may still run.
+    """
+
+    def __init__(self, units: int):
+        self.remaining = units
+
+    def reserve(self, units: int) -> bool:
+        if units > self.remaining:
+            return False
+        self.remaining -= units
+        return True
+
+
+class QuotaAccountant:
+    """
+    Units spent against a provider's daily quota, per endpoint and per day.
+    Days roll over at midnight Pacific time, when YouTube resets quotas.
+
+    Only calls made by this process are counted locally; sync() folds in
+    the connector's own count, which also covers every other caller.
+    """
+
+    HISTORY_DAYS = 7
+
+    def __init__(self, daily_limit: int, costs: Dict[str, int], provider: str = "youtube"):
+        self.daily_limit = daily_limit
+        self.costs = costs
+        self.provider = provider
+        self.lock = threading.Lock()
+        # day -> endpoint -> units spent by this process
+        self.days: Dict[date, Dict[str, int]] = {}
+        # units spent today by other callers, as of the last sync
+        self.external: Dict[date, int] = {}
+
+    @staticmethod
+    def today() -> date:
+        return datetime.now(PACIFIC).date()
+
+    def cost(self, endpoint: str, calls: int = 1) -> int:
+        return self.costs[endpoint] * calls
+
+    def spend(self, endpoint: str, calls: int = 1):
+        """
+        Record calls to endpoint before making them. Raises QuotaExceeded,
+        without recording, when they do not fit in what is left today.
+        """
+        self._add(endpoint, self.cost(endpoint, calls), check=True)
+
+    def check(self, endpoint: str, calls: int = 1):
+        """
+        Raise QuotaExceeded if calls to endpoint do not fit in what is left
+        today, without recording anything. For calls charged once their
+        outcome is known.
+        """
+        units = self.cost(endpoint, calls)
+        day = self.today()
+        with self.lock:
+            self._check(day, endpoint, units)
+
+    def record(self, endpoint: str, calls: int = 1):
+        """Record calls already made, e.g. reads whose page count was not known up front."""
+        self._add(endpoint, self.cost(endpoint, calls), check=False)
+
+    def _add(self, endpoint: str, units: int, check: bool):
+        if units <= 0:
+            return
+
+        day = self.today()
+        with self.lock:
+            if check:
+                self._check(day, endpoint, units)
+            spent = self.days.setdefault(day, {})
+            spent[endpoint] = spent.get(endpoint, 0) + units
+            for old in [d for d in self.days if (day - d).days >= self.HISTORY_DAYS]:
+                del self.days[old]
+        metrics.inc("quota_units_total", units, provider=self.provider, endpoint=endpoint)
+
+    def _check(self, day: date, endpoint: str, units: int):
+        if units > self._remaining(day):
+            raise QuotaExceeded(
+                f"{self.provider} quota exhausted: {endpoint} needs {units} units, "
+                f"{self._remaining(day)} left today"
+            )
+
+    def exhaust(self):
+        """The provider reported today's quota used up, whatever our own count says."""
+        self.sync(self.daily_limit)
+
+    def sync(self, used_today: int):
+        """
+        Adopt the connector's count of units used today; whatever it has
+        beyond our own calls was spent by someone else.
+        """
+        day = self.today()
+        with self.lock:
+            own = sum(self.days.get(day, {}).values())
+            self.external = {day: max(0, used_today - own)}
+
+    def used(self) -> int:
+        day = self.today()
+        with self.lock:
+            return self._used(day)
+
+    def remaining(self) -> int:
+        day = self.today()
+        with self.lock:
+            return self._remaining(day)
+
+    def _used(self, day: date) -> int:
+        return sum(self.days.get(day, {}).values()) + self.external.get(day, 0)
+
+    def _remaining(self, day: date) -> int:
+        return max(0, self.daily_limit - self._used(day))
+
+    def usage(self) -> Dict[str, Any]:
+        day = self.today()
+        with self.lock:
+            return {
+                "day": day.isoformat(),
+                "daily_limit": self.daily_limit,
+                "used": self._used(day),
+                "remaining": self._remaining(day),
+                "by_endpoint": dict(self.days.get(day, {})),
+                "history": {d.isoformat(): sum(spent.values()) for d, spent in sorted(self.days.items())},
+            }
@@ -0,0 +1,31 @@
+import asyncio
+import time
+
+
+class RateLimiter:
+    """
+    Token bucket shared by every caller of one upstream.
+    await acquire() until a call is allowed; a rate of 0 disables limiting.
+    """
+
+    def __init__(self, rate_per_second: float, burst: int = 1):
+        self.rate = rate_per_second
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+
+    async def acquire(self, cost: float = 1.0):
+        if self.rate <= 0:
+            return
+
+        # No await between reading and taking tokens, so callers on the
+        # event loop never race each other
+        while True:
+            current = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (current - self.updated) * self.rate)
+            self.updated = current
+
+            if self.tokens >= cost:
+                self.tokens -= cost
+                return
+            await asyncio.sleep((cost - self.tokens) / self.rate)
@@ -0,0 +1,55 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+
+class TTLCache:
+    """
+    Thread-safe LRU cache whose entries also expire after ttl seconds.
+    Keeps hit/miss counters for metrics and debugging.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = max(1, maxsize)
+        self.ttl = ttl
+        self.data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self.lock:
+            entry = self.data.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self.data[key]
+                self.misses += 1
+                return default
+
+            self.data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        with self.lock:
+            self.data[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+            self.data.move_to_end(key)
+            while len(self.data) > self.maxsize:
+                self.data.popitem(last=False)
+
+    def delete(self, key: Hashable):
+        with self.lock:
+            self.data.pop(key, None)
+
+    def clear(self):
+        with self.lock:
+            self.data.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self.lock:
+            return {"size": len(self.data), "hits": self.hits, "misses": self.misses}
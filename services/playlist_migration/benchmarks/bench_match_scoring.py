@@ -0,0 +1,101 @@
+"""
+Micro-benchmark: per-pair score_match vs. batch SourceScorer.best.
+
+Run from services/playlist_migration:
+
+    python -m benchmarks.bench_match_scoring [--tracks 500] [--candidates 25]
+
+Each source track gets a list of YouTube-like candidates (one close match,
+the rest noise), the way a real search result looks. The difflib batch
+scorer must pick the same candidate with the same score as the reference.
+"""
+import argparse
+import random
+import string
+import time
+from typing import List, Tuple
+
+from app.utils.match_scoring import SourceScorer, _rapidfuzz, score_match
+
+WORDS = ["love", "night", "heart", "fire", "dance", "dream", "rain", "light", "gold",
+         "summer", "river", "home", "wild", "blue", "ghost", "echo", "storm", "city"]
+DECORATIONS = ["(Official Video)", "(Lyrics)", "[HD]", "(Live)", "- Remastered 2011",
+               "(Audio)", "ft. Someone", "| Official Music Video", "(Cover)", ""]
+
+
+def _phrase(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words)).title()
+
+
+def _channel(rng: random.Random) -> str:
+    return "".join(rng.choice(string.ascii_letters) for _ in range(rng.randint(5, 14)))
+
+
+def make_dataset(tracks: int, candidates: int, seed: int = 7):
+    rng = random.Random(seed)
+    dataset = []
+    for _ in range(tracks):
+        title = _phrase(rng, rng.randint(1, 4))
+        artist = _phrase(rng, rng.randint(1, 2))
+
+        pool: List[Tuple[str, str]] = []
+        for _ in range(candidates - 1):
+            pool.append((f"{_phrase(rng, rng.randint(1, 5))} {rng.choice(DECORATIONS)}", _channel(rng)))
+        pool.insert(rng.randrange(candidates), (f"{artist} - {title} {rng.choice(DECORATIONS)}", f"{artist}VEVO"))
+
+        dataset.append((title, artist, pool))
+    return dataset
+
+
+def reference_best(title: str, artist: str, pool: List[Tuple[str, str]]) -> Tuple[int, float]:
+    best_index, best_score = -1, -1.0
+    for index, (candidate_title, candidate_channel) in enumerate(pool):
+        score = score_match(title, artist, candidate_title, candidate_channel)
+        if score > best_score:
+            best_index, best_score = index, score
+    return best_index, best_score
+
+
+def timed(label: str, func, dataset, baseline: float = 0.0):
+    start = time.perf_counter()
+    results = [func(title, artist, pool) for title, artist, pool in dataset]
+    elapsed = time.perf_counter() - start
+
+    speedup = f"  {baseline / elapsed:5.1f}x" if baseline else ""
+    pairs = sum(len(pool) for _, _, pool in dataset)
+    print(f"{label:<28} {elapsed * 1000:9.1f} ms  {pairs / elapsed:12,.0f} pairs/s{speedup}")
+    return elapsed, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--tracks", type=int, default=500)
+    parser.add_argument("--candidates", type=int, default=25)
+    args = parser.parse_args()
+
+    dataset = make_dataset(args.tracks, args.candidates)
+    print(f"{args.tracks} tracks x {args.candidates} candidates\n")
+
+    baseline, expected = timed("score_match per pair", reference_best, dataset)
+
+    _, scored = timed(
+        "SourceScorer.score_all", lambda t, a, p: SourceScorer(t, a).score_all(p), dataset, baseline
+    )
+    assert [max(scores) for scores in scored] == [score for _, score in expected]
+
+    _, best = timed("SourceScorer.best (difflib)", lambda t, a, p: SourceScorer(t, a).best(p), dataset, baseline)
+    assert best == expected, "difflib batch scorer must match score_match exactly"
+
+    if _rapidfuzz is not None:
+        _, fuzzy = timed(
+            "SourceScorer.best (rapidfuzz)",
+            lambda t, a, p: SourceScorer(t, a, backend="rapidfuzz").best(p), dataset, baseline
+        )
+        agree = sum(1 for (i, _), (j, _) in zip(fuzzy, expected) if i == j)
+        print(f"\nrapidfuzz picks the reference winner for {agree}/{len(dataset)} tracks")
+    else:
+        print("\nrapidfuzz not installed; skipped the compiled backend")
+
+
+if __name__ == "__main__":
+    main()
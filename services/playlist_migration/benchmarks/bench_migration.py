@@ -0,0 +1,154 @@
+"""
+End-to-end migration benchmark against local fake connectors.
+
+Run from services/playlist_migration:
+
+    python -m benchmarks.bench_migration [--sizes 100,1000,10000] [--direction both]
+        [--latency-ms 20] [--jitter-ms 5] [--error-rate 0] [--throttle-rate 0]
+        [--concurrency 8] [--rate 0] [--verbose]
+
+Starts benchmarks.fake_connectors on a local port, points the service at
+it and runs migrate_youtube_to_spotify / migrate_spotify_to_youtube on
+synthetic playlists of each size. Every run uses fresh catalog tracks, so
+the search and match caches start cold.
+
+Per-track latency is the time to resolve one source track (cache lookups
+plus every search it needed). Upstream calls are counted by the fakes,
+retries and injected failures included.
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import socket
+import sys
+import time
+from typing import Any, Dict, List
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def _configure_service(base_url: str, args):
+    # Settings are read at import time, so this must run before importing app.*
+    os.environ["SPOTIFY_CONNECTOR_URL"] = base_url
+    os.environ["YOUTUBE_CONNECTOR_URL"] = base_url
+    os.environ["SPOTIFY_CONNECTOR_CALLS_PER_SECOND"] = str(args.rate)
+    os.environ["YOUTUBE_CONNECTOR_CALLS_PER_SECOND"] = str(args.rate)
+    os.environ["MIGRATION_MAX_CONCURRENCY"] = str(args.concurrency)
+    os.environ["HTTP_POOL_SIZE"] = str(max(args.concurrency, 8))
+    # Measure throughput, not quota deferral: 10k tracks need 1.5M units
+    os.environ["YOUTUBE_DAILY_QUOTA_UNITS"] = str(10 ** 9)
+
+
+async def _run(direction: str, size: int, offset: int, args) -> Dict[str, Any]:
+    from app.models.migration_models import SpotifyToYouTubeRequest, YouTubeToSpotifyRequest
+    from app.routers.migrate import migrate_spotify_to_youtube, migrate_youtube_to_spotify
+
+    playlist_id = f"bench-{offset}-{size}"
+    if direction == "youtube-to-spotify":
+        body = YouTubeToSpotifyRequest(user_id="bench", source_youtube_playlist_id=playlist_id,
+                                       max_concurrency=args.concurrency)
+        response = await migrate_youtube_to_spotify(body)
+    else:
+        body = SpotifyToYouTubeRequest(user_id="bench", source_playlist_id=playlist_id,
+                                       max_concurrency=args.concurrency)
+        response = await migrate_spotify_to_youtube(body)
+    return json.loads(response.body)
+
+
+async def _bench(args):
+    from app.services.migration_pipeline import MigrationPipeline
+    from app.utils.http_pool import http_pool
+    from benchmarks.fake_connectors import stats
+
+    # Time every track resolution
+    latencies: List[float] = []
+    resolve = MigrationPipeline._resolve
+
+    async def timed_resolve(self, item):
+        start = time.perf_counter()
+        try:
+            return await resolve(self, item)
+        finally:
+            latencies.append(time.perf_counter() - start)
+
+    MigrationPipeline._resolve = timed_resolve
+
+    directions = ["youtube-to-spotify", "spotify-to-youtube"] if args.direction == "both" else [args.direction]
+    print(f"{'direction':<20} {'tracks':>7} {'added':>7} {'seconds':>8} {'tracks/s':>9} "
+          f"{'p50 ms':>8} {'p99 ms':>8} {'searches':>9} {'writes':>7} {'calls':>7} {'429':>5} {'5xx':>5}")
+
+    offset = 0
+    try:
+        for direction in directions:
+            for size in args.sizes:
+                latencies.clear()
+                stats.clear()
+
+                # The clients log every call; keep the report readable
+                with open(os.devnull, "w") as devnull, \
+                        contextlib.redirect_stdout(sys.stdout if args.verbose else devnull):
+                    start = time.perf_counter()
+                    response = await _run(direction, size, offset, args)
+                    elapsed = time.perf_counter() - start
+                offset += size
+
+                searches = sum(n for endpoint, n in stats.items() if endpoint.endswith("/search"))
+                writes = sum(n for endpoint, n in stats.items() if endpoint.endswith(("/add", "/add-batch")))
+                calls = sum(n for endpoint, n in stats.items() if endpoint.startswith(("GET", "POST")))
+                print(f"{direction:<20} {size:>7} {response['summary']['added']:>7} {elapsed:>8.2f} "
+                      f"{size / elapsed:>9.1f} {_percentile(latencies, 50) * 1000:>8.1f} "
+                      f"{_percentile(latencies, 99) * 1000:>8.1f} {searches:>9} {writes:>7} {calls:>7} "
+                      f"{stats['429']:>5} {stats['500']:>5}")
+    finally:
+        MigrationPipeline._resolve = resolve
+        await http_pool.aclose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", default="100,1000,10000",
+                        type=lambda value: [int(size) for size in value.split(",") if size])
+    parser.add_argument("--direction", default="both",
+                        choices=["both", "youtube-to-spotify", "spotify-to-youtube"])
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    parser.add_argument("--jitter-ms", type=float, default=5.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--throttle-rate", type=float, default=0.0)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--rate", type=float, default=0.0, help="connector calls/s per client (0 = unlimited)")
+    parser.add_argument("--verbose", action="store_true", help="keep the service's per-call logging")
+    args = parser.parse_args()
+
+    port = _free_port()
+    _configure_service(f"http://127.0.0.1:{port}", args)
+
+    from benchmarks import fake_connectors
+
+    fake_connectors.config = fake_connectors.FakeConfig(
+        args.latency_ms, args.jitter_ms, args.error_rate, args.throttle_rate
+    )
+    server = fake_connectors.serve("127.0.0.1", port)
+    print(f"fake connectors on :{port}  latency {args.latency_ms}±{args.jitter_ms} ms  "
+          f"errors {args.error_rate:.0%}  429s {args.throttle_rate:.0%}  concurrency {args.concurrency}\n")
+
+    try:
+        asyncio.run(_bench(args))
+    finally:
+        server.should_exit = True
+
+
+if __name__ == "__main__":
+    main()
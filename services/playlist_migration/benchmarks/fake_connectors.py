@@ -0,0 +1,284 @@
+"""
+Local stand-ins for the Spotify and YouTube connectors, for benchmarks.
+
+One FastAPI app serves both contracts (/music/... and /youtube/...) over
+a synthetic catalog, so migrations can run end to end without accounts.
+Playlist ids encode their contents: "bench-<offset>-<size>" holds catalog
+tracks offset .. offset+size-1, in order. Other playlists live in
+`playlists` (catalog numbers in order): tests may seed sources there, and
+playlists created through the fakes keep what was written to (and
+removed from) them, so a re-run reads its target back. Snapshot ids and
+ETags change whenever a playlist's contents do.
+
+Hot-path calls (searches and playlist writes) can be slowed down and made
+to fail: every call waits latency_ms (+/- jitter_ms), then answers 429
+with probability throttle_rate or 500 with probability error_rate.
+Every call is counted per endpoint in `stats`.
+"""
+import asyncio
+import hashlib
+import random
+import re
+import threading
+from collections import Counter
+from typing import Any, Dict, List
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+WORDS = ["love", "night", "heart", "fire", "dance", "dream", "rain", "light", "gold",
+         "summer", "river", "home", "wild", "blue", "ghost", "echo", "storm", "city"]
+
+_PLAYLIST = re.compile(r"^bench-(\d+)-(\d+)$")
+_TRACK_TOKEN = re.compile(r"trk(\d+)", re.IGNORECASE)
+_CATALOG_ID = re.compile(r"(?:spotify:track:sp|yt)(\d+)$")
+_ID_SEGMENT = re.compile(r"/playlist/[^/]+")
+
+
+class FakeConfig:
+    def __init__(self, latency_ms: float = 20.0, jitter_ms: float = 5.0,
+                 error_rate: float = 0.0, throttle_rate: float = 0.0, seed: int = 7):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.rng = random.Random(seed)
+
+
+config = FakeConfig()
+stats: Counter = Counter()
+playlists: Dict[str, List[int]] = {}    # playlist id → catalog numbers
+app = FastAPI(title="Fake connectors")
+
+# ============================================
+# CATALOG
+# ============================================
+
+def _title(i: int) -> str:
+    return f"{WORDS[i % len(WORDS)].title()} {WORDS[(i // 7) % len(WORDS)].title()} trk{i}"
+
+
+def _artist(i: int) -> str:
+    return f"Artist {i % 997}"
+
+
+def spotify_track(i: int) -> Dict[str, Any]:
+    return {
+        "id": f"sp{i}",
+        "name": _title(i),
+        "artists": [{"name": _artist(i)}],
+        "uri": f"spotify:track:sp{i}",
+        "duration_ms": 180000 + (i * 1009) % 60000,
+        "external_ids": {"isrc": f"BENCH{i:07d}"},
+        "album": {"name": f"Album {i // 12}"},
+    }
+
+
+def youtube_video(i: int) -> Dict[str, Any]:
+    return {
+        "videoId": f"yt{i}",
+        "title": f"{_title(i)} (Official Video)",
+        "channel": f"{_artist(i)}VEVO",
+        "durationMs": 180000 + (i * 1009) % 60000 + 2000,
+    }
+
+
+def _noise(rng: random.Random, count: int) -> List[int]:
+    return [rng.randrange(10_000_000, 20_000_000) for _ in range(count)]
+
+
+def _playlist_range(playlist_id: str) -> List[int]:
+    if playlist_id in playlists:
+        return playlists[playlist_id]
+    match = _PLAYLIST.match(playlist_id)
+    if not match:
+        return []
+    offset, size = int(match.group(1)), int(match.group(2))
+    return list(range(offset, offset + size))
+
+
+def _version(playlist_id: str) -> str:
+    """Stands in for snapshot_id / ETag: changes whenever the contents do."""
+    digest = hashlib.sha1(repr(_playlist_range(playlist_id)).encode()).hexdigest()[:12]
+    return f"{playlist_id}-{digest}"
+
+
+def _create_playlist(prefix: str) -> str:
+    playlist_id = f"{prefix}-{len(playlists) + 1}"
+    playlists[playlist_id] = []
+    return playlist_id
+
+
+def _write(playlist_id: str, ids: List[str]):
+    """Append written URIs / videoIds to a playlist created here."""
+    if playlist_id in playlists:
+        playlists[playlist_id].extend(int(_CATALOG_ID.search(i).group(1)) for i in ids)
+
+
+def _remove(playlist_id: str, ids: List[str], every_copy: bool):
+    """Drop removed URIs / videoIds from a playlist created here."""
+    if playlist_id not in playlists:
+        return
+    tracks = playlists[playlist_id]
+    for number in (int(_CATALOG_ID.search(i).group(1)) for i in ids):
+        while number in tracks:
+            tracks.remove(number)
+            if not every_copy:
+                break
+
+
+def _search_hits(query: str, limit: int) -> List[int]:
+    """The catalog track named in the query (if any) plus unrelated tracks, limit in total."""
+    rng = random.Random(query)
+    match = _TRACK_TOKEN.search(query)
+    hits = [int(match.group(1))] if match else []
+    return (hits + _noise(rng, limit))[:limit]
+
+# ============================================
+# FAULT INJECTION
+# ============================================
+
+def _endpoint(request: Request) -> str:
+    return f"{request.method} {_ID_SEGMENT.sub('/playlist/{id}', request.url.path)}"
+
+
+def _hot(request: Request) -> bool:
+    path = request.url.path
+    return path.endswith("/search") or path.endswith("/add") or path.endswith("/add-batch")
+
+
+@app.middleware("http")
+async def inject_faults(request: Request, call_next):
+    endpoint = _endpoint(request)
+    stats[endpoint] += 1
+
+    if _hot(request):
+        delay = config.latency_ms + config.rng.uniform(-config.jitter_ms, config.jitter_ms)
+        await asyncio.sleep(max(0.0, delay) / 1000)
+
+        roll = config.rng.random()
+        if roll < config.throttle_rate:
+            stats["429"] += 1
+            return JSONResponse({"error": "rate limited"}, status_code=429, headers={"Retry-After": "0"})
+        if roll < config.throttle_rate + config.error_rate:
+            stats["500"] += 1
+            return JSONResponse({"error": "injected failure"}, status_code=500)
+
+    return await call_next(request)
+
+# ============================================
+# SPOTIFY CONNECTOR
+# ============================================
+
+@app.get("/music/search")
+async def spotify_search(q: str, limit: int = 10):
+    if q.lower().startswith("isrc:"):
+        code = q[5:].strip().upper()
+        return [spotify_track(int(code[5:]))] if code.startswith("BENCH") else []
+    return [spotify_track(i) for i in _search_hits(q, limit)]
+
+
+@app.get("/music/playlists")
+async def spotify_playlists(limit: int = 50, offset: int = 0):
+    return {"items": [], "next": None}
+
+
+@app.post("/music/playlists")
+async def spotify_create_playlist(request: Request):
+    return {"id": _create_playlist("fake-sp")}
+
+
+@app.get("/music/playlist/{playlist_id}")
+async def spotify_playlist(playlist_id: str):
+    return {"id": playlist_id, "name": playlist_id, "description": "", "snapshot_id": f"snap-{_version(playlist_id)}",
+            "tracks": {"total": len(_playlist_range(playlist_id))}}
+
+
+@app.get("/music/playlist/{playlist_id}/tracks")
+async def spotify_playlist_tracks(playlist_id: str):
+    return {"items": [{"track": spotify_track(i)} for i in _playlist_range(playlist_id)]}
+
+
+@app.post("/music/playlist/{playlist_id}/add")
+async def spotify_add(playlist_id: str, request: Request):
+    body = await request.json()
+    stats["spotify tracks written"] += len(body.get("uris", []))
+    _write(playlist_id, body.get("uris", []))
+    return {"snapshot_id": f"snap-{_version(playlist_id)}"}
+
+
+@app.post("/music/playlist/{playlist_id}/remove")
+async def spotify_remove(playlist_id: str, request: Request):
+    body = await request.json()
+    _remove(playlist_id, body.get("uris", []), every_copy=True)
+    return {"snapshot_id": f"snap-{_version(playlist_id)}"}
+
+# ============================================
+# YOUTUBE CONNECTOR
+# ============================================
+
+@app.get("/youtube/search")
+async def youtube_search(q: str, limit: int = 25):
+    return {"results": [youtube_video(i) for i in _search_hits(q, limit)]}
+
+
+@app.get("/youtube/playlists")
+async def youtube_playlists():
+    return []
+
+
+@app.post("/youtube/playlists/create")
+async def youtube_create_playlist(request: Request):
+    return {"playlistId": _create_playlist("fake-yt")}
+
+
+@app.get("/youtube/playlist/{playlist_id}/items")
+async def youtube_playlist_items(playlist_id: str):
+    return [youtube_video(i) for i in _playlist_range(playlist_id)]
+
+
+@app.get("/youtube/playlist/{playlist_id}/version")
+async def youtube_playlist_version(playlist_id: str):
+    return {"etag": f"etag-{_version(playlist_id)}", "itemCount": len(_playlist_range(playlist_id))}
+
+
+@app.post("/youtube/playlist/{playlist_id}/add-batch")
+async def youtube_add_batch(playlist_id: str, request: Request):
+    body = await request.json()
+    video_ids = body.get("videoIds", [])
+    stats["youtube videos written"] += len(video_ids)
+    _write(playlist_id, video_ids)
+    return {"results": [{"videoId": v, "status": "added"} for v in video_ids]}
+
+
+@app.get("/youtube/quota")
+async def youtube_quota():
+    # Nothing spent outside the service under test
+    return {"used": 0}
+
+
+@app.post("/youtube/playlist/{playlist_id}/remove-batch")
+async def youtube_remove_batch(playlist_id: str, request: Request):
+    body = await request.json()
+    _remove(playlist_id, body.get("videoIds", []), every_copy=False)
+    return {"results": [{"videoId": v, "status": "removed"} for v in body.get("videoIds", [])]}
+
+# ============================================
+# SERVER
+# ============================================
+
+def serve(host: str, port: int):
+    """
+    Run the fake connectors on their own thread and event loop, so their
+    latency never blocks the migration under test. Returns once listening.
+    """
+    import uvicorn
+
+    server = uvicorn.Server(uvicorn.Config(app, host=host, port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, name="fake-connectors", daemon=True)
+    thread.start()
+    while not server.started:
+        if not thread.is_alive():
+            raise RuntimeError(f"Fake connectors failed to start on {host}:{port}")
+        threading.Event().wait(0.01)
+    return server
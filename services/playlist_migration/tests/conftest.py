@@ -0,0 +1,50 @@
+import asyncio
+import os
+import sys
+
+import pytest
+
+# Settings are read at import time, so this must run before importing app.*
+os.environ["SPOTIFY_CONNECTOR_CALLS_PER_SECOND"] = "0"
+os.environ["YOUTUBE_CONNECTOR_CALLS_PER_SECOND"] = "0"
+os.environ["ADD_RETRY_BACKOFF_SECONDS"] = "0"
+os.environ["HTTP_RETRY_BACKOFF_SECONDS"] = "0"
+os.environ["MATCH_CACHE_PERSIST"] = "false"
+# Small windows, so a run can be cut off between two of them
+os.environ["SPOTIFY_ADD_BATCH_SIZE"] = "10"
+os.environ["YOUTUBE_ADD_BATCH_SIZE"] = "10"
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx  # noqa: E402
+
+from benchmarks import fake_connectors  # noqa: E402
+
+
+@pytest.fixture
+def connectors():
+    """
+    The fake connectors, served in-process through the shared connection
+    pool, with empty caches and a fresh YouTube quota.
+    """
+    from app.services.match_cache import match_cache
+    from app.services.spotify_client import SpotifyClient
+    from app.services.youtube_client import YouTubeClient
+    from app.utils.http_pool import http_pool
+
+    fake_connectors.config.latency_ms = fake_connectors.config.jitter_ms = 0
+    fake_connectors.config.error_rate = fake_connectors.config.throttle_rate = 0
+    fake_connectors.stats.clear()
+    fake_connectors.playlists.clear()
+    match_cache.memory.clear()
+    SpotifyClient.search_cache.clear()
+    YouTubeClient.search_cache.clear()
+    quota = YouTubeClient.quota
+    daily_limit = quota.daily_limit
+    quota.days.clear()
+    quota.external.clear()
+
+    http_pool._client = httpx.AsyncClient(transport=httpx.ASGITransport(app=fake_connectors.app))
+    yield fake_connectors
+    asyncio.run(http_pool.aclose())
+    quota.daily_limit = daily_limit
@@ -0,0 +1,62 @@
+import asyncio
+from typing import List
+
+from fastapi import HTTPException
+
+from app.models.migration_models import YouTubeToSpotifyRequest
+from app.services.migration_runner import collect_response, iter_youtube_to_spotify
+from app.services.playlist_writer import write_in_batches
+from app.utils.http_pool import WriteRejected
+
+
+def test_a_rejected_batch_is_split_down_to_the_bad_id():
+    calls = []
+
+    async def writer(ids: List[str]) -> List[bool]:
+        calls.append(ids)
+        if "bad" in ids:
+            raise WriteRejected("400: invalid id")
+        return [True] * len(ids)
+
+    ids = ["a", "b", "c", "bad", "d", "e", "f", "g"]
+    flags = asyncio.run(write_in_batches(ids, writer, 4))
+
+    assert flags == [True, True, True, False, True, True, True, True]
+    # The clean second batch went out whole
+    assert ["d", "e", "f", "g"] in calls
+    assert len(calls) == 6
+
+
+def test_a_failed_batch_is_not_sent_again():
+    calls = []
+
+    async def writer(ids: List[str]) -> List[bool]:
+        calls.append(ids)
+        raise Exception("503: connector unavailable")
+
+    flags = asyncio.run(write_in_batches(["a", "b", "c"], writer, 10))
+
+    # It may have been applied; only RetryQueue replays it, after a re-read
+    assert flags == [False, False, False]
+    assert calls == [["a", "b", "c"]]
+
+
+def test_only_the_rejected_track_is_reported_unadded(connectors, monkeypatch):
+    write = connectors._write
+
+    def reject_one(playlist_id: str, ids: List[str]):
+        if "spotify:track:sp3005" in ids:
+            raise HTTPException(status_code=400, detail="Invalid track uri")
+        write(playlist_id, ids)
+
+    monkeypatch.setattr(connectors, "_write", reject_one)
+    body = YouTubeToSpotifyRequest(user_id="batches-1", source_youtube_playlist_id="bench-3000-20")
+    response = asyncio.run(collect_response(iter_youtube_to_spotify(body)))
+
+    assert [m["added"] for m in response["matches"]] == [i != 5 for i in range(20)]
+    assert response["summary"]["added"] == 19
+    assert response["summary"]["failed"] == 1
+    expected = [i for i in range(3000, 3020) if i != 3005]
+    assert connectors.playlists[response["target_playlist_id"]] == expected
+    # Two windows of 10, the first bisected around the bad track
+    assert connectors.stats["POST /music/playlist/{id}/add"] < 20
@@ -0,0 +1,34 @@
+import asyncio
+
+from app.models.migration_models import YouTubeToSpotifyRequest
+from app.services.migration_runner import collect_response, iter_youtube_to_spotify
+
+
+def to_spotify(user_id: str, playlist_id: str, **options) -> YouTubeToSpotifyRequest:
+    return YouTubeToSpotifyRequest(user_id=user_id, source_youtube_playlist_id=playlist_id, **options)
+
+
+def test_keep_first_reports_copies_as_duplicates(connectors):
+    connectors.playlists["mix"] = [5, 6, 5, 7, 6, 5]
+
+    body = to_spotify("dupes-1", "mix", duplicates="keep_first")
+    response = asyncio.run(collect_response(iter_youtube_to_spotify(body)))
+
+    summary = response["summary"]
+    assert summary["duplicates_skipped"] == 3
+    assert summary["failed"] == 0
+    assert [m["duplicate_of"] for m in response["matches"]] == [None, None, 0, None, 1, 0]
+    assert [m["added"] for m in response["matches"]] == [True, True, False, True, False, False]
+    # One lookup per distinct song, one copy of each in the target
+    assert summary["timings"]["match_cache"] == {"miss": 3}
+    assert connectors.playlists[response["target_playlist_id"]] == [5, 6, 7]
+
+
+def test_keep_all_writes_every_copy_from_one_search(connectors):
+    connectors.playlists["mix"] = [5, 6, 5]
+
+    response = asyncio.run(collect_response(iter_youtube_to_spotify(to_spotify("dupes-2", "mix"))))
+
+    assert response["summary"]["duplicates_skipped"] == 0
+    assert response["summary"]["timings"]["match_cache"] == {"miss": 2}
+    assert connectors.playlists[response["target_playlist_id"]] == [5, 6, 5]
@@ -0,0 +1,32 @@
+import asyncio
+
+from app.models.migration_models import SpotifyToYouTubeRequest, YouTubeToSpotifyRequest
+from app.services.migration_runner import collect_response, iter_spotify_to_youtube, iter_youtube_to_spotify
+
+
+def test_reverse_migration_reuses_the_forward_match(connectors):
+    forward = YouTubeToSpotifyRequest(user_id="exact-1", source_youtube_playlist_id="bench-600-10", min_score=50)
+    asyncio.run(collect_response(iter_youtube_to_spotify(forward)))
+    connectors.stats.clear()
+
+    back = SpotifyToYouTubeRequest(user_id="exact-1", source_playlist_id="bench-600-10", min_score=50)
+    response = asyncio.run(collect_response(iter_spotify_to_youtube(back)))
+
+    assert response["summary"]["added"] == 10
+    assert response["summary"]["timings"]["match_cache"] == {"exact_hit": 10}
+    assert connectors.stats["GET /youtube/search"] == 0
+
+
+def test_matches_under_the_threshold_are_not_reused_as_exact(connectors):
+    # Nothing reaches 101: every forward winner is reported unmatched
+    forward = YouTubeToSpotifyRequest(user_id="exact-2", source_youtube_playlist_id="bench-700-10", min_score=101)
+    response = asyncio.run(collect_response(iter_youtube_to_spotify(forward)))
+    assert response["summary"]["added"] == 0
+    connectors.stats.clear()
+
+    back = SpotifyToYouTubeRequest(user_id="exact-2", source_playlist_id="bench-700-10")
+    response = asyncio.run(collect_response(iter_spotify_to_youtube(back)))
+
+    assert response["summary"]["added"] == 10
+    assert "exact_hit" not in response["summary"]["timings"]["match_cache"]
+    assert connectors.stats["GET /youtube/search"] >= 10
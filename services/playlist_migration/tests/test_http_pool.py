@@ -0,0 +1,67 @@
+import asyncio
+
+import httpx
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.utils.http_pool import ConnectorPool, http_pool
+
+
+def make_pool(statuses):
+    """A pool whose client answers with statuses, in turn, and records the calls."""
+    pool = ConnectorPool(pool_size=2, keepalive=True, connect_timeout=1, read_timeout=1,
+                         bulk_read_timeout=1, retries=2, backoff=0)
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request.method)
+        return httpx.Response(statuses[min(len(calls), len(statuses)) - 1])
+
+    pool._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return pool, calls
+
+
+def test_every_call_shares_one_client_until_closed():
+    pool = ConnectorPool(pool_size=2, keepalive=True, connect_timeout=1, read_timeout=1,
+                         bulk_read_timeout=1, retries=0, backoff=0)
+    client = pool.client
+    assert pool.client is client
+
+    asyncio.run(pool.aclose())
+    assert client.is_closed
+    assert pool.client is not client
+
+
+def test_gets_are_retried_on_throttling_and_server_errors():
+    pool, calls = make_pool([429, 503, 200])
+
+    response = asyncio.run(pool.get("http://connector/music/search"))
+
+    assert response.status_code == 200
+    assert calls == ["GET", "GET", "GET"]
+
+
+def test_gets_give_up_after_the_configured_retries():
+    pool, calls = make_pool([503])
+
+    response = asyncio.run(pool.get("http://connector/music/search"))
+
+    assert response.status_code == 503
+    assert len(calls) == 3
+
+
+def test_writes_are_never_replayed():
+    pool, calls = make_pool([503, 200])
+
+    response = asyncio.run(pool.post("http://connector/music/playlist/p/add", json={"uris": []}))
+
+    assert response.status_code == 503
+    assert calls == ["POST"]
+
+
+def test_the_shared_pool_is_closed_with_the_app():
+    with TestClient(app):
+        client = http_pool.client
+
+    assert client.is_closed
+    assert http_pool._client is None
@@ -0,0 +1,54 @@
+import asyncio
+
+from app.models.migration_models import YouTubeToSpotifyRequest
+from app.services.migration_runner import collect_response, iter_youtube_to_spotify
+
+
+def sync(user_id: str, playlist_id: str, **options):
+    body = YouTubeToSpotifyRequest(user_id=user_id, source_youtube_playlist_id=playlist_id,
+                                   incremental=True, **options)
+    return asyncio.run(collect_response(iter_youtube_to_spotify(body)))
+
+
+def test_only_new_tracks_are_matched_and_added(connectors):
+    connectors.playlists["yt-source-1"] = list(range(4000, 4010))
+    first = sync("delta-1", "yt-source-1")
+    target = first["target_playlist_id"]
+    assert first["summary"]["added"] == 10
+
+    connectors.playlists["yt-source-1"] += [4010, 4011, 4012]
+    connectors.stats.clear()
+    second = sync("delta-1", "yt-source-1")
+
+    assert second["target_playlist_id"] == target
+    assert second["summary"]["resumed_from_checkpoint"] == 10
+    assert connectors.stats["GET /music/search"] == 3
+    assert connectors.stats["POST /music/playlists"] == 0
+    assert connectors.playlists[target] == list(range(4000, 4013))
+
+
+def test_an_unchanged_source_is_skipped_before_reading_it(connectors):
+    connectors.playlists["yt-source-2"] = list(range(4100, 4110))
+    first = sync("delta-2", "yt-source-2")
+
+    connectors.stats.clear()
+    second = sync("delta-2", "yt-source-2")
+
+    assert second["status"] == "unchanged"
+    assert second["target_playlist_id"] == first["target_playlist_id"]
+    assert connectors.stats["GET /youtube/playlist/{id}/version"] == 1
+    assert connectors.stats["GET /youtube/playlist/{id}/items"] == 0
+    assert connectors.stats["GET /music/search"] == 0
+
+
+def test_deleted_source_tracks_are_removed_from_the_target(connectors):
+    connectors.playlists["yt-source-3"] = list(range(4200, 4210))
+    first = sync("delta-3", "yt-source-3")
+
+    connectors.playlists["yt-source-3"].remove(4203)
+    connectors.playlists["yt-source-3"].append(4210)
+    second = sync("delta-3", "yt-source-3", remove_deleted=True)
+
+    assert second["summary"]["removed"] == 1
+    assert second["summary"]["added"] == 10
+    assert connectors.playlists[first["target_playlist_id"]] == [i for i in range(4200, 4211) if i != 4203]
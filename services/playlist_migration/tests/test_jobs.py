@@ -0,0 +1,72 @@
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.storage.database import SqliteDatabase
+from app.storage.job_store import UnknownUser, job_store
+
+
+def wait_for(client: TestClient, job_id: int) -> dict:
+    for _ in range(200):
+        job = client.get(f"/migrate/jobs/{job_id}").json()
+        if job["status"] in ("completed", "failed"):
+            return job
+        time.sleep(0.02)
+    raise AssertionError(f"job {job_id} did not finish")
+
+
+def test_job_runs_in_the_background_and_stores_every_track(connectors):
+    with TestClient(app) as client:
+        queued = client.post("/migrate/jobs/youtube-to-spotify",
+                             json={"user_id": "jobs-1", "source_youtube_playlist_id": "bench-1000-25"})
+        assert queued.status_code == 202
+
+        job = wait_for(client, queued.json()["job_id"])
+
+    assert job["status"] == "completed"
+    assert job["progress"]["added"] == 25
+    assert len(job["playlists"][0]["matches"]) == 25
+    assert connectors.playlists[job["playlists"][0]["target_playlist_id"]] == list(range(1000, 1025))
+
+
+def test_bulk_job_defers_playlists_over_its_budget_before_creating_them(connectors):
+    with TestClient(app) as client:
+        # Room for the 2-track playlist (352 units), not the 20-track one
+        queued = client.post("/migrate/jobs/bulk/spotify-to-youtube", json={
+            "user_id": "jobs-2", "source_playlist_ids": ["bench-2000-20", "bench-2100-2"], "quota_budget": 1000
+        })
+        job = wait_for(client, queued.json()["job_id"])
+
+    over, fits = job["playlists"]
+    assert over["status"] == "deferred"
+    assert over["target_playlist_id"] is None
+    assert fits["status"] == "completed"
+    assert connectors.stats["POST /youtube/playlists/create"] == 1
+    assert connectors.playlists[fits["target_playlist_id"]] == [2100, 2101]
+
+
+def test_unknown_user_is_a_404(connectors, monkeypatch):
+    def unknown(user_id):
+        raise UnknownUser(f"Unknown MusicConnect user: {user_id}")
+
+    monkeypatch.setattr(job_store, "_user_key", unknown)
+    with TestClient(app) as client:
+        response = client.post("/migrate/jobs/youtube-to-spotify",
+                               json={"user_id": "nobody@example.com", "source_youtube_playlist_id": "bench-0-5"})
+
+    assert response.status_code == 404
+    assert "nobody@example.com" in response.json()["detail"]
+
+
+def test_execute_each_keeps_all_rows_or_none():
+    database = SqliteDatabase()
+    database.create_tables(["CREATE TABLE migrations.t (id INTEGER PRIMARY KEY, name TEXT NOT NULL)"])
+
+    with pytest.raises(Exception):
+        database.execute_each("INSERT INTO migrations.t (id, name) VALUES (?, ?)", [(1, "a"), (2, None), (3, "c")])
+    assert database.execute("SELECT COUNT(*) FROM migrations.t") == [(0,)]
+
+    database.execute_each("INSERT INTO migrations.t (id, name) VALUES (?, ?)", [(1, "a"), (2, "b")])
+    assert database.execute("SELECT name FROM migrations.t ORDER BY id") == [("a",), ("b",)]
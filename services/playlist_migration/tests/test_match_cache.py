@@ -0,0 +1,93 @@
+import asyncio
+
+from app.models.migration_models import YouTubeToSpotifyRequest
+from app.services.migration_pipeline import SPOTIFY_FIELDS, MigrationPipeline, source_items
+from app.services.migration_runner import collect_response, iter_youtube_to_spotify
+
+
+def migrate(user_id: str, playlist_id: str, **options):
+    body = YouTubeToSpotifyRequest(user_id=user_id, source_youtube_playlist_id=playlist_id, **options)
+    return asyncio.run(collect_response(iter_youtube_to_spotify(body)))
+
+
+def test_other_users_reuse_cached_matches(connectors):
+    migrate("cache-1", "bench-800-10")
+    connectors.stats.clear()
+
+    response = migrate("cache-2", "bench-800-10")
+
+    assert response["summary"]["added"] == 10
+    assert connectors.stats["GET /music/search"] == 0
+
+
+def test_a_higher_threshold_searches_again(connectors):
+    migrate("cache-3", "bench-900-10", min_score=50)
+    connectors.stats.clear()
+
+    response = migrate("cache-4", "bench-900-10", min_score=99)
+
+    lookups = response["summary"]["timings"]["match_cache"]
+    weak = lookups.get("below_threshold", 0)
+    assert weak > 0
+    assert connectors.stats["GET /music/search"] >= weak
+    # The wider searches find the exact titles the first run settled without
+    assert response["summary"]["added"] == 10
+
+
+# -----------------------
+# Adaptive search width
+# -----------------------
+
+class Catalog:
+    """A search backend that answers every query with `limit` tracks, none close to the source."""
+
+    def __init__(self, hit_at: int = 0):
+        self.calls = []
+        self.hit_at = hit_at
+
+    async def search(self, query: str, limit: int):
+        self.calls.append(limit)
+        tracks = [{"id": f"other{i}", "title": f"Unrelated {i}", "artist": "Nobody", "uri": f"spotify:track:other{i}"}
+                  for i in range(limit)]
+        if self.hit_at and limit >= self.hit_at:
+            tracks[-1] = {"id": "hit", "title": "Blue River", "artist": "Artist 1", "uri": "spotify:track:hit"}
+        return tracks
+
+
+async def no_writes(ids):
+    return [True] * len(ids)
+
+
+def match(catalog: Catalog, title: str = "Blue River", artist: str = "Artist 1"):
+    pipeline = MigrationPipeline(catalog.search, SPOTIFY_FIELDS, no_writes, 10, 1, 70.0, search_limits=[5, 20])
+    items = source_items([{"videoId": "v1", "title": title, "channel": artist}], "youtube",
+                         id_key="videoId", track_id_key="videoId", artist_key="channel", duration_key="durationMs")
+
+    async def run():
+        return [result async for result in pipeline.run(items)]
+
+    return asyncio.run(run())[0]
+
+
+def test_search_widens_until_the_threshold(connectors):
+    catalog = Catalog(hit_at=20)
+
+    result = match(catalog)
+
+    assert catalog.calls == [5, 20]
+    assert result.matched_track_id == "hit" and result.added
+
+
+def test_a_weak_match_is_searched_again_on_the_next_run(connectors):
+    catalog = Catalog()
+
+    first = match(catalog)
+    assert not first.added
+    assert catalog.calls[:2] == [5, 20]
+    searches = len(catalog.calls)
+
+    catalog.hit_at = 20
+    second = match(catalog)
+
+    assert len(catalog.calls) > searches
+    assert second.matched_track_id == "hit" and second.added
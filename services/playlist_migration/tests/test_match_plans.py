@@ -0,0 +1,60 @@
+import asyncio
+
+from app.models.migration_models import PlanCommitRequest, YouTubeToSpotifyRequest
+from app.services.match_plans import build_youtube_to_spotify_plan, iter_commit_plan
+from app.services.migration_runner import collect_response
+from app.storage.plan_store import plan_store
+
+
+def build_plan(user_id: str, playlist_id: str):
+    body = YouTubeToSpotifyRequest(user_id=user_id, source_youtube_playlist_id=playlist_id, use_search_cache=False)
+    return asyncio.run(build_youtube_to_spotify_plan(body))
+
+
+def commit(plan_id: int, **options):
+    return asyncio.run(collect_response(iter_commit_plan(plan_store.get_plan(plan_id), PlanCommitRequest(**options))))
+
+
+def test_plan_writes_nothing(connectors):
+    plan = build_plan("plans-1", "bench-300-20")
+
+    assert plan["status"] == "planned"
+    assert len(plan["tracks"]) == 20
+    assert all(t["candidates"][0]["track_id"] == f"sp{300 + t['index']}" for t in plan["tracks"])
+    assert connectors.stats["POST /music/playlists"] == 0
+    assert connectors.stats["POST /music/playlist/{id}/add"] == 0
+
+
+def test_commit_writes_the_plan_without_searching(connectors):
+    plan = build_plan("plans-2", "bench-400-20")
+    connectors.stats.clear()
+
+    runner_up = plan["tracks"][1]["candidates"][1]["track_id"]
+
+    response = commit(plan["plan_id"], overrides={0: None, 1: runner_up})
+
+    assert connectors.stats["GET /music/search"] == 0
+    assert response["summary"]["added"] == 19
+    assert response["matches"][1]["matched_track_id"] == runner_up
+    assert connectors.playlists[response["target_playlist_id"]] == [int(runner_up[2:])] + list(range(402, 420))
+
+    stored = plan_store.get_plan(plan["plan_id"])
+    assert stored["status"] == "committed"
+    assert stored["target_playlist_id"] == response["target_playlist_id"]
+
+
+def test_commit_again_reuses_the_target(connectors):
+    plan = build_plan("plans-3", "bench-500-20")
+    first = commit(plan["plan_id"], min_score=101)
+    assert first["summary"]["added"] == 0
+
+    second = commit(plan["plan_id"])
+
+    assert second["target_playlist_id"] == first["target_playlist_id"]
+    assert connectors.stats["POST /music/playlists"] == 1
+    assert connectors.playlists[second["target_playlist_id"]] == list(range(500, 520))
+
+    # A third commit finds everything already there
+    third = commit(plan["plan_id"])
+    assert third["summary"]["added"] == 20
+    assert connectors.playlists[second["target_playlist_id"]] == list(range(500, 520))
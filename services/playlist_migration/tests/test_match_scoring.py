@@ -0,0 +1,34 @@
+import pytest
+
+from app.utils.match_scoring import SourceScorer, score_match
+from benchmarks.bench_match_scoring import make_dataset, reference_best
+
+DATASET = make_dataset(100, 25)
+
+
+def test_difflib_batch_scores_match_score_match_exactly():
+    for title, artist, pool in DATASET:
+        scorer = SourceScorer(title, artist)
+        assert scorer.score_all(pool) == [score_match(title, artist, t, c) for t, c in pool]
+        assert scorer.best(pool) == reference_best(title, artist, pool)
+
+
+def test_rapidfuzz_picks_the_same_candidates_as_difflib():
+    pytest.importorskip("rapidfuzz")
+
+    for title, artist, pool in DATASET:
+        difflib_scores = SourceScorer(title, artist).score_all(pool)
+        rapidfuzz_scores = SourceScorer(title, artist, "rapidfuzz").score_all(pool)
+        # The InDel ratio counts the longest common subsequence, which difflib's
+        # matching blocks never exceed: a pair can score higher, never lower
+        assert all(r >= d - 1e-9 for r, d in zip(rapidfuzz_scores, difflib_scores))
+
+        index, score = SourceScorer(title, artist, "rapidfuzz").best(pool)
+        reference_index, reference_score = reference_best(title, artist, pool)
+        assert index == reference_index
+        assert score == pytest.approx(reference_score)
+
+
+def test_an_unknown_backend_is_refused():
+    with pytest.raises(ValueError):
+        SourceScorer("title", "artist", backend="levenshtein")
@@ -0,0 +1,67 @@
+import asyncio
+
+from app.models.migration_models import PlanCommitRequest, SpotifyToYouTubeRequest
+from app.services.match_plans import build_spotify_to_youtube_plan, iter_commit_plan
+from app.services.migration_runner import collect_response, iter_spotify_to_youtube
+from app.services.youtube_client import YouTubeClient
+from app.storage.plan_store import plan_store
+from app.utils.quota import YOUTUBE_UNIT_COSTS
+
+
+def to_youtube(user_id: str, playlist_id: str, **options) -> SpotifyToYouTubeRequest:
+    return SpotifyToYouTubeRequest(user_id=user_id, source_playlist_id=playlist_id, **options)
+
+
+def commit(plan_id: int, **options):
+    return asyncio.run(collect_response(iter_commit_plan(plan_store.get_plan(plan_id), PlanCommitRequest(**options))))
+
+
+def test_tracks_over_the_quota_are_deferred_then_resumed(connectors):
+    # Room for the playlist and a handful of searches and inserts, not all 30
+    YouTubeClient.quota.daily_limit = 1500
+
+    response = asyncio.run(collect_response(iter_spotify_to_youtube(to_youtube("quota-1", "bench-200-30"))))
+
+    summary = response["summary"]
+    assert 0 < summary["added"] < 30
+    assert summary["deferred"] == 30 - summary["added"]
+    assert summary["failed"] == 0
+    assert YouTubeClient.quota.used() <= 1500
+    assert sum(m["deferred"] for m in response["matches"]) == summary["deferred"]
+    assert not any(m["added"] for m in response["matches"] if m["deferred"])
+    target = response["target_playlist_id"]
+    assert len(connectors.playlists[target]) == summary["added"]
+
+    # The next day's quota picks up where the last run stopped
+    YouTubeClient.quota.days.clear()
+    YouTubeClient.quota.daily_limit = 10 ** 6
+    response = asyncio.run(collect_response(iter_spotify_to_youtube(to_youtube("quota-1", "bench-200-30"))))
+
+    assert response["target_playlist_id"] == target
+    assert response["summary"]["deferred"] == 0
+    assert connectors.playlists[target] == list(range(200, 230))
+
+
+def test_plan_commit_defers_inserts_over_the_quota(connectors):
+    plan = asyncio.run(build_spotify_to_youtube_plan(to_youtube("quota-2", "bench-600-20", use_search_cache=False)))
+    # The playlist and 5 inserts, nothing more
+    YouTubeClient.quota.days.clear()
+    YouTubeClient.quota.daily_limit = YOUTUBE_UNIT_COSTS["create_playlist"] + 5 * YOUTUBE_UNIT_COSTS["insert"]
+
+    response = commit(plan["plan_id"])
+
+    assert response["summary"]["added"] == 5
+    assert response["summary"]["deferred"] == 15
+    assert response["summary"]["failed"] == 0
+    assert response["summary"]["write_retries"]["recovered"] == 0
+    target = response["target_playlist_id"]
+    assert connectors.playlists[target] == list(range(600, 605))
+
+    # The next day's commit writes the rest to the same playlist
+    YouTubeClient.quota.days.clear()
+    YouTubeClient.quota.daily_limit = 10 ** 6
+    response = commit(plan["plan_id"])
+
+    assert response["target_playlist_id"] == target
+    assert response["summary"]["deferred"] == 0
+    assert connectors.playlists[target] == list(range(600, 620))
@@ -0,0 +1,78 @@
+import json
+from typing import List
+
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+
+from app.main import app
+from tests.test_jobs import wait_for
+
+
+@pytest.fixture
+def reject_sp6003(connectors, monkeypatch):
+    """Spotify refuses one track, so every migration has exactly one unmatched result."""
+    write = connectors._write
+
+    def reject(playlist_id: str, ids: List[str]):
+        if "spotify:track:sp6003" in ids:
+            raise HTTPException(status_code=400, detail="Invalid track uri")
+        write(playlist_id, ids)
+
+    monkeypatch.setattr(connectors, "_write", reject)
+    return connectors
+
+
+def migrate(client: TestClient, user_id: str, detail: str):
+    return client.post("/migrate/youtube-to-spotify", json={
+        "user_id": user_id, "source_youtube_playlist_id": "bench-6000-12", "detail": detail
+    }).json()
+
+
+def test_detail_levels_of_a_migration_response(reject_sp6003):
+    with TestClient(app) as client:
+        full = migrate(client, "detail-1", "full")
+        summary = migrate(client, "detail-2", "summary")
+        unmatched = migrate(client, "detail-3", "unmatched")
+
+    assert len(full["matches"]) == 12
+    assert "matches" not in summary
+    assert summary["summary"]["failed"] == 1
+    assert [(m["index"], m["source_title"]) for m in unmatched["matches"]] == [(3, full["matches"][3]["source_title"])]
+
+
+def test_the_stream_filters_track_records_by_detail(reject_sp6003):
+    with TestClient(app) as client:
+        response = client.post("/migrate/youtube-to-spotify/stream", json={
+            "user_id": "detail-4", "source_youtube_playlist_id": "bench-6000-12", "detail": "unmatched"
+        })
+
+    records = [json.loads(line) for line in response.text.splitlines()]
+    tracks = [r for r in records if r["type"] == "track"]
+    assert records[0]["type"] == "start" and records[-1]["type"] == "summary"
+    # Reported when its write fails, then again with the retried outcome
+    assert {r["index"] for r in tracks} == {3}
+    assert not tracks[-1]["added"]
+
+
+def test_job_results_come_in_pages(reject_sp6003):
+    with TestClient(app) as client:
+        queued = client.post("/migrate/jobs/youtube-to-spotify",
+                             json={"user_id": "detail-5", "source_youtube_playlist_id": "bench-6000-12"})
+        job = wait_for(client, queued.json()["job_id"])
+
+        pages, offset = [], 0
+        while offset is not None:
+            page = client.get(f"/migrate/jobs/{job['job_id']}", params={"offset": offset, "limit": 5}).json()
+            pages.append(page["playlists"][0]["matches"])
+            offset = page["page"]["next_offset"]
+
+        unmatched = client.get(f"/migrate/jobs/{job['job_id']}", params={"detail": "unmatched"}).json()
+        summary = client.get(f"/migrate/jobs/{job['job_id']}", params={"detail": "summary"}).json()
+
+    assert [len(p) for p in pages] == [5, 5, 2]
+    assert [m["index"] for p in pages for m in p] == list(range(12))
+    assert [m for p in pages for m in p] == job["playlists"][0]["matches"]
+    assert [m["index"] for m in unmatched["playlists"][0]["matches"]] == [3]
+    assert "matches" not in summary["playlists"][0]
+    assert summary["progress"]["added"] == 11
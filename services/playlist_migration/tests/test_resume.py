@@ -0,0 +1,73 @@
+import asyncio
+from collections import Counter
+
+import pytest
+
+from app.models.migration_models import SpotifyToYouTubeRequest, YouTubeToSpotifyRequest
+from app.services import migration_pipeline
+from app.services.migration_runner import collect_response, iter_spotify_to_youtube, iter_youtube_to_spotify
+
+
+def to_spotify(user_id: str, playlist_id: str, **options) -> YouTubeToSpotifyRequest:
+    return YouTubeToSpotifyRequest(user_id=user_id, source_youtube_playlist_id=playlist_id, **options)
+
+
+def to_youtube(user_id: str, playlist_id: str, **options) -> SpotifyToYouTubeRequest:
+    return SpotifyToYouTubeRequest(user_id=user_id, source_playlist_id=playlist_id, **options)
+
+
+async def cut_off(events, tracks: int):
+    """Drain a migration until `tracks` track events came out, then drop it like a dead pod would."""
+    seen = 0
+    async for event in events:
+        if event["type"] == "start":
+            target_playlist_id = event["target_playlist_id"]
+        elif event["type"] == "track":
+            seen += 1
+            if seen == tracks:
+                await events.aclose()
+                return target_playlist_id
+    raise AssertionError("migration finished before the cut-off")
+
+
+def test_resume_after_a_cut_off_adds_no_duplicates(connectors):
+    target = asyncio.run(cut_off(iter_youtube_to_spotify(to_spotify("resume-1", "bench-0-60")), 25))
+    written = list(connectors.playlists[target])
+    assert 0 < len(written) < 60
+
+    connectors.stats.clear()
+    response = asyncio.run(collect_response(iter_youtube_to_spotify(to_spotify("resume-1", "bench-0-60"))))
+
+    assert response["target_playlist_id"] == target
+    assert not response["created_new_playlist"]
+    resumed = response["summary"]["resumed_from_checkpoint"]
+    assert resumed >= 20
+    # Checkpointed tracks need no provider calls at all
+    assert connectors.stats["GET /music/search"] == 60 - resumed
+    assert connectors.playlists[target] == list(range(60))
+
+
+def test_resume_skips_writes_that_landed_before_the_checkpoint(connectors, monkeypatch):
+    # The pod dies after a window's writes landed but before they were checkpointed
+    record = migration_pipeline.checkpoint_store.record
+    windows = Counter()
+
+    def dying_record(checkpoint_id, entries):
+        windows["recorded"] += 1
+        if windows["recorded"] == 3:
+            raise RuntimeError("pod died")
+        record(checkpoint_id, entries)
+
+    monkeypatch.setattr(migration_pipeline.checkpoint_store, "record", dying_record)
+    with pytest.raises(RuntimeError):
+        asyncio.run(collect_response(iter_spotify_to_youtube(to_youtube("resume-2", "bench-100-50"))))
+    monkeypatch.setattr(migration_pipeline.checkpoint_store, "record", record)
+
+    (target,) = connectors.playlists
+    assert len(connectors.playlists[target]) == 30
+
+    response = asyncio.run(collect_response(iter_spotify_to_youtube(to_youtube("resume-2", "bench-100-50"))))
+
+    assert response["target_playlist_id"] == target
+    assert response["summary"]["added"] == 50
+    assert connectors.playlists[target] == list(range(100, 150))
@@ -0,0 +1,70 @@
+import asyncio
+from typing import List
+
+from app.models.migration_models import YouTubeToSpotifyRequest
+from app.services.migration_runner import collect_response, iter_youtube_to_spotify
+from app.services.playlist_writer import RetryQueue
+from app.services.spotify_client import SpotifyClient
+
+
+def migrate(user_id: str, playlist_id: str):
+    body = YouTubeToSpotifyRequest(user_id=user_id, source_youtube_playlist_id=playlist_id)
+    return asyncio.run(collect_response(iter_youtube_to_spotify(body)))
+
+
+def fail_first_write(monkeypatch, applied: bool):
+    """The first Spotify write raises; with applied, after reaching the playlist."""
+    add = SpotifyClient.add_tracks_to_playlist
+    calls = []
+
+    async def flaky(user_id: str, playlist_id: str, uris: List[str]):
+        calls.append(uris)
+        if len(calls) > 1:
+            return await add(user_id, playlist_id, uris)
+        if applied:
+            await add(user_id, playlist_id, uris)
+        raise Exception("Failed to add tracks: read timed out")
+
+    monkeypatch.setattr(SpotifyClient, "add_tracks_to_playlist", staticmethod(flaky))
+    return calls
+
+
+def test_a_failed_write_is_retried_at_the_end(connectors, monkeypatch):
+    fail_first_write(monkeypatch, applied=False)
+
+    response = migrate("retry-1", "bench-5000-25")
+
+    assert all(m["added"] for m in response["matches"])
+    assert response["summary"]["failed"] == 0
+    assert response["summary"]["write_retries"]["deferred"] == 10
+    assert response["summary"]["write_retries"]["recovered"] == 10
+    # The retried window lands after the others
+    assert connectors.playlists[response["target_playlist_id"]] == list(range(5010, 5025)) + list(range(5000, 5010))
+
+
+def test_a_write_that_landed_is_not_sent_again(connectors, monkeypatch):
+    calls = fail_first_write(monkeypatch, applied=True)
+
+    response = migrate("retry-2", "bench-5100-25")
+
+    assert all(m["added"] for m in response["matches"])
+    assert response["summary"]["write_retries"]["already_landed"] == 10
+    assert len(calls) == 3
+    assert connectors.playlists[response["target_playlist_id"]] == list(range(5100, 5125))
+
+
+def test_retries_stop_after_the_attempt_limit():
+    calls = []
+
+    async def down(ids: List[str]) -> List[bool]:
+        calls.append(ids)
+        raise Exception("connector unavailable")
+
+    queue = RetryQueue(down, batch_size=2, attempts=3, backoff=0)
+    for token in "abc":
+        queue.defer(token, f"id-{token}")
+
+    assert asyncio.run(queue.drain()) == [("a", False), ("b", False), ("c", False)]
+    assert len(calls) == 6
+    assert queue.stats() == {"deferred": 3, "recovered": 0, "already_landed": 0, "rounds": 3}
+    assert len(queue) == 0
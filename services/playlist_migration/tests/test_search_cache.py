@@ -0,0 +1,40 @@
+import asyncio
+
+from app.services.spotify_client import SpotifyClient
+from app.services.youtube_client import YouTubeClient
+from app.utils.ttl_cache import TTLCache
+
+
+def test_a_repeated_query_is_searched_once(connectors):
+    before = YouTubeClient.search_cache.stats()
+    first = asyncio.run(YouTubeClient.search_videos("Love Night trk42", 10))
+    again = asyncio.run(YouTubeClient.search_videos("  love   NIGHT trk42 ", 10))
+
+    assert again == first
+    assert connectors.stats["GET /youtube/search"] == 1
+    assert YouTubeClient.quota.usage()["by_endpoint"] == {"search": YouTubeClient.quota.cost("search")}
+    after = YouTubeClient.search_cache.stats()
+    assert (after["hits"] - before["hits"], after["misses"] - before["misses"]) == (1, 1)
+
+
+def test_the_cache_is_keyed_by_limit_and_can_be_bypassed(connectors):
+    asyncio.run(SpotifyClient.search_tracks("cache-1", "Love Night trk42", 5))
+    asyncio.run(SpotifyClient.search_tracks("cache-1", "Love Night trk42", 20))
+    asyncio.run(SpotifyClient.search_tracks("cache-1", "Love Night trk42", 5, use_cache=False))
+    asyncio.run(SpotifyClient.search_tracks("cache-1", "Love Night trk42", 5))
+
+    assert connectors.stats["GET /music/search"] == 3
+
+
+def test_entries_expire_and_the_oldest_is_evicted():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+
+    cache.set("d", 4, ttl=-1)
+    assert cache.get("d") is None
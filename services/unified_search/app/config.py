@@ -5,6 +5,14 @@ class Settings(BaseSettings):
     YOUTUBE_CONNECTOR_URL: str
     CORS_ALLOWED_ORIGINS: list[str] = ["*"]
 
+    # Shared keep-alive connection pool for the connector clients (size is per connector)
+    HTTP_POOL_SIZE: int = 20
+    HTTP_KEEPALIVE: bool = True
+    HTTP_CONNECT_TIMEOUT_SECONDS: float = 3.0
+    HTTP_READ_TIMEOUT_SECONDS: float = 10.0
+    HTTP_RETRIES: int = 2
+    HTTP_RETRY_BACKOFF_SECONDS: float = 0.3
+
     class Config:
         env_file = ".env"
 
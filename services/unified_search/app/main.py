@@ -1,11 +1,22 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.config import settings
 from app.routers.search import router as search_router
 from app.routers.playlist import router as playlist_router
+from app.utils.http_pool import http_pool
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    # Close the keep-alive connections to the connectors
+    http_pool.close()
+
 
-app = FastAPI(title="Unified Search Service")
+app = FastAPI(title="Unified Search Service", lifespan=lifespan)
 
 # CORS
 app.add_middleware(
@@ -1,5 +1,5 @@
-import requests
 from app.config import settings
+from app.utils.http_pool import http_pool
 
 class SpotifyClient:
     @staticmethod
@@ -9,7 +9,7 @@ class SpotifyClient:
         params = {"q": query}
 
         try:
-            resp = requests.get(url, headers=headers, params=params)
+            resp = http_pool.get(url, headers=headers, params=params)
             resp.raise_for_status()
             raw = resp.json()
         except Exception:
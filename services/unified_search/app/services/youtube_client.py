@@ -1,5 +1,5 @@
-import requests
 from app.config import settings
+from app.utils.http_pool import http_pool
 
 class YouTubeClient:
     @staticmethod
@@ -8,7 +8,7 @@ class YouTubeClient:
         params = {"q": query}
 
         try:
-            resp = requests.get(url, params=params)
+            resp = http_pool.get(url, params=params)
             resp.raise_for_status()
             data = resp.json()
         except Exception:
@@ -0,0 +1,82 @@
+import threading
+from typing import Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from app.config import settings
+
+
+class ConnectorPool:
+    """
+    One keep-alive requests.Session shared by the connector clients, so
+    each search reuses warm TCP connections instead of opening new ones.
+    Retries cover connection errors and 429/5xx on idempotent methods.
+    """
+
+    RETRY_STATUSES = (429, 502, 503, 504)
+
+    def __init__(self, pool_size: int, keepalive: bool, connect_timeout: float,
+                 read_timeout: float, retries: int, backoff: float):
+        self.pool_size = max(1, pool_size)
+        self.keepalive = keepalive
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.retries = retries
+        self.backoff = backoff
+        self._session: Optional[requests.Session] = None
+        self._lock = threading.Lock()
+
+    def _build(self) -> requests.Session:
+        retry = Retry(
+            total=self.retries,
+            backoff_factor=self.backoff,
+            status_forcelist=self.RETRY_STATUSES,
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=2, pool_maxsize=self.pool_size, max_retries=retry)
+
+        session = requests.Session()
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        if not self.keepalive:
+            session.headers["Connection"] = "close"
+        return session
+
+    @property
+    def session(self) -> requests.Session:
+        # Built lazily so the pool can be reopened after close()
+        with self._lock:
+            if self._session is None:
+                self._session = self._build()
+            return self._session
+
+    def timeout(self) -> Tuple[float, float]:
+        return self.connect_timeout, self.read_timeout
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        kwargs.setdefault("timeout", self.timeout())
+        return self.session.get(url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        kwargs.setdefault("timeout", self.timeout())
+        return self.session.post(url, **kwargs)
+
+    def close(self):
+        with self._lock:
+            if self._session is not None:
+                self._session.close()
+                self._session = None
+
+
+# Global instance used by both connector clients
+http_pool = ConnectorPool(
+    pool_size=settings.HTTP_POOL_SIZE,
+    keepalive=settings.HTTP_KEEPALIVE,
+    connect_timeout=settings.HTTP_CONNECT_TIMEOUT_SECONDS,
+    read_timeout=settings.HTTP_READ_TIMEOUT_SECONDS,
+    retries=settings.HTTP_RETRIES,
+    backoff=settings.HTTP_RETRY_BACKOFF_SECONDS,
+)